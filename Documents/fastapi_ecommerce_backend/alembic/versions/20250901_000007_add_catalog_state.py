@@ -0,0 +1,31 @@
+"""add catalog state
+
+Revision ID: 20250901_000007
+Revises: 20250901_000006
+Create Date: 2025-09-01 00:00:07
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20250901_000007'
+down_revision = '20250901_000006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Single-row table whose version is bumped on every catalog write so that
+    # all workers can drop their in-process catalog caches
+    catalog_state = op.create_table(
+        'catalog_state',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.bulk_insert(catalog_state, [{'id': 1, 'version': 0}])
+
+
+def downgrade() -> None:
+    op.drop_table('catalog_state')
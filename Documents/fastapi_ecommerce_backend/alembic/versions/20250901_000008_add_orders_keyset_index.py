@@ -0,0 +1,24 @@
+"""add orders keyset index
+
+Revision ID: 20250901_000008
+Revises: 20250901_000007
+Create Date: 2025-09-01 00:00:08
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20250901_000008'
+down_revision = '20250901_000007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Backs the (created_at, id) seek used by cursor pagination of orders
+    op.create_index('ix_orders_created_at_id', 'orders', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_created_at_id', table_name='orders')
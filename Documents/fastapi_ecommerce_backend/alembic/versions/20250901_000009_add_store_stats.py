@@ -0,0 +1,42 @@
+"""add store stats
+
+Revision ID: 20250901_000009
+Revises: 20250901_000008
+Create Date: 2025-09-01 00:00:09
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20250901_000009'
+down_revision = '20250901_000008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Single-row dashboard counters maintained by order and product writes
+    op.create_table(
+        'store_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('total_products', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_orders', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('pending_orders', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_revenue', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    # Seed the row from the existing data
+    op.execute(
+        "INSERT INTO store_stats (id, total_products, total_orders, pending_orders, total_revenue) "
+        "SELECT 1, "
+        "(SELECT COUNT(*) FROM products), "
+        "(SELECT COUNT(*) FROM orders), "
+        "(SELECT COUNT(*) FROM orders WHERE status = 'pending'), "
+        "(SELECT COALESCE(SUM(total_price), 0) FROM orders WHERE status = 'completed')"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('store_stats')
@@ -0,0 +1,48 @@
+"""add hot path indexes
+
+Revision ID: 20250901_000011
+Revises: 20250901_000010
+Create Date: 2025-09-01 00:00:11
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20250901_000011'
+down_revision = '20250901_000010'
+branch_labels = None
+depends_on = None
+
+# orders.created_at is already served by ix_orders_created_at_id (20250901_000008)
+INDEXES = [
+    ('ix_carts_session_id', 'carts', ['session_id']),
+    ('ix_cart_items_cart_id', 'cart_items', ['cart_id']),
+    ('ix_order_items_order_id', 'order_items', ['order_id']),
+    ('ix_products_category', 'products', ['category']),
+    ('ix_products_is_active', 'products', ['is_active']),
+    ('ix_orders_status', 'orders', ['status']),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction and
+        # doesn't block writes on the hot tables while it builds
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, unique=False,
+                                postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, _ in reversed(INDEXES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,32 @@
+"""add product version and updated_at
+
+Revision ID: 20250901_000012
+Revises: 20250901_000011
+Create Date: 2025-09-01 00:00:12
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20250901_000012'
+down_revision = '20250901_000011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Per-product validators for ETag / Last-Modified
+    op.add_column('products', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+    if op.get_bind().dialect.name == 'postgresql':
+        op.add_column('products', sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False,
+                                            server_default=sa.text('NOW()')))
+    else:
+        # SQLite can't ADD COLUMN with a non-constant default; the model supplies it on insert
+        op.add_column('products', sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+        op.execute("UPDATE products SET updated_at = CURRENT_TIMESTAMP")
+
+
+def downgrade() -> None:
+    op.drop_column('products', 'updated_at')
+    op.drop_column('products', 'version')
@@ -0,0 +1,34 @@
+"""index carts.updated_at for the idle cart purge
+
+Revision ID: 20250901_000015
+Revises: 20250901_000014
+Create Date: 2025-09-01 00:00:15
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20250901_000015'
+down_revision = '20250901_000014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Carts from before updated_at existed count as idle since they were created
+    op.execute("UPDATE carts SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL")
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index('ix_carts_updated_at', 'carts', ['updated_at'], unique=False,
+                            postgresql_concurrently=True, if_not_exists=True)
+    else:
+        op.create_index('ix_carts_updated_at', 'carts', ['updated_at'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index('ix_carts_updated_at', table_name='carts', postgresql_concurrently=True, if_exists=True)
+    else:
+        op.drop_index('ix_carts_updated_at', table_name='carts', if_exists=True)
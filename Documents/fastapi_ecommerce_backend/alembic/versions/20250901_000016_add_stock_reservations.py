@@ -0,0 +1,36 @@
+"""add stock reservations
+
+Revision ID: 20250901_000016
+Revises: 20250901_000015
+Create Date: 2025-09-01 00:00:16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20250901_000016'
+down_revision = '20250901_000015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Stock held for carts when STOCK_RESERVATION_TTL is set, released by python -m app.commands.sweep_reservations
+    op.create_table(
+        'stock_reservations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.String(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('session_id', 'product_id', name='uq_stock_reservation_session_product'),
+    )
+    op.create_index('ix_stock_reservations_expires_at', 'stock_reservations', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stock_reservations_expires_at', table_name='stock_reservations')
+    op.drop_table('stock_reservations')
@@ -0,0 +1,88 @@
+"""
+Fingerprint the static assets and precompress them for PrecompressedStaticFiles.
+Every file under app/static is copied to the build directory with a content
+hash in its name (css/client.css -> css/client.1a2b3c4d5e.css), text assets get
+.gz and .br siblings, and manifest.json maps source paths to hashed ones for the
+static_url() template helper. Brotli output needs the optional brotli package.
+Run it on deploy, before the workers start.
+
+Usage: python -m app.commands.build_static [--output app/static_build]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from typing import Dict
+from app.core.static import MANIFEST_NAME, STATIC_BUILD_DIR, STATIC_DIR
+
+# Extensions worth compressing; images and fonts are already compressed
+COMPRESSIBLE = {".css", ".js", ".mjs", ".map", ".json", ".svg", ".txt", ".html", ".xml"}
+HASH_LENGTH = 10
+
+
+def fingerprint(path: str, content: bytes) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def write_compressed(target: str, content: bytes, brotli) -> list:
+    """Write .gz (and .br) siblings of target when they actually save bytes"""
+    variants = [(".gz", gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", brotli.compress(content, quality=11)))
+    written = []
+    for suffix, compressed in variants:
+        if len(compressed) < len(content):
+            with open(target + suffix, "wb") as out:
+                out.write(compressed)
+            written.append(suffix)
+    return written
+
+
+def build(source: str = STATIC_DIR, output: str = STATIC_BUILD_DIR) -> Dict[str, str]:
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        print("brotli is not installed; writing gzip variants only")
+
+    if os.path.realpath(output) == os.path.realpath(source):
+        raise SystemExit("The build directory must differ from the source directory")
+    shutil.rmtree(output, ignore_errors=True)
+
+    manifest = {}
+    for directory, _, files in os.walk(source):
+        for name in sorted(files):
+            path = os.path.relpath(os.path.join(directory, name), source).replace(os.sep, "/")
+            with open(os.path.join(source, path), "rb") as asset:
+                content = asset.read()
+
+            hashed = fingerprint(path, content)
+            target = os.path.join(output, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as out:
+                out.write(content)
+            variants = []
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE:
+                variants = write_compressed(target, content, brotli)
+            manifest[path] = hashed
+            print(f"{path} -> {hashed} {' '.join(variants)}".rstrip())
+
+    with open(os.path.join(output, MANIFEST_NAME), "w") as out:
+        json.dump(manifest, out, indent=2, sort_keys=True)
+    return manifest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fingerprint and precompress static assets")
+    parser.add_argument("--source", default=STATIC_DIR)
+    parser.add_argument("--output", default=STATIC_BUILD_DIR)
+    args = parser.parse_args()
+    manifest = build(args.source, args.output)
+    print(f"{len(manifest)} assets written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
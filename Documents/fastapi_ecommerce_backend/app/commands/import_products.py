@@ -0,0 +1,28 @@
+"""
+Bulk create/update products from a CSV or NDJSON file, keyed on product name.
+
+Usage: python -m app.commands.import_products FILE [--format csv|ndjson] [--batch-size 1000]
+"""
+import argparse
+import sys
+from app.services.product_import import DEFAULT_BATCH_SIZE, IMPORT_FORMATS, detect_format, import_products_file
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk import products")
+    parser.add_argument("file")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    with open(args.file, "rb") as stream:
+        report = import_products_file(stream, args.format or detect_format(args.file), args.batch_size)
+
+    for error in report.errors:
+        print(f"row {error['row']}: {error['error']}", file=sys.stderr)
+    print(f"created={report.created} updated={report.updated} failed={report.failed}")
+    sys.exit(1 if report.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
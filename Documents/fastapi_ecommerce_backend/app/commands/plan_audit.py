@@ -0,0 +1,122 @@
+"""
+Run the application's hot queries through EXPLAIN and flag sequential scans
+and slow statements. Exits non-zero when anything is flagged, so it can gate
+a deploy. Run it against a production-sized copy of the database: planners
+legitimately scan tiny tables.
+
+Usage: python -m app.commands.plan_audit [--slow-ms 50] [--session-id ID] [--order-id ID]
+"""
+import argparse
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from app.database.session import SessionLocal
+from app.models.order import Order
+from app.models.product import Product
+from app.models.store_stats import StoreStats
+from app.services.cart import cart_contents_query
+from app.services.catalog import catalog_version_query
+from app.services.orders import order_items_query
+from app.services.search import is_postgres, postgres_search_query
+from app.services.stats import STORE_STATS_ID
+
+PAGE_SIZE = 20
+
+
+def hot_queries(session_id: str, order_id: int, postgres: bool) -> Dict[str, object]:
+    """The statements behind the busiest endpoints, with representative parameters"""
+    queries = {
+        "cart contents": cart_contents_query(session_id),
+        "order items": order_items_query(order_id),
+        "active products page": select(Product).where(Product.is_active == True)
+        .order_by(Product.id).limit(PAGE_SIZE),
+        "products by category": select(Product).where(Product.category == "audit", Product.is_active == True)
+        .order_by(Product.id).limit(PAGE_SIZE),
+        "categories": select(Product.category).distinct().where(Product.category.isnot(None)),
+        "orders page": select(Order).order_by(Order.created_at.desc(), Order.id.desc()).limit(PAGE_SIZE),
+        "orders by status": select(Order).where(Order.status == "pending")
+        .order_by(Order.created_at.desc(), Order.id.desc()).limit(PAGE_SIZE),
+        "catalog version": catalog_version_query(),
+        "store stats": select(StoreStats).where(StoreStats.id == STORE_STATS_ID),
+    }
+    if postgres:
+        queries["product search"] = postgres_search_query("audit").limit(PAGE_SIZE)
+    return queries
+
+
+def _driver_sql(db: Session, statement) -> Tuple[str, object]:
+    compiled = statement.compile(dialect=db.bind.dialect, compile_kwargs={"render_postcompile": True})
+    if compiled.positional:
+        return str(compiled), tuple(compiled.params[name] for name in compiled.positiontup)
+    return str(compiled), compiled.params
+
+
+def _explain(db: Session, prefix: str, statement):
+    sql, params = _driver_sql(db, statement)
+    return db.connection().exec_driver_sql(prefix + sql, params).all()
+
+
+def sqlite_scans(db: Session, statement) -> List[str]:
+    """EXPLAIN QUERY PLAN steps that read a whole table without an index"""
+    return [
+        row.detail for row in _explain(db, "EXPLAIN QUERY PLAN ", statement)
+        if row.detail.startswith("SCAN") and "USING" not in row.detail and "CONSTANT ROW" not in row.detail
+    ]
+
+
+def postgres_scans(db: Session, statement) -> List[str]:
+    """Seq Scan nodes anywhere in the EXPLAIN (FORMAT JSON) plan tree"""
+    plan = _explain(db, "EXPLAIN (FORMAT JSON) ", statement)[0][0][0]["Plan"]
+    scans, nodes = [], [plan]
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan":
+            scans.append(f"Seq Scan on {node['Relation Name']} (~{node['Plan Rows']} rows)")
+        nodes.extend(node.get("Plans", []))
+    return scans
+
+
+def audit(db: Session, session_id: str, order_id: int, slow_ms: float) -> int:
+    """Print one line per hot query and return how many were flagged"""
+    postgres = is_postgres(db)
+    find_scans: Callable = postgres_scans if postgres else sqlite_scans
+    flagged = 0
+
+    for name, statement in hot_queries(session_id, order_id, postgres).items():
+        scans = find_scans(db, statement)
+        started = time.perf_counter()
+        db.execute(statement).all()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        problems = list(scans)
+        if elapsed_ms > slow_ms:
+            problems.append(f"slow: {elapsed_ms:.1f}ms > {slow_ms:g}ms")
+        flagged += bool(problems)
+        print(f"{'FLAG' if problems else 'ok':4}  {name:22} {elapsed_ms:8.1f}ms")
+        for problem in problems:
+            print(f"      - {problem}")
+
+    return flagged
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="EXPLAIN the hot queries and flag regressions")
+    parser.add_argument("--slow-ms", type=float, default=50.0, help="flag statements slower than this")
+    parser.add_argument("--session-id", default="plan-audit", help="cart session id to plan with")
+    parser.add_argument("--order-id", type=int, default=1, help="order id to plan with")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        flagged = audit(db, args.session_id, args.order_id, args.slow_ms)
+    finally:
+        db.close()
+
+    print(f"{flagged} flagged")
+    sys.exit(1 if flagged else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Delete SQL carts nobody has written to for CART_TTL seconds, with their
+items. Runs in committed batches so it never holds long locks; schedule it
+(cron) daily. Redis carts expire on their own.
+
+Usage: python -m app.commands.purge_carts [--idle-seconds 604800] [--batch-size 1000] [--max-batches N]
+"""
+import argparse
+from app.database.session import SessionLocal
+from app.services.cart import purge_idle_carts
+from app.services.cart_store import CART_TTL
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Delete idle carts")
+    parser.add_argument("--idle-seconds", type=int, default=CART_TTL)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--max-batches", type=int, default=None, help="stop after this many batches")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = purge_idle_carts(db, args.idle_seconds, args.batch_size, args.max_batches)
+        print(f"carts={report['carts']} items={report['items']} batches={report['batches']}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""
+Delete idempotency keys older than IDEMPOTENCY_KEY_TTL. Schedule it (cron)
+so the idempotency_keys table stays small.
+
+Usage: python -m app.commands.purge_idempotency_keys
+"""
+from app.database.session import SessionLocal
+from app.services.idempotency import IDEMPOTENCY_KEY_TTL, purge_idempotency_keys
+
+
+def main() -> None:
+    db = SessionLocal()
+    try:
+        removed = purge_idempotency_keys(db)
+        print(f"removed={removed} ttl={IDEMPOTENCY_KEY_TTL}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
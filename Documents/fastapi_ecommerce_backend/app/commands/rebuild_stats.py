@@ -0,0 +1,24 @@
+"""
+Rebuild the store_stats row from the products and orders tables.
+
+Usage: python -m app.commands.rebuild_stats
+"""
+from app.database.session import SessionLocal
+from app.services.stats import rebuild_stats
+
+
+def main() -> None:
+    db = SessionLocal()
+    try:
+        stats = rebuild_stats(db)
+        db.commit()
+        print(
+            f"products={stats.total_products} orders={stats.total_orders} "
+            f"pending={stats.pending_orders} revenue={stats.total_revenue}"
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
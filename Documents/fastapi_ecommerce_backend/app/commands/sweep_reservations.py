@@ -0,0 +1,28 @@
+"""
+Return stock held by expired cart reservations to products.stock. Schedule it
+(cron) every minute or so when STOCK_RESERVATION_TTL is set; expired holds
+keep stock unavailable until it runs.
+
+Usage: python -m app.commands.sweep_reservations [--batch-size 1000] [--max-batches N]
+"""
+import argparse
+from app.database.session import SessionLocal
+from app.services.inventory import sweep_reservations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Release expired stock reservations")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--max-batches", type=int, default=None, help="stop after this many batches")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = sweep_reservations(db, args.batch_size, args.max_batches)
+        print(f"reservations={report['reservations']} units={report['units']} batches={report['batches']}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
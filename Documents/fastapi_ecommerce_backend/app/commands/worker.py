@@ -0,0 +1,61 @@
+"""
+Run background jobs from the jobs table. Start one or more of these next to
+the web workers; on PostgreSQL they share the queue through SKIP LOCKED,
+on SQLite run a single worker. SIGTERM/SIGINT stop it after the current job.
+
+Usage: python -m app.commands.worker [--once] [--poll-interval 1.0]
+"""
+import argparse
+import logging
+import os
+import signal
+import time
+from app.database.session import SessionLocal
+from app.services.jobs import run_next_job, run_pending_jobs
+import app.services.tasks  # noqa: F401  (registers the job handlers)
+
+# Seconds to sleep when the queue is empty
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+
+
+class Worker:
+    def __init__(self, poll_interval: float = JOB_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self.stopping = False
+
+    def stop(self, *_) -> None:
+        self.stopping = True
+
+    def run(self) -> None:
+        db = SessionLocal()
+        try:
+            while not self.stopping:
+                if not run_next_job(db):
+                    time.sleep(self.poll_interval)
+        finally:
+            db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run queued background jobs")
+    parser.add_argument("--once", action="store_true", help="run the jobs due now, then exit")
+    parser.add_argument("--poll-interval", type=float, default=JOB_POLL_INTERVAL)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if args.once:
+        db = SessionLocal()
+        try:
+            print(f"ran={run_pending_jobs(db)}")
+        finally:
+            db.close()
+        return
+
+    worker = Worker(args.poll_interval)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.metrics import metrics
+from app.core.responses import FastJSONResponse
+
+
+def parse_rate(spec: str) -> Optional[Tuple[float, float]]:
+    """'60/60' -> (60 requests of burst, refilled at 1 per second); empty or 0 disables the limit"""
+    if not spec.strip():
+        return None
+    requests, _, seconds = spec.partition("/")
+    requests, seconds = float(requests), float(seconds or 1)
+    if requests <= 0:
+        return None
+    return requests, requests / seconds
+
+
+# Token buckets per session_id and per client IP, "requests/seconds", per worker
+RATE_LIMITS = {
+    "catalog": parse_rate(os.getenv("RATE_LIMIT_CATALOG", "")),
+    "cart_writes": parse_rate(os.getenv("RATE_LIMIT_CART_WRITES", "")),
+    "checkout": parse_rate(os.getenv("RATE_LIMIT_CHECKOUT", "")),
+}
+# An IP's bucket holds this many sessions' worth of a budget, shared by every
+# session_id it sends (so several shoppers behind one NAT still fit), and a
+# request must get a token from both: fresh session ids buy no fresh budget
+RATE_LIMIT_IP_FACTOR = float(os.getenv("RATE_LIMIT_IP_FACTOR", "10"))
+# Sessions, and separately IPs, tracked per budget; the least recently seen are forgotten first
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+# Shed requests with a 503 while any pool has this fraction of its size + overflow
+# checked out, or its checkouts waited this long on average recently (0 disables either)
+SHED_POOL_UTILIZATION = float(os.getenv("SHED_POOL_UTILIZATION", "0"))
+SHED_POOL_WAIT_MS = float(os.getenv("SHED_POOL_WAIT_MS", "0"))
+# Seconds of checkouts the average wait covers
+SHED_POOL_WAIT_WINDOW = float(os.getenv("SHED_POOL_WAIT_WINDOW", "5"))
+SHED_RETRY_AFTER = int(os.getenv("SHED_RETRY_AFTER", "1"))
+
+# Never limited or shed: assets, scrapes and health checks don't touch the database
+ADMISSION_EXEMPT_PATHS = ("/static/", "/metrics", "/api/health")
+
+
+class CheckoutWaits:
+    """Connection checkout waits of one pool over a sliding window"""
+
+    def __init__(self, window: float, maxlen: int = 1024):
+        self.window = window
+        self._samples = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append((time.monotonic(), seconds))
+
+    def mean(self) -> float:
+        """Average wait in the window; 0 once checkouts stop, so shedding lifts by itself"""
+        cutoff = time.monotonic() - self.window
+        with self._lock:
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            if not self._samples:
+                return 0.0
+            return sum(seconds for _, seconds in self._samples) / len(self._samples)
+
+
+class CheckoutTimingMixin:
+    """Records how long each checkout waited for a connection (including a new overflow connect)"""
+
+    def __init__(self, *args, pool_size: int = 5, max_overflow: int = 10, **kwargs):
+        super().__init__(*args, pool_size=pool_size, max_overflow=max_overflow, **kwargs)
+        self.capacity = pool_size + max(max_overflow, 0)
+        self.checkout_waits = CheckoutWaits(SHED_POOL_WAIT_WINDOW)
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.checkout_waits.observe(time.perf_counter() - started)
+
+
+class TimedQueuePool(CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class PoolPressure:
+    """Decides from the registered pools whether new requests should be turned away"""
+
+    def __init__(self, utilization: float, wait_seconds: float):
+        self.utilization = utilization
+        self.wait_seconds = wait_seconds
+        self._engines = []
+
+    def add_engine(self, engine) -> None:
+        # Only the timed queue pools track checkouts; NullPool/StaticPool engines are ignored
+        if hasattr(engine.pool, "checkout_waits"):
+            self._engines.append(engine)
+
+    def overloaded(self) -> Optional[str]:
+        """The reason to shed ("pool_busy" or "pool_wait"), or None"""
+        if not (self.utilization or self.wait_seconds):
+            return None
+        for engine in self._engines:
+            # engine.pool is replaced if the engine is disposed, so look it up each time
+            pool = engine.pool
+            if self.utilization and pool.checkedout() >= self.utilization * pool.capacity:
+                return "pool_busy"
+            if self.wait_seconds and pool.checkout_waits.mean() >= self.wait_seconds:
+                return "pool_wait"
+        return None
+
+
+pool_pressure = PoolPressure(SHED_POOL_UTILIZATION, SHED_POOL_WAIT_MS / 1000)
+
+
+class TokenBuckets:
+    """
+    Token buckets keyed by client, LRU-bounded. Only touched from the event
+    loop, so no lock is needed.
+    """
+
+    def __init__(self, burst: float, rate: float, maxsize: int = RATE_LIMIT_MAX_KEYS):
+        self.burst = burst
+        self.rate = rate
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, key: str) -> float:
+        """Take a token for key: 0 when allowed, else seconds until one is available"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+def request_budget(method: str, path: str) -> Optional[str]:
+    """The rate-limit budget a request draws from, if any"""
+    if method == "POST" and path.rstrip("/") == "/orders":
+        return "checkout"
+    if path.startswith("/cart"):
+        return None if method in ("GET", "HEAD") else "cart_writes"
+    if method in ("GET", "HEAD") and (path == "/" or path.startswith(("/products", "/product/"))):
+        return "catalog"
+    return None
+
+
+def session_key(scope: Scope) -> Optional[str]:
+    """The request's session_id, if it sent one"""
+    session_id = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("session_id")
+    return session_id[0] if session_id else None
+
+
+def client_address(scope: Scope) -> str:
+    """
+    The client's address. Behind a proxy, run uvicorn with --proxy-headers so
+    that is the real client's.
+    """
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class ClientBudget:
+    """
+    One budget's buckets: a request takes a token from its client IP's bucket
+    and, if it sent a session_id, from that session's too, waiting for the
+    stricter. Sessions only get a bucket once their IP admitted them, and IPs
+    keep their own LRU, so made-up session ids neither dodge the limit nor
+    churn out other clients' buckets faster than the IP budget allows.
+    """
+
+    def __init__(self, burst: float, rate: float, ip_factor: float = RATE_LIMIT_IP_FACTOR):
+        self.sessions = TokenBuckets(burst, rate)
+        self.ips = TokenBuckets(burst * ip_factor, rate * ip_factor)
+
+    def take(self, scope: Scope) -> float:
+        """0 when allowed, else seconds until the request would be"""
+        wait = self.ips.take(client_address(scope))
+        session_id = session_key(scope)
+        if wait or session_id is None:
+            return wait
+        return self.sessions.take(session_id)
+
+
+class AdmissionMiddleware:
+    """
+    Fails requests fast instead of letting them queue behind the connection
+    pool: 503 + Retry-After while a pool is saturated (see PoolPressure), and
+    429 + Retry-After once a client has spent its catalog, cart-write or
+    checkout budget.
+    """
+
+    def __init__(self, app: ASGIApp, rate_limits: Dict[str, Optional[Tuple[float, float]]] = None,
+                 pressure: PoolPressure = pool_pressure, ip_factor: float = RATE_LIMIT_IP_FACTOR):
+        self.app = app
+        self.pressure = pressure
+        self.budgets = {
+            budget: ClientBudget(*limit, ip_factor) for budget, limit in (rate_limits or RATE_LIMITS).items() if limit
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(ADMISSION_EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        budget = request_budget(scope["method"], scope["path"])
+        reason = self.pressure.overloaded()
+        if reason:
+            response = self.reject(503, "Server busy, retry shortly", SHED_RETRY_AFTER, budget, reason)
+        else:
+            wait = self.budgets[budget].take(scope) if budget in self.budgets else 0.0
+            if not wait:
+                await self.app(scope, receive, send)
+                return
+            response = self.reject(429, "Too many requests", math.ceil(wait), budget, "rate_limited")
+        await response(scope, receive, send)
+
+    @staticmethod
+    def reject(status_code: int, detail: str, retry_after: int, budget: Optional[str], reason: str):
+        metrics.observe_rejection(budget or "other", reason)
+        return FastJSONResponse(
+            {"detail": detail}, status_code=status_code, headers={"Retry-After": str(retry_after)}
+        )
@@ -0,0 +1,68 @@
+from typing import Set
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import Message, Receive, Scope, Send
+
+# Media types that are already compressed; gzipping them only burns CPU
+INCOMPRESSIBLE_TYPES = (
+    "image/", "video/", "audio/", "font/woff", "application/zip", "application/gzip", "application/x-brotli",
+)
+
+
+def accepted_encodings(accept_encoding: str) -> Set[str]:
+    """Content codings an Accept-Encoding header allows (q=0 excludes one)"""
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that honours q=0 in Accept-Encoding and leaves already
+    compressed media types alone. Bodies at or above minimum_size are
+    compressed; streaming bodies are compressed chunk by chunk. Compressed
+    responses get Vary: Accept-Encoding and a weak ETag, since the gzip
+    bytes differ from the identity body the strong tag names.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and "gzip" in accepted_encodings(Headers(scope=scope).get("accept-encoding", "")):
+            responder = SelectiveGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+def weaken_etag(headers: MutableHeaders) -> None:
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = "W/" + etag
+
+
+class SelectiveGZipResponder(GZipResponder):
+    def will_compress(self, message: Message) -> bool:
+        """Whether GZipResponder compresses the response this first body message starts"""
+        return not self.content_encoding_set and (
+            message.get("more_body", False) or len(message.get("body", b"")) >= self.minimum_size
+        )
+
+    async def send_with_gzip(self, message: Message) -> None:
+        if message["type"] == "http.response.body" and not self.started and self.will_compress(message):
+            # GZipResponder adds Vary: Accept-Encoding itself
+            weaken_etag(MutableHeaders(raw=self.initial_message["headers"]))
+        await super().send_with_gzip(message)
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            # Same pass-through path as a response that already has a Content-Encoding
+            if content_type.startswith(INCOMPRESSIBLE_TYPES):
+                self.content_encoding_set = True
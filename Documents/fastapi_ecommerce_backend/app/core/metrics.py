@@ -0,0 +1,175 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event
+
+# Prometheus text exposition format served by /metrics
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds (seconds) of the request latency histogram
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Upper bounds of the statements-per-request histogram; N+1 patterns show up in the tail
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class RequestTimings:
+    """SQL statements and DB time accumulated while serving one request"""
+
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+# Set by the metrics middleware; engine events add to it from any thread or
+# greenlet that inherited the request's context
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("current_timings", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = conn.info["query_started_at"].pop()
+    timings = current_timings.get()
+    if timings is not None:
+        timings.queries += 1
+        timings.db_seconds += time.perf_counter() - started_at
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    started = exception_context.connection.info.get("query_started_at") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine) -> None:
+    """Count statements and DB time for the current request on a (sync) Engine"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name: str, labels: str) -> List[str]:
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+        cumulative += self.counts[-1]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Per-worker request metrics, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency: Dict[Tuple[str, str], Histogram] = {}
+        self._queries: Dict[Tuple[str, str], Histogram] = {}
+        self._db_seconds: Dict[Tuple[str, str], float] = defaultdict(float)
+        self._responses: Dict[Tuple[str, str, int], int] = defaultdict(int)
+        self._errors: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._rejections: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._engines = []
+
+    def add_engine(self, name: str, engine) -> None:
+        """Report connection-pool gauges for an engine"""
+        self._engines.append((name, engine))
+
+    def observe_request(self, method: str, route: str, status_code: int, seconds: float,
+                        timings: RequestTimings) -> None:
+        key = (method, route)
+        with self._lock:
+            if key not in self._latency:
+                self._latency[key] = Histogram(LATENCY_BUCKETS)
+                self._queries[key] = Histogram(QUERY_BUCKETS)
+            self._latency[key].observe(seconds)
+            self._queries[key].observe(timings.queries)
+            self._db_seconds[key] += timings.db_seconds
+            self._responses[(method, route, status_code)] += 1
+            if status_code >= 500:
+                self._errors[key] += 1
+
+    def observe_rejection(self, budget: str, reason: str) -> None:
+        """A request turned away by admission control before reaching a route"""
+        with self._lock:
+            self._rejections[(budget, reason)] += 1
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            lines.append("# TYPE http_request_duration_seconds histogram")
+            for (method, route), histogram in sorted(self._latency.items()):
+                lines.extend(histogram.lines("http_request_duration_seconds", _labels(method, route)))
+
+            lines.append("# TYPE http_request_db_queries histogram")
+            for (method, route), histogram in sorted(self._queries.items()):
+                lines.extend(histogram.lines("http_request_db_queries", _labels(method, route)))
+
+            lines.append("# TYPE http_request_db_seconds_total counter")
+            for (method, route), seconds in sorted(self._db_seconds.items()):
+                lines.append(f"http_request_db_seconds_total{{{_labels(method, route)}}} {seconds:.6f}")
+
+            lines.append("# TYPE http_responses_total counter")
+            for (method, route, status_code), count in sorted(self._responses.items()):
+                lines.append(f'http_responses_total{{{_labels(method, route)},status="{status_code}"}} {count}')
+
+            lines.append("# TYPE http_request_errors_total counter")
+            for (method, route), count in sorted(self._errors.items()):
+                lines.append(f"http_request_errors_total{{{_labels(method, route)}}} {count}")
+
+            lines.append("# TYPE http_requests_rejected_total counter")
+            for (budget, reason), count in sorted(self._rejections.items()):
+                lines.append(f'http_requests_rejected_total{{budget="{budget}",reason="{reason}"}} {count}')
+
+        for metric, read in (
+            ("db_pool_size", lambda pool: pool.size()),
+            ("db_pool_checked_out", lambda pool: pool.checkedout()),
+            # QueuePool counts overflow from -pool_size until the pool is full
+            ("db_pool_overflow", lambda pool: max(pool.overflow(), 0)),
+        ):
+            lines.append(f"# TYPE {metric} gauge")
+            for name, engine in self._engines:
+                # Only QueuePool tracks sizes; NullPool/StaticPool have nothing to report
+                if hasattr(engine.pool, "checkedout"):
+                    lines.append(f'{metric}{{engine="{name}"}} {read(engine.pool)}')
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(method: str, route: str) -> str:
+    route = route.replace("\\", "\\\\").replace('"', '\\"')
+    return f'method="{method}",route="{route}"'
+
+
+def server_timing(timings: RequestTimings, total_seconds: float) -> str:
+    """Server-Timing header value with DB time, statement count and total time"""
+    return (
+        f'db;dur={timings.db_seconds * 1000:.1f};desc="{timings.queries} queries", '
+        f"total;dur={total_seconds * 1000:.1f}"
+    )
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,14 @@
+from typing import Any
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    orjson-rendered JSON; aware UTC datetimes are written with a "Z" suffix as
+    Pydantic does. Returning one from a route skips response_model validation
+    and serialization, so only pass data already shaped like the declared model.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
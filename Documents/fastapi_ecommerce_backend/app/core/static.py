@@ -0,0 +1,90 @@
+import json
+import mimetypes
+import os
+import stat
+from typing import Dict
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+from app.core.compression import accepted_encodings
+
+# Source assets, and the output of python -m app.commands.build_static
+STATIC_DIR = "app/static"
+STATIC_BUILD_DIR = os.getenv("STATIC_BUILD_DIR", "app/static_build")
+MANIFEST_NAME = "manifest.json"
+
+# Precompressed variants, in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# Fingerprinted names change with their content, so they can be cached forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Unhashed names (old links, product images) are revalidated against their ETag
+STATIC_CACHE_CONTROL = "public, no-cache"
+
+
+def load_manifest(build_dir: str = STATIC_BUILD_DIR) -> Dict[str, str]:
+    """Source path -> fingerprinted path, empty when the assets haven't been built"""
+    try:
+        with open(os.path.join(build_dir, MANIFEST_NAME)) as manifest:
+            return json.load(manifest)
+    except FileNotFoundError:
+        return {}
+
+
+manifest = load_manifest()
+
+
+def static_url(path: str) -> str:
+    """URL of a static asset, fingerprinted when a build is present (a Jinja global)"""
+    return "/static/" + manifest.get(path, path)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles over the build directory with the sources as a fallback.
+    Serves a .br/.gz sibling when the client accepts it and marks
+    fingerprinted files immutable.
+    """
+
+    def __init__(self, build_dir: str = STATIC_BUILD_DIR, **kwargs):
+        super().__init__(directory=STATIC_DIR, **kwargs)
+        if os.path.isdir(build_dir):
+            self.all_directories = [build_dir, *self.all_directories]
+        self.immutable = set(manifest.values())
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        response = None
+        if scope["method"] in ("GET", "HEAD"):
+            response = await self.encoded_response(path, scope, accepted)
+        if response is None:
+            response = await super().get_response(path, scope)
+            # CompressionMiddleware adds Vary itself when it gzips this body
+            if "gzip" not in accepted:
+                response.headers.setdefault("Vary", "Accept-Encoding")
+        if response.status_code in (200, 304):
+            immutable = path.replace(os.sep, "/") in self.immutable
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL if immutable else STATIC_CACHE_CONTROL
+        return response
+
+    async def encoded_response(self, path: str, scope: Scope, accepted):
+        request_headers = Headers(scope=scope)
+        for encoding, suffix in ENCODINGS:
+            if encoding not in accepted:
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+                continue
+            # Each variant keeps its own stat-based ETag, so caches never mix encodings
+            response = FileResponse(
+                full_path,
+                stat_result=stat_result,
+                media_type=mimetypes.guess_type(path)[0] or "application/octet-stream",
+                headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+            )
+            if self.is_not_modified(response.headers, request_headers):
+                return NotModifiedResponse(response.headers)
+            return response
+        return None
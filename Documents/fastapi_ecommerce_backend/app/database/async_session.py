@@ -0,0 +1,84 @@
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.core.admission import TimedAsyncQueuePool, pool_pressure
+from app.core.metrics import instrument_engine, metrics
+from app.database.session import (
+    DATABASE_READ_URL,
+    DATABASE_URL,
+    DB_REPLICA_RETRY_SECONDS,
+    engine_options,
+    logger,
+    replica_status,
+)
+
+
+def to_async_url(url: str) -> str:
+    """
+    Map a sync URL onto an async driver: aiosqlite for SQLite, while
+    postgresql+psycopg already resolves to psycopg's async dialect
+    """
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+
+def make_async_engine(url: str, name: str):
+    options = engine_options(url)
+    if "pool_size" in options:
+        options["poolclass"] = TimedAsyncQueuePool
+    engine = create_async_engine(url, **options)
+    # Cursor events fire on the sync engine the async one wraps
+    instrument_engine(engine.sync_engine)
+    metrics.add_engine(name, engine.sync_engine)
+    pool_pressure.add_engine(engine.sync_engine)
+    return engine
+
+
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+async_engine = make_async_engine(ASYNC_DATABASE_URL, "async")
+async_read_engine = (
+    make_async_engine(to_async_url(DATABASE_READ_URL), "async-replica") if DATABASE_READ_URL else async_engine
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=async_read_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+async def open_async_read_session() -> AsyncSession:
+    """Async counterpart of open_read_session; shares the replica's down state"""
+    if async_read_engine is not async_engine and replica_status.available():
+        db = AsyncReadSessionLocal()
+        try:
+            await db.connection()
+            return db
+        except DBAPIError:
+            await db.close()
+            replica_status.mark_down()
+            logger.warning("Read replica unavailable; using the primary for %ss", DB_REPLICA_RETRY_SECONDS)
+    return AsyncSessionLocal()
+
+# Dependency to get async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Dependency for read-only endpoints that tolerate replica lag
+async def get_async_read_db():
+    async with await open_async_read_session() as db:
+        yield db
+
+__all__ = [
+    "async_engine", "async_read_engine", "AsyncSessionLocal", "AsyncReadSessionLocal",
+    "ASYNC_DATABASE_URL", "get_async_db", "get_async_read_db", "open_async_read_session",
+]
@@ -0,0 +1,59 @@
+import anyio
+from app.database.session import DB_MODE, DB_POOL_WARMUP, engine, read_engine
+
+
+def _engines() -> list:
+    return [engine] if read_engine is engine else [engine, read_engine]
+
+
+def _async_engines() -> list:
+    # Only imported in async mode: creating the async engines needs their drivers
+    if DB_MODE != "async":
+        return []
+    from app.database.async_session import async_engine, async_read_engine
+    return [async_engine] if async_read_engine is async_engine else [async_engine, async_read_engine]
+
+
+def _warm_up(sync_engine, connections: int) -> None:
+    opened = []
+    try:
+        for _ in range(connections):
+            opened.append(sync_engine.connect())
+    finally:
+        for connection in opened:
+            connection.close()
+
+
+async def reset_engines() -> None:
+    """
+    Start this process with empty pools. After a preload fork the parent's
+    pooled connections must not be shared, so they are dropped unclosed.
+    """
+    for sync_engine in _engines():
+        sync_engine.dispose(close=False)
+    for async_engine in _async_engines():
+        await async_engine.dispose(close=False)
+
+
+async def warm_up_engines(connections: int = DB_POOL_WARMUP) -> None:
+    """Open connections in every pool ahead of the first requests"""
+    if connections <= 0:
+        return
+    for sync_engine in _engines():
+        await anyio.to_thread.run_sync(_warm_up, sync_engine, connections)
+    for async_engine in _async_engines():
+        opened = []
+        try:
+            for _ in range(connections):
+                opened.append(await async_engine.connect())
+        finally:
+            for connection in opened:
+                await connection.close()
+
+
+async def dispose_engines() -> None:
+    """Close every pooled connection on shutdown"""
+    for sync_engine in _engines():
+        sync_engine.dispose()
+    for async_engine in _async_engines():
+        await async_engine.dispose()
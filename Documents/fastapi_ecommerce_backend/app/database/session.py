@@ -1,30 +1,126 @@
+import logging
 import os
+import threading
+import time
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from app.core.admission import TimedQueuePool, pool_pressure
+from app.core.metrics import instrument_engine, metrics
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables from .env file
 load_dotenv()
 
+def normalize_url(url: str) -> str:
+    """Map postgres:// and postgresql:// URLs onto the psycopg driver"""
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+psycopg://", 1)
+    if url.startswith("postgresql://") and "+" not in url.split("://", 1)[0]:
+        return url.replace("postgresql://", "postgresql+psycopg://", 1)
+    return url
+
+
 # Read database URL from environment; fallback to sqlite for local dev
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./dev.db")
+DATABASE_URL = normalize_url(os.getenv("DATABASE_URL", "sqlite:///./dev.db"))
+
+# Optional read replica for catalog and listing reads; writes always use DATABASE_URL
+DATABASE_READ_URL = normalize_url(os.getenv("DATABASE_READ_URL", "")) or None
+
+# Connection pool settings (per worker process, per engine)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Seconds to wait for a free pooled connection before failing the request
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Connections older than this many seconds are replaced on checkout (-1 disables)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Test each connection with a round trip on checkout; recycle alone is usually enough
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+# Connections each pool opens when a worker starts, so its first requests skip the connect
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", "1"))
+# After a failed replica connection, reads go to the primary for this many seconds
+DB_REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))
+
+# "sync" (default) serves the API routers from the blocking engine below,
+# "async" switches them to the AsyncEngine in app/database/async_session.py
+DB_MODE = os.getenv("DB_MODE", "sync").lower()
 
-# Normalize PostgreSQL URLs (support postgres:// and postgresql:// to psycopg driver)
-if DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql+psycopg://", 1)
-elif DATABASE_URL.startswith("postgresql://") and "+" not in DATABASE_URL:
-    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+psycopg://", 1)
 
-# SQLite needs connect_args; other DBs ignore it
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+def engine_options(url: str) -> dict:
+    """create_engine keyword arguments for a URL from the pool settings above"""
+    if url.startswith("sqlite"):
+        # SQLite needs connect_args; in-memory databases and aiosqlite don't use a queue pool
+        options = {"connect_args": {"check_same_thread": False, "timeout": DB_CONNECT_TIMEOUT}}
+        if ":memory:" in url or url.rstrip("/").endswith(":") or url.startswith("sqlite+aiosqlite"):
+            options["pool_pre_ping"] = DB_POOL_PRE_PING
+            return options
+    else:
+        options = {"connect_args": {"connect_timeout": DB_CONNECT_TIMEOUT}}
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    return options
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args=connect_args,
-    pool_pre_ping=True,
-)
+
+def make_engine(url: str, name: str):
+    options = engine_options(url)
+    if "pool_size" in options:
+        # Queue pool that times checkouts, for load shedding
+        options["poolclass"] = TimedQueuePool
+    engine = create_engine(url, **options)
+    # Per-request statement counts / DB time and pool gauges for /metrics
+    instrument_engine(engine)
+    metrics.add_engine(name, engine)
+    pool_pressure.add_engine(engine)
+    return engine
+
+
+engine = make_engine(DATABASE_URL, "primary")
+read_engine = make_engine(DATABASE_READ_URL, "replica") if DATABASE_READ_URL else engine
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+
+class ReplicaStatus:
+    """Sends reads back to the primary for a cool-down period after the replica fails"""
+
+    def __init__(self, retry_seconds: float):
+        self.retry_seconds = retry_seconds
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def mark_down(self) -> None:
+        with self._lock:
+            self._down_until = time.monotonic() + self.retry_seconds
+
+
+replica_status = ReplicaStatus(DB_REPLICA_RETRY_SECONDS)
+
+
+def open_read_session() -> Session:
+    """A session on the replica when it is configured and reachable, else on the primary"""
+    if read_engine is not engine and replica_status.available():
+        db = ReadSessionLocal()
+        try:
+            # Connect up front so an unreachable replica is caught here, not mid-request
+            db.connection()
+            return db
+        except DBAPIError:
+            db.close()
+            replica_status.mark_down()
+            logger.warning("Read replica unavailable; using the primary for %ss", DB_REPLICA_RETRY_SECONDS)
+    return SessionLocal()
 
 Base = declarative_base()
 
@@ -36,4 +132,15 @@ def get_db():
     finally:
         db.close()
 
-__all__ = ["engine", "SessionLocal", "Base", "DATABASE_URL", "get_db"]
+# Dependency for read-only endpoints that tolerate replica lag
+def get_read_db():
+    db = open_read_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+__all__ = [
+    "engine", "read_engine", "SessionLocal", "ReadSessionLocal", "Base", "DATABASE_URL",
+    "DATABASE_READ_URL", "DB_MODE", "get_db", "get_read_db", "open_read_session",
+]
@@ -1,140 +1,302 @@
-from fastapi import FastAPI, Request
-from fastapi.responses import RedirectResponse
-from fastapi.staticfiles import StaticFiles
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from pathlib import Path
+import anyio
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.responses import RedirectResponse, Response
 from fastapi.templating import Jinja2Templates
-from app.routers import products_router, cart_router, orders_router
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.database.session import get_db
+from app.database.lifecycle import dispose_engines, reset_engines, warm_up_engines
+from app.database.session import get_db, get_read_db, DB_MODE
 from app.models.product import Product
 from app.models.order import Order
+from app.core.auth import admin_required
+from app.core.responses import FastJSONResponse
+from app.core.admission import AdmissionMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.static import PrecompressedStaticFiles, manifest, static_url
+from app.core.metrics import CONTENT_TYPE, RequestTimings, current_timings, metrics, server_timing
+from app.services.cart_store import CART_BACKEND
+from app.services.catalog import catalog_cache, cached_catalog_read, get_cached_product, product_dict
+from app.services.search import search_products
+from app.services.pages import cached_page, page_cache
+from app.services.stats import get_stats
+from app.utils.pagination import order_keyset, order_next_cursor
+from app.utils.http_cache import PAGE_CACHE_CONTROL, cache_headers, make_etag, not_modified, products_etag
 from fastapi import Depends
 
-app = FastAPI(title="Ecommerce API")
+logger = logging.getLogger(__name__)
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# Storefront and admin pages, metrics and health; the API routers live in app/routers
+router = APIRouter()
 
-# Templates
-templates = Jinja2Templates(directory="app/templates")
+# Orders shown per page on /admin/orders
+ADMIN_ORDERS_PAGE_SIZE = 50
 
-# Include routers
-app.include_router(products_router)
-app.include_router(cart_router)
-app.include_router(orders_router)
+# Search results shown on the storefront products page
+SHOP_SEARCH_LIMIT = 100
 
-@app.get("/")
-def home_page(request: Request, db: Session = Depends(get_db)):
+# Templates; compiled bytecode is kept on disk so new workers skip parsing and compiling
+templates = Jinja2Templates(env=Environment(
+    loader=FileSystemLoader("app/templates"),
+    autoescape=True,
+    bytecode_cache=FileSystemBytecodeCache(os.getenv("JINJA_BYTECODE_CACHE_DIR") or None),
+))
+templates.env.globals["static_url"] = static_url
+
+@lru_cache(maxsize=None)
+def templates_digest() -> str:
+    """
+    Folded into storefront page ETags so a deploy with new markup or assets
+    is never answered with a 304
+    """
+    return make_etag(
+        *(path.read_bytes() for path in sorted(Path("app/templates").rglob("*.html"))), sorted(manifest.items())
+    )
+
+def precompile_templates() -> int:
+    """Load every template into the environment's cache (from bytecode when available)"""
+    names = templates.env.list_templates(extensions=["html"])
+    for name in names:
+        templates.env.get_template(name)
+    templates_digest()
+    return len(names)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Per-worker startup, after any preload fork: fresh connection pools, a few
+    connections opened ahead of the first requests, templates compiled
+    """
+    started = time.perf_counter()
+    await reset_engines()
+    try:
+        await warm_up_engines()
+    except SQLAlchemyError as exc:
+        # Static files and health checks still work; requests connect on demand
+        logger.warning("Connection pool warm-up failed: %s", exc)
+    compiled = await anyio.to_thread.run_sync(precompile_templates)
+    logger.info("Worker ready in %.0fms (%d templates)", (time.perf_counter() - started) * 1000, compiled)
+    yield
+    await dispose_engines()
+
+def create_app() -> FastAPI:
+    """
+    Build the application. Importing modules only defines things (engines
+    open no connections until used); connecting and compiling happen in
+    lifespan, once per worker.
+    """
+    # orjson renders every JSON response; routes returning FastJSONResponse also skip validation
+    app = FastAPI(title="Ecommerce API", default_response_class=FastJSONResponse, lifespan=lifespan)
+
+    # Mount static files: fingerprinted, precompressed builds when present, else the sources
+    app.mount("/static", PrecompressedStaticFiles(), name="static")
+
+    # Include routers (DB_MODE=async serves them from the AsyncEngine)
+    if DB_MODE == "async":
+        # The async cart and orders routers read and write the SQL cart tables only
+        if CART_BACKEND != "sql":
+            raise RuntimeError(f"CART_BACKEND={CART_BACKEND} is not supported with DB_MODE=async; use sql")
+        from app.routers.async_products import router as products_router
+        from app.routers.async_cart import router as cart_router
+        from app.routers.async_orders import router as orders_router
+    else:
+        from app.routers import products_router, cart_router, orders_router
+
+    app.include_router(products_router)
+    app.include_router(cart_router)
+    app.include_router(orders_router)
+    app.include_router(router)
+
+    # Compresses HTML/JSON bodies above the threshold, streaming ones chunk by chunk; responses that
+    # already carry a Content-Encoding (precompressed static files) pass through. Added before
+    # request_metrics so it sits inside it and sees each response's real body size.
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=int(os.getenv("GZIP_MINIMUM_SIZE", "1024")),
+        compresslevel=int(os.getenv("GZIP_COMPRESSLEVEL", "6")),
+    )
+
+    # Rate limits and load shedding: turns requests away (429/503) before they wait on the pool.
+    # Outside compression so rejections skip it, inside request_metrics so they are still counted.
+    app.add_middleware(AdmissionMiddleware)
+
+    app.middleware("http")(request_metrics)
+    return app
+
+async def request_metrics(request: Request, call_next):
+    """Time each request, count its SQL statements and report both"""
+    timings = RequestTimings()
+    token = current_timings.set(timings)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        _observe(request, 500, started, timings)
+        raise
+    finally:
+        current_timings.reset(token)
+
+    elapsed = _observe(request, response.status_code, started, timings)
+    response.headers["Server-Timing"] = server_timing(timings, elapsed)
+    return response
+
+def _observe(request: Request, status_code: int, started: float, timings: RequestTimings) -> float:
+    elapsed = time.perf_counter() - started
+    # Label by route template rather than raw path to keep cardinality bounded
+    route = request.scope.get("route")
+    metrics.observe_request(
+        request.method, getattr(route, "path", "unmatched"), status_code, elapsed, timings
+    )
+    return elapsed
+
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Request latency, query counts, error counts and pool gauges for this worker"""
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
+
+@router.get("/")
+def home_page(request: Request, db: Session = Depends(get_read_db)):
     """Home page for customers"""
-    # Get featured products (first 4 products for demo)
-    featured_products = db.query(Product).limit(4).all()
+    def render():
+        # Get featured products (first 4 products for demo)
+        featured_products = cached_catalog_read(
+            db, ("featured",), lambda: [product_dict(p) for p in db.query(Product).limit(4).all()]
+        )
+        headers = cache_headers(products_etag(featured_products, "home.html", templates_digest()), PAGE_CACHE_CONTROL)
+        cached = not_modified(request, headers)
+        if cached:
+            return cached
     
-    return templates.TemplateResponse("home.html", {
-        "request": request,
-        "featured_products": featured_products
-    })
+        return templates.TemplateResponse("home.html", {
+            "request": request,
+            "featured_products": featured_products
+        }, headers=headers)
+
+    return cached_page(db, request, render)
+
+@router.get("/api/cache/stats")
+def cache_stats(_: bool = admin_required):
+    """Catalog and page cache hit/miss counters for this worker"""
+    return {**catalog_cache.stats(), "pages": page_cache.stats()}
 
-@app.get("/api/health")
+@router.get("/api/health")
 def api_health():
     return {"ok": True, "msg": "FastAPI scaffold is running"}
 
 # Useful redirects
-@app.get("/dashboard")
+@router.get("/dashboard")
 def dashboard_redirect():
     """Redirect /dashboard to /admin/dashboard"""
     return RedirectResponse(url="/admin/dashboard", status_code=301)
 
-@app.get("/admin")
+@router.get("/admin")
 def admin_redirect():
     """Redirect /admin to /admin/dashboard"""
     return RedirectResponse(url="/admin/dashboard", status_code=301)
 
-@app.get("/products")
-def products_page(request: Request, db: Session = Depends(get_db), 
+@router.get("/products")
+def products_page(request: Request, db: Session = Depends(get_read_db), 
                  category: str = None, search: str = None):
     """Products listing page for customers"""
-    query = db.query(Product)
+    def render():
+        if search:
+            # Ranked full-text search instead of a leading-wildcard LIKE
+            products = search_products(db, search, category=category, active_only=False, limit=SHOP_SEARCH_LIMIT)
+        else:
+            query = db.query(Product)
+        
+            if category:
+                query = query.filter(Product.category == category)
+        
+            products = query.all()
+        categories = [cat[0] for cat in db.query(Product.category).distinct().all() if cat[0]]
+        etag = products_etag(products, categories, "shop.html", templates_digest())
+        headers = cache_headers(etag, PAGE_CACHE_CONTROL)
+        cached = not_modified(request, headers)
+        if cached:
+            return cached
     
-    if category:
-        query = query.filter(Product.category == category)
-    
-    if search:
-        query = query.filter(Product.name.contains(search))
-    
-    products = query.all()
-    categories = db.query(Product.category).distinct().all()
-    
-    return templates.TemplateResponse("shop.html", {
-        "request": request,
-        "products": products,
-        "categories": [cat[0] for cat in categories if cat[0]],
-        "current_category": category,
-        "search_query": search
-    })
+        return templates.TemplateResponse("shop.html", {
+            "request": request,
+            "products": products,
+            "categories": categories,
+            "current_category": category,
+            "search_query": search
+        }, headers=headers)
+
+    return cached_page(db, request, render)
 
-@app.get("/product/{product_id}")
-def product_detail(request: Request, product_id: int, db: Session = Depends(get_db)):
+@router.get("/product/{product_id}")
+def product_detail(request: Request, product_id: int, db: Session = Depends(get_read_db)):
     """Product detail page"""
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
-        # Return 404 page or redirect
-        return templates.TemplateResponse("404.html", {"request": request}, status_code=404)
+    def render():
+        product = get_cached_product(db, product_id)
+        if not product:
+            # Return 404 page or redirect
+            return templates.TemplateResponse("404.html", {"request": request}, status_code=404)
     
-    # Get related products (same category)
-    related_products = db.query(Product).filter(
-        Product.category == product.category,
-        Product.id != product_id
-    ).limit(4).all()
+        # Get related products (same category)
+        related_products = cached_catalog_read(db, ("related", product_id), lambda: [
+            product_dict(p) for p in db.query(Product).filter(
+                Product.category == product["category"],
+                Product.id != product_id
+            ).limit(4).all()
+        ])
+        etag = products_etag([product, *related_products], "product_detail.html", templates_digest())
+        headers = cache_headers(etag, PAGE_CACHE_CONTROL)
+        cached = not_modified(request, headers)
+        if cached:
+            return cached
     
-    return templates.TemplateResponse("product_detail.html", {
-        "request": request,
-        "product": product,
-        "related_products": related_products
-    })
+        return templates.TemplateResponse("product_detail.html", {
+            "request": request,
+            "product": product,
+            "related_products": related_products
+        }, headers=headers)
 
-@app.get("/admin/dashboard")
-def admin_dashboard(request: Request, db: Session = Depends(get_db)):
-    # Get dashboard statistics
-    total_products = db.query(Product).count()
-    total_orders = db.query(Order).count()
-    pending_orders = db.query(Order).filter(Order.status == "pending").count()
+    return cached_page(db, request, render)
+
+@router.get("/admin/dashboard")
+def admin_dashboard(request: Request, db: Session = Depends(get_read_db)):
+    # Get dashboard statistics (precomputed row, kept current by writes)
+    stats = get_stats(db)
     
     # Get recent orders (limit to 5)
     recent_orders = db.query(Order).order_by(Order.created_at.desc()).limit(5).all()
     
-    # Calculate total revenue
-    total_revenue = db.query(Order).filter(Order.status == "completed").with_entities(func.sum(Order.total_price)).scalar() or 0
-    
     # Get top products (for now just get first 5 products)
     top_products = db.query(Product).limit(5).all()
     
     return templates.TemplateResponse("dashboard.html", {
         "request": request,
-        "total_products": total_products,
-        "total_orders": total_orders,
-        "pending_orders": pending_orders,
-        "total_revenue": total_revenue,
+        "total_products": stats.total_products,
+        "total_orders": stats.total_orders,
+        "pending_orders": stats.pending_orders,
+        "total_revenue": stats.total_revenue,
         "recent_orders": recent_orders,
         "top_products": top_products
     })
 
-@app.get("/api/dashboard/stats")
-def get_dashboard_stats(db: Session = Depends(get_db)):
+@router.get("/api/dashboard/stats")
+def get_dashboard_stats(db: Session = Depends(get_read_db)):
     """API endpoint for real-time dashboard stats"""
-    total_products = db.query(Product).count()
-    total_orders = db.query(Order).count()
-    pending_orders = db.query(Order).filter(Order.status == "pending").count()
-    total_revenue = db.query(Order).filter(Order.status == "completed").with_entities(func.sum(Order.total_price)).scalar() or 0
+    stats = get_stats(db)
     
     return {
-        "total_products": total_products,
-        "total_orders": total_orders,
-        "pending_orders": pending_orders,
-        "total_revenue": float(total_revenue)
+        "total_products": stats.total_products,
+        "total_orders": stats.total_orders,
+        "pending_orders": stats.pending_orders,
+        "total_revenue": float(stats.total_revenue)
     }
 
-@app.get("/admin/products")
-def admin_products(request: Request, db: Session = Depends(get_db)):
+@router.get("/admin/products")
+def admin_products(request: Request, db: Session = Depends(get_read_db)):
     """Products management page"""
     products = db.query(Product).all()
     return templates.TemplateResponse("products.html", {
@@ -142,11 +304,15 @@ def admin_products(request: Request, db: Session = Depends(get_db)):
         "products": products
     })
 
-@app.get("/admin/orders")
-def admin_orders(request: Request, db: Session = Depends(get_db)):
+@router.get("/admin/orders")
+def admin_orders(request: Request, cursor: str = None, db: Session = Depends(get_db)):
     """Orders management page"""
-    orders = db.query(Order).order_by(Order.created_at.desc()).all()
+    orders = order_keyset(db.query(Order), Order, cursor).limit(ADMIN_ORDERS_PAGE_SIZE).all()
     return templates.TemplateResponse("orders.html", {
         "request": request,
-        "orders": orders
+        "orders": orders,
+        "next_cursor": order_next_cursor(orders, ADMIN_ORDERS_PAGE_SIZE)
     })
+
+# For uvicorn app.main:app and gunicorn (see gunicorn.conf.py)
+app = create_app()
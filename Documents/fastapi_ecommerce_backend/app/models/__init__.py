@@ -2,6 +2,11 @@ from .product import Product
 from .cart import Cart
 from .cart_item import CartItem
 from .order import Order, OrderItem
+from .catalog_state import CatalogState
+from .store_stats import StoreStats
+from .idempotency_key import IdempotencyKey
+from .job import Job
+from .stock_reservation import StockReservation
 
 # Export models for Alembic or metadata creation
 __all__ = [
@@ -10,5 +15,10 @@ __all__ = [
     "CartItem",
     "Order",
     "OrderItem",
+    "CatalogState",
+    "StoreStats",
+    "IdempotencyKey",
+    "Job",
+    "StockReservation",
 ]
 
@@ -8,8 +8,9 @@ class Cart(Base):
     __tablename__ = "carts"
 
     id = Column(Integer, primary_key=True, index=True)
-    session_id = Column(String, nullable=True)
+    session_id = Column(String, nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Bumped by every cart write; carts idle past CART_TTL are purged
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
     items = relationship("CartItem", back_populates="cart", cascade="all, delete-orphan")
\ No newline at end of file
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, BigInteger
+from app.database.session import Base
+
+
+class CatalogState(Base):
+    __tablename__ = "catalog_state"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
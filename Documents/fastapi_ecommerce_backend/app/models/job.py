@@ -0,0 +1,23 @@
+from sqlalchemy import Column, BigInteger, Integer, String, Text, DateTime, JSON, Index
+from sqlalchemy.sql import func
+from app.database.session import Base
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    kind = Column(String(64), nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String(16), nullable=False, default="queued", server_default="queued")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    max_attempts = Column(Integer, nullable=False, default=5, server_default="5")
+    run_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    finished_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # Workers poll the due end of the queue
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
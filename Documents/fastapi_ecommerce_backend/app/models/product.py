@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, literal_column
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from app.database.session import Base
 
 
@@ -12,9 +13,14 @@ class Product(Base):
     price = Column(Integer, nullable=False)
     image = Column(String, nullable=True)
     stock = Column(Integer, nullable=False, default=0)
-    category = Column(String, nullable=True)
-    is_active = Column(Boolean, nullable=False, default=True)
+    category = Column(String, nullable=True, index=True)
+    is_active = Column(Boolean, nullable=False, default=True, index=True)
+    # Bumped by every UPDATE (ORM or Core) and used for ETags; ON CONFLICT upserts set both explicitly
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("version") + 1)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=func.now(),
+                        server_default=func.now(), onupdate=func.now())
 
     cart_items = relationship("CartItem", back_populates="product", cascade="all, delete-orphan")
     order_items = relationship("OrderItem", back_populates="product", cascade="all, delete-orphan")
+    stock_reservations = relationship("StockReservation", back_populates="product", cascade="all, delete-orphan")
 
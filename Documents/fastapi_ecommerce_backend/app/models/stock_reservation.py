@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.database.session import Base
+
+
+class StockReservation(Base):
+    """Stock held back from products.stock for a cart until expires_at"""
+    __tablename__ = "stock_reservations"
+
+    id = Column(Integer, primary_key=True)
+    session_id = Column(String, nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    product = relationship("Product", back_populates="stock_reservations")
+
+    __table_args__ = (
+        UniqueConstraint("session_id", "product_id", name="uq_stock_reservation_session_product"),
+    )
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, BigInteger
+from app.database.session import Base
+
+
+class StoreStats(Base):
+    __tablename__ = "store_stats"
+
+    id = Column(Integer, primary_key=True)
+    total_products = Column(Integer, nullable=False, default=0)
+    total_orders = Column(Integer, nullable=False, default=0)
+    pending_orders = Column(Integer, nullable=False, default=0)
+    total_revenue = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,213 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.async_session import get_async_db
+from app.models.cart import Cart
+from app.models.cart_item import CartItem
+from app.models.product import Product
+from app.services.cart import (
+    apply_cart_operations, batch_products_query, cart_change_statements,
+    cart_contents_query, summarize_cart, cart_item_payload, empty_cart, touch_cart_statement
+)
+from app.services.inventory import STOCK_RESERVATION_TTL, hold_stock_async, release_stock_async
+from app.schemas.cart import CartBatch, CartItemCreate, CartItemUpdate, Cart as CartSchema, CartItem as CartItemSchema
+
+router = APIRouter(prefix="/cart", tags=["cart"])
+
+
+def session_cart_ids(session_id: str):
+    """The session's cart ids, for statements that must not create a cart"""
+    return select(Cart.id).where(Cart.session_id == session_id)
+
+
+async def get_or_create_cart(db: AsyncSession, session_id: str = "default") -> Cart:
+    """Get existing cart or create new one for session; only called by writes, which commit it"""
+    cart = await db.scalar(select(Cart).where(Cart.session_id == session_id).limit(1))
+    if not cart:
+        cart = Cart(session_id=session_id)
+        db.add(cart)
+        await db.flush()
+    else:
+        await db.execute(touch_cart_statement(cart.id))
+    return cart
+
+
+async def get_session_cart_item(db: AsyncSession, session_id: str, item_id: int) -> CartItem:
+    """Find an item of the session's cart by ID or raise 404"""
+    cart_item = await db.scalar(select(CartItem).where(
+        CartItem.id == item_id,
+        CartItem.cart_id.in_(session_cart_ids(session_id))
+    ))
+    if not cart_item:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Cart item not found"
+        )
+    return cart_item
+
+
+@router.get("/", response_model=CartSchema)
+async def get_cart(session_id: str = "default", db: AsyncSession = Depends(get_async_db)):
+    """Get current cart with items and totals"""
+    # Cart, items and products come back from a single joined query
+    rows = (await db.execute(cart_contents_query(session_id))).all()
+    return summarize_cart(rows) or empty_cart()
+
+
+@router.post("/items", response_model=CartItemSchema)
+async def add_to_cart(
+    item_data: CartItemCreate, 
+    session_id: str = "default",
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Add item to cart"""
+    # Check if product exists
+    product = await db.get(Product, item_data.product_id)
+    
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Product with ID {item_data.product_id} not found"
+        )
+    
+    # Check if product is active
+    if not product.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Product '{product.name}' is not available for purchase"
+        )
+    
+    # Check stock availability (only if stock is tracked)
+    if product.stock is not None and product.stock < item_data.quantity:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Insufficient stock for '{product.name}'. Available: {product.stock}, Requested: {item_data.quantity}"
+        )
+    
+    cart = await get_or_create_cart(db, session_id)
+    
+    # Check if item already exists in cart
+    cart_item = await db.scalar(select(CartItem).where(
+        CartItem.cart_id == cart.id,
+        CartItem.product_id == item_data.product_id
+    ))
+    
+    if cart_item:
+        # Update quantity
+        new_quantity = cart_item.quantity + item_data.quantity
+        
+        # Check stock for total quantity (reservations check only what isn't held yet)
+        if not STOCK_RESERVATION_TTL and product.stock is not None and product.stock < new_quantity:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient stock for total quantity. Available: {product.stock}, Total requested: {new_quantity}"
+            )
+        
+        cart_item.quantity = new_quantity
+    else:
+        # Add new item
+        cart_item = CartItem(
+            cart_id=cart.id,
+            product_id=item_data.product_id,
+            quantity=item_data.quantity
+        )
+        db.add(cart_item)
+    
+    await hold_stock_async(db, session_id, {product.id: cart_item.quantity}, {product.id: product.name})
+    await db.commit()
+    await db.refresh(cart_item)
+    
+    # Return enriched data with product details
+    return cart_item_payload(cart_item, product)
+
+
+@router.post("/batch", response_model=CartSchema)
+async def batch_update_cart(
+    batch: CartBatch,
+    session_id: str = "default",
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Apply add/set/remove operations in one transaction and return the updated cart"""
+    rows = (await db.execute(cart_contents_query(session_id))).all()
+    lines = [row for row in rows if row.item_id is not None]
+    
+    # Every product the batch adds or sets, validated from a single query
+    product_ids = {operation.product_id for operation in batch.operations if operation.op != "remove"}
+    products = {row.id: row for row in await db.execute(batch_products_query(product_ids))} if product_ids else {}
+    
+    changes = apply_cart_operations(
+        {row.product_id: row.quantity for row in lines}, batch.operations, products,
+        check_stock=not STOCK_RESERVATION_TTL
+    )
+    if changes:
+        await hold_stock_async(db, session_id, changes, {product_id: row.name for product_id, row in products.items()})
+        if rows:
+            cart_id = rows[0].cart_id
+            await db.execute(touch_cart_statement(cart_id))
+        else:
+            cart = Cart(session_id=session_id)
+            db.add(cart)
+            await db.flush()
+            cart_id = cart.id
+        item_ids = {row.product_id: row.item_id for row in lines}
+        for statement, params in cart_change_statements(cart_id, item_ids, changes):
+            await db.execute(statement, params)
+        rows = (await db.execute(cart_contents_query(session_id))).all()
+    
+    cart = summarize_cart(rows)
+    await db.commit()
+    return cart or empty_cart()
+
+
+@router.put("/items/{item_id}", response_model=CartItemSchema)
+async def update_cart_item(
+    item_id: int, 
+    item_data: CartItemUpdate,
+    session_id: str = "default",
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Update cart item quantity"""
+    cart_item = await get_session_cart_item(db, session_id, item_id)
+    
+    # Check stock availability
+    product = await db.get(Product, cart_item.product_id)
+    if not STOCK_RESERVATION_TTL and product and product.stock is not None and product.stock < item_data.quantity:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Insufficient stock. Available: {product.stock}"
+        )
+    
+    await hold_stock_async(
+        db, session_id, {cart_item.product_id: item_data.quantity}, {product.id: product.name} if product else None
+    )
+    cart_item.quantity = item_data.quantity
+    await db.execute(touch_cart_statement(cart_item.cart_id))
+    await db.commit()
+    await db.refresh(cart_item)
+    return cart_item_payload(cart_item, product)
+
+
+@router.delete("/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def remove_from_cart(
+    item_id: int,
+    session_id: str = "default",
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Remove item from cart"""
+    cart_item = await get_session_cart_item(db, session_id, item_id)
+    
+    await hold_stock_async(db, session_id, {cart_item.product_id: 0})
+    await db.delete(cart_item)
+    await db.execute(touch_cart_statement(cart_item.cart_id))
+    await db.commit()
+    return None
+
+
+@router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_cart(session_id: str = "default", db: AsyncSession = Depends(get_async_db)):
+    """Clear all items from cart"""
+    # Nothing to do (and nothing created) for a session without a cart
+    await release_stock_async(db, session_id)
+    await db.execute(delete(CartItem).where(CartItem.cart_id.in_(session_cart_ids(session_id))))
+    await db.commit()
+    return None
@@ -0,0 +1,209 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, insert, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from app.database.async_session import get_async_db, open_async_read_session
+from app.models.order import Order, OrderItem
+from app.models.cart_item import CartItem
+from app.services.cart import cart_contents_query
+from app.services.orders import CREATE_ORDER_SCOPE, checkout_lines, order_items_query, order_item_payload, order_payload
+from app.services.order_export import EXPORT_MEDIA_TYPES, export_chunks_async, export_filename, order_export_query
+from app.services.idempotency import begin_idempotent_async, complete_idempotent_async, request_fingerprint
+from app.services.inventory import commit_stock_async
+from app.services.jobs import enqueue_async
+from app.services.tasks import order_created_jobs, stats_delta_jobs
+from app.services.stats import order_deltas, status_change_deltas
+from app.core.auth import admin_required
+from app.utils.pagination import order_keyset, order_next_cursor, NEXT_CURSOR_HEADER
+from app.schemas.order import OrderCreate, OrderStatus, OrderStatusUpdate, Order as OrderSchema, OrderSummary, OrderPage, OrderItem as OrderItemSchema
+
+router = APIRouter(prefix="/orders", tags=["orders"])
+
+
+@router.get("/", response_model=OrderPage)
+async def get_orders(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List all orders (admin only) - newest first, paginated by cursor"""
+    # Seek past the cursor on (created_at, id); skip is kept for old clients
+    query = order_keyset(select(Order), Order, cursor)
+    if skip and not cursor:
+        query = query.offset(skip)
+    orders = (await db.scalars(query.limit(limit))).all()
+
+    next_cursor = order_next_cursor(orders, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return {"items": orders, "next_cursor": next_cursor}
+
+
+@router.get("/export")
+async def export_orders(
+    fmt: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    order_status: Optional[OrderStatus] = Query(None, alias="status"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    _: bool = admin_required
+):
+    """Stream orders with their items as CSV or NDJSON (admin only)"""
+    query = order_export_query(order_status, created_from, created_to)
+
+    async def stream():
+        # Own session: the response outlives the request's dependencies
+        async with await open_async_read_session() as db:
+            async for chunk in export_chunks_async(await db.stream(query), fmt):
+                yield chunk
+
+    return StreamingResponse(
+        stream(),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(fmt)}"'}
+    )
+
+
+@router.get("/{order_id}", response_model=OrderSchema)
+async def get_order(order_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get order details by ID"""
+    order = await db.get(Order, order_id)
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+
+    rows = (await db.execute(order_items_query(order_id))).all()
+    return order_payload(order, [order_item_payload(row) for row in rows])
+
+
+@router.post("/", response_model=OrderSchema, status_code=status.HTTP_201_CREATED)
+async def create_order(
+    order_data: OrderCreate,
+    session_id: str = "default",
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create order from cart with guest information"""
+    # A retried request with the same Idempotency-Key gets the first response back
+    if idempotency_key:
+        fingerprint = request_fingerprint(session_id, order_data.model_dump())
+        replay = await begin_idempotent_async(db, CREATE_ORDER_SCOPE, idempotency_key, fingerprint)
+        if replay is not None:
+            return replay
+
+    # Cart items and their products in one statement
+    rows = (await db.execute(cart_contents_query(session_id))).all()
+    lines, total_items, total_price = checkout_lines(rows)
+    cart_id = rows[0].cart_id
+
+    # Take the stock for every line in one conditional UPDATE; a short line fails the checkout
+    await commit_stock_async(db, session_id, lines)
+
+    # Insert the order with its totals already known
+    result = await db.execute(
+        insert(Order)
+        .values(
+            guest_name=order_data.guest_name,
+            guest_email=order_data.guest_email,
+            guest_phone=order_data.guest_phone,
+            total_price=total_price,
+            total_items=total_items
+        )
+        .returning(
+            Order.id, Order.guest_name, Order.guest_email, Order.guest_phone,
+            Order.status, Order.total_price, Order.total_items, Order.created_at
+        )
+    )
+    order = result.one()
+
+    # Insert every order item in a single bulk statement
+    inserted = await db.execute(
+        insert(OrderItem).returning(OrderItem.product_id, OrderItem.id),
+        [
+            {"order_id": order.id, "product_id": line["product_id"], "quantity": line["quantity"]}
+            for line in lines
+        ]
+    )
+    item_ids = dict(inserted.all())
+
+    # Stats and the confirmation email run in the worker once this commits
+    await enqueue_async(db, *order_created_jobs(order))
+
+    # Clear the cart in the order's transaction, not queued: a cart still
+    # full after the 201 could be checked out a second time
+    await db.execute(delete(CartItem).where(CartItem.cart_id == cart_id))
+
+    items = [
+        {"id": item_ids[line["product_id"]], "order_id": order.id, **line}
+        for line in lines
+    ]
+    payload = order_payload(order, items)
+
+    # Keep the response for retries; it commits together with the order
+    if idempotency_key:
+        body = OrderSchema.model_validate(payload).model_dump_json()
+        await complete_idempotent_async(db, CREATE_ORDER_SCOPE, idempotency_key, status.HTTP_201_CREATED, body)
+
+    # Commit the transaction
+    await db.commit()
+    return payload
+
+
+@router.patch("/{order_id}/status", response_model=OrderSummary)
+async def update_order_status(
+    order_id: int,
+    status_data: OrderStatusUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    _: bool = admin_required
+):
+    """Change an order's status (admin only)"""
+    order = await db.get(Order, order_id)
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+    
+    old_status = order.status
+    order.status = status_data.status
+    await enqueue_async(db, *stats_delta_jobs(status_change_deltas(old_status, order.status, order.total_price)))
+    await db.commit()
+    return order
+
+
+@router.get("/{order_id}/items", response_model=List[OrderItemSchema])
+async def get_order_items(order_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get order items for a specific order"""
+    order = await db.get(Order, order_id)
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+    
+    rows = (await db.execute(order_items_query(order_id))).all()
+    return [order_item_payload(row) for row in rows]
+
+
+@router.delete("/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_order(order_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Delete an order (admin only)"""
+    order = await db.get(Order, order_id)
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+    
+    # Delete order items first, then the order itself
+    await db.execute(delete(OrderItem).where(OrderItem.order_id == order_id))
+    await db.delete(order)
+    await enqueue_async(db, *stats_delta_jobs(order_deltas(order.status, order.total_price, -1)))
+    await db.commit()
+    
+    return None
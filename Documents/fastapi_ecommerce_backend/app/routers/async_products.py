@@ -0,0 +1,210 @@
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from app.database.async_session import get_async_db, get_async_read_db
+from app.models.product import Product
+from app.schemas.product import ProductCreate, ProductUpdate, ProductImportReport, ProductPage, Product as ProductSchema
+from app.core.auth import admin_required
+from app.core.responses import FastJSONResponse
+from app.services.stats import apply_stats_delta_async
+from app.services.search import search_products_async, index_product, unindex_product
+from app.services.product_import import DEFAULT_BATCH_SIZE, detect_format, import_products_file
+from app.utils.pagination import id_keyset, id_next_cursor, NEXT_CURSOR_HEADER
+from app.utils.http_cache import CATALOG_CACHE_CONTROL, cache_headers, make_etag, not_modified, products_etag
+from app.services.catalog import (
+    catalog_cache, cached_catalog_read_async, bump_catalog_version_async, product_dict,
+    product_columns, row_product_dict,
+)
+
+router = APIRouter(prefix="/products", tags=["products"])
+
+# Columns listed by /products/debug/list
+DEBUG_FIELDS = ("id", "name", "price", "stock", "is_active", "category")
+
+
+@router.get("/", response_model=ProductPage)
+async def get_products(
+    request: Request,
+    skip: int = 0, 
+    limit: int = 100, 
+    category: str = None,
+    active_only: bool = True,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """List all products with optional filtering, paginated by cursor on id"""
+    async def load():
+        # Plain column tuples: no ORM instances for a read-only listing
+        query = select(*product_columns())
+        
+        if active_only:
+            query = query.where(Product.is_active == True)
+        
+        if category:
+            query = query.where(Product.category == category)
+        
+        # Seek past the cursor's id; skip is kept for old clients
+        query = id_keyset(query, Product, cursor)
+        if skip and not cursor:
+            query = query.offset(skip)
+        
+        rows = await db.execute(query.limit(limit))
+        return [row_product_dict(row) for row in rows]
+
+    products = await cached_catalog_read_async(db, ("products", skip, limit, category, active_only, cursor), load)
+    headers = cache_headers(products_etag(products), CATALOG_CACHE_CONTROL)
+    cached = not_modified(request, headers)
+    if cached:
+        return cached
+    next_cursor = id_next_cursor(products, limit)
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    # The cached dicts already have the ProductSchema shape; skip per-item validation
+    return FastJSONResponse({"items": products, "next_cursor": next_cursor}, headers=headers)
+
+
+@router.get("/search", response_model=List[ProductSchema])
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    category: str = None,
+    active_only: bool = True,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Relevance-ranked search over product name, description and category"""
+    products = await search_products_async(db, q, category=category, active_only=active_only, skip=skip, limit=limit)
+    return FastJSONResponse(products)
+
+
+@router.get("/debug/list")
+async def debug_products(db: AsyncSession = Depends(get_async_read_db)):
+    """Debug endpoint to see all products with their IDs"""
+    rows = await db.execute(select(*(getattr(Product, field) for field in DEBUG_FIELDS)))
+    return FastJSONResponse([dict(zip(DEBUG_FIELDS, row)) for row in rows])
+
+
+@router.get("/{product_id}", response_model=ProductSchema)
+async def get_product(product_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db)):
+    """Get product by ID"""
+    async def load():
+        product = await db.get(Product, product_id)
+        return product_dict(product) if product else None
+
+    product = await cached_catalog_read_async(db, ("product", product_id), load)
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    headers = cache_headers(products_etag([product]), CATALOG_CACHE_CONTROL, product["updated_at"])
+    cached = not_modified(request, headers)
+    if cached:
+        return cached
+    response.headers.update(headers)
+    return product
+
+
+@router.post("/", response_model=ProductSchema, status_code=status.HTTP_201_CREATED)
+async def create_product(product_data: ProductCreate, db: AsyncSession = Depends(get_async_db), _: bool = admin_required):
+    """Create new product"""
+    # Check if product with same name already exists
+    existing_product = await db.scalar(select(Product).where(Product.name == product_data.name))
+    if existing_product:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Product with this name already exists"
+        )
+    
+    product = Product(**product_data.model_dump())
+    db.add(product)
+    await apply_stats_delta_async(db, total_products=1)
+    version = await bump_catalog_version_async(db)
+    await db.commit()
+    catalog_cache.invalidate()
+    await db.refresh(product)
+    index_product(db, product_dict(product), version)
+    return product
+
+
+@router.post("/import", response_model=ProductImportReport)
+async def import_products_upload(
+    file: UploadFile = File(...),
+    fmt: Optional[Literal["csv", "ndjson"]] = Query(None, alias="format"),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=5000),
+    _: bool = admin_required
+):
+    """Bulk create/update products from a CSV or NDJSON upload, keyed on name"""
+    fmt = fmt or detect_format(file.filename, file.content_type)
+    # Parsing and batched upserts are blocking work; keep them off the event loop
+    report = await run_in_threadpool(import_products_file, file.file, fmt, batch_size)
+    return report.as_dict()
+
+
+@router.put("/{product_id}", response_model=ProductSchema)
+async def update_product(product_id: int, product_data: ProductUpdate, db: AsyncSession = Depends(get_async_db), _: bool = admin_required):
+    """Update product"""
+    product = await db.get(Product, product_id)
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    
+    # Check if new name conflicts with existing product
+    if product_data.name and product_data.name != product.name:
+        existing_product = await db.scalar(select(Product).where(Product.name == product_data.name))
+        if existing_product:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Product with this name already exists"
+            )
+    
+    # Update only provided fields
+    update_data = product_data.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(product, field, value)
+    
+    version = await bump_catalog_version_async(db)
+    await db.commit()
+    catalog_cache.invalidate()
+    await db.refresh(product)
+    index_product(db, product_dict(product), version)
+    return product
+
+
+@router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_product(product_id: int, db: AsyncSession = Depends(get_async_db), _: bool = admin_required):
+    """Delete product"""
+    product = await db.get(Product, product_id)
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    
+    await db.delete(product)
+    await apply_stats_delta_async(db, total_products=-1)
+    version = await bump_catalog_version_async(db)
+    await db.commit()
+    catalog_cache.invalidate()
+    unindex_product(db, product_id, version)
+    return None
+
+
+@router.get("/categories/list")
+async def get_categories(request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db)):
+    """Get list of all product categories"""
+    async def load():
+        categories = await db.execute(select(Product.category).distinct().where(Product.category.isnot(None)))
+        return [category[0] for category in categories]
+
+    categories = await cached_catalog_read_async(db, ("categories",), load)
+    headers = cache_headers(make_etag(categories), CATALOG_CACHE_CONTROL)
+    cached = not_modified(request, headers)
+    if cached:
+        return cached
+    response.headers.update(headers)
+    return categories
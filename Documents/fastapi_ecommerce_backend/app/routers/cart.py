@@ -1,69 +1,42 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
 from app.database.session import get_db
-from app.models.cart import Cart
-from app.models.cart_item import CartItem
 from app.models.product import Product
-from app.schemas.cart import CartItemCreate, CartItemUpdate, Cart as CartSchema, CartItem as CartItemSchema
+from app.services.cart import apply_cart_operations, batch_products_query, cart_item_payload
+from app.services.cart_store import CartStore, CartLine, get_cart_store
+from app.services.inventory import STOCK_RESERVATION_TTL, hold_stock, release_stock
+from app.schemas.cart import CartBatch, CartItemCreate, CartItemUpdate, Cart as CartSchema, CartItem as CartItemSchema
 
 router = APIRouter(prefix="/cart", tags=["cart"])
 
 
-def get_or_create_cart(db: Session, session_id: str = "default") -> Cart:
-    """Get existing cart or create new one for session"""
-    cart = db.query(Cart).filter(Cart.session_id == session_id).first()
-    if not cart:
-        cart = Cart(session_id=session_id)
-        db.add(cart)
-        db.commit()
-        db.refresh(cart)
-    return cart
+def get_cart_line(store: CartStore, session_id: str, item_id: int) -> CartLine:
+    """Find a line of the session's cart by item ID or raise 404"""
+    line = next((line for line in store.get_lines(session_id) if line.id == item_id), None)
+    if not line:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Cart item not found"
+        )
+    return line
 
 
 @router.get("/", response_model=CartSchema)
-def get_cart(session_id: str = "default", db: Session = Depends(get_db)):
+def get_cart(
+    session_id: str = "default",
+    db: Session = Depends(get_db),
+    store: CartStore = Depends(get_cart_store)
+):
     """Get current cart with items and totals"""
-    cart = get_or_create_cart(db, session_id)
-    
-    # Get cart items with product details
-    cart_items = db.query(CartItem).filter(CartItem.cart_id == cart.id).all()
-    
-    # Calculate totals
-    total_items = sum(item.quantity for item in cart_items)
-    total_price = 0
-    
-    # Get product details for each item
-    items_with_details = []
-    for item in cart_items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        if product:
-            item_total = product.price * item.quantity
-            total_price += item_total
-            
-            items_with_details.append({
-                "id": item.id,
-                "cart_id": item.cart_id,
-                "product_id": item.product_id,
-                "quantity": item.quantity,
-                "product_name": product.name,
-                "product_price": product.price,
-                "total_price": item_total
-            })
-    
-    return {
-        "id": cart.id,
-        "items": items_with_details,
-        "total_items": total_items,
-        "total_price": total_price
-    }
+    return store.get_cart(db, session_id)
 
 
 @router.post("/items", response_model=CartItemSchema)
 def add_to_cart(
     item_data: CartItemCreate, 
     session_id: str = "default",
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    store: CartStore = Depends(get_cart_store)
 ):
     """Add item to cart"""
     # Check if product exists
@@ -90,61 +63,60 @@ def add_to_cart(
                 detail=f"Insufficient stock for '{product.name}'. Available: {product.stock}, Requested: {item_data.quantity}"
             )
     
-    cart = get_or_create_cart(db, session_id)
-    
     # Check if item already exists in cart
-    existing_item = db.query(CartItem).filter(
-        CartItem.cart_id == cart.id,
-        CartItem.product_id == item_data.product_id
-    ).first()
+    existing_item = next(
+        (line for line in store.get_lines(session_id) if line.product_id == item_data.product_id),
+        None
+    )
     
+    new_quantity = item_data.quantity
     if existing_item:
         # Update quantity
         new_quantity = existing_item.quantity + item_data.quantity
         
-        # Check stock for total quantity
-        if hasattr(product, 'stock') and product.stock is not None:
+        # Check stock for total quantity (reservations check only what isn't held yet)
+        if not STOCK_RESERVATION_TTL and hasattr(product, 'stock') and product.stock is not None:
             if product.stock < new_quantity:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Insufficient stock for total quantity. Available: {product.stock}, Total requested: {new_quantity}"
                 )
-        
-        existing_item.quantity = new_quantity
-        db.commit()
-        db.refresh(existing_item)
-        
-        # Return enriched data with product details
-        return {
-            "id": existing_item.id,
-            "cart_id": existing_item.cart_id,
-            "product_id": existing_item.product_id,
-            "quantity": existing_item.quantity,
-            "product_name": product.name,
-            "product_price": product.price,
-            "total_price": product.price * existing_item.quantity
-        }
-    else:
-        # Add new item
-        cart_item = CartItem(
-            cart_id=cart.id,
-            product_id=item_data.product_id,
-            quantity=item_data.quantity
-        )
-        db.add(cart_item)
-        db.commit()
-        db.refresh(cart_item)
-        
-        # Return enriched data with product details
-        return {
-            "id": cart_item.id,
-            "cart_id": cart_item.cart_id,
-            "product_id": cart_item.product_id,
-            "quantity": cart_item.quantity,
-            "product_name": product.name,
-            "product_price": product.price,
-            "total_price": product.price * cart_item.quantity
-        }
+    
+    # Hold the stock first, so a shortage leaves key-value carts untouched
+    hold_stock(db, session_id, {product.id: new_quantity}, {product.id: product.name})
+    cart_item = store.set_quantity(session_id, item_data.product_id, new_quantity)
+    
+    # Build enriched data with product details before the commit expires it
+    response = cart_item_payload(cart_item, product)
+    store.commit()
+    # Stock holds are SQL rows whatever the cart backend (a no-op for SQL carts)
+    db.commit()
+    return response
+
+
+@router.post("/batch", response_model=CartSchema)
+def batch_update_cart(
+    batch: CartBatch,
+    session_id: str = "default",
+    db: Session = Depends(get_db),
+    store: CartStore = Depends(get_cart_store)
+):
+    """Apply add/set/remove operations in one transaction and return the updated cart"""
+    quantities = {line.product_id: line.quantity for line in store.get_lines(session_id)}
+    
+    # Every product the batch adds or sets, validated from a single query
+    product_ids = {operation.product_id for operation in batch.operations if operation.op != "remove"}
+    products = {row.id: row for row in db.execute(batch_products_query(product_ids))} if product_ids else {}
+    
+    changes = apply_cart_operations(quantities, batch.operations, products, check_stock=not STOCK_RESERVATION_TTL)
+    if changes:
+        hold_stock(db, session_id, changes, {product_id: row.name for product_id, row in products.items()})
+        store.set_quantities(session_id, changes)
+    
+    cart = store.get_cart(db, session_id)
+    store.commit()
+    db.commit()
+    return cart
 
 
 @router.put("/items/{item_id}", response_model=CartItemSchema)
@@ -152,67 +124,55 @@ def update_cart_item(
     item_id: int, 
     item_data: CartItemUpdate,
     session_id: str = "default",
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    store: CartStore = Depends(get_cart_store)
 ):
     """Update cart item quantity"""
-    cart = get_or_create_cart(db, session_id)
-    
-    cart_item = db.query(CartItem).filter(
-        CartItem.id == item_id,
-        CartItem.cart_id == cart.id
-    ).first()
-    
-    if not cart_item:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Cart item not found"
-        )
+    cart_item = get_cart_line(store, session_id, item_id)
     
     # Check stock availability
     product = db.query(Product).filter(Product.id == cart_item.product_id).first()
-    if product and hasattr(product, 'stock') and product.stock is not None:
+    if not STOCK_RESERVATION_TTL and product and hasattr(product, 'stock') and product.stock is not None:
         if product.stock < item_data.quantity:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Insufficient stock. Available: {product.stock}"
             )
     
-    cart_item.quantity = item_data.quantity
+    hold_stock(db, session_id, {cart_item.product_id: item_data.quantity}, {product.id: product.name} if product else None)
+    cart_item = store.set_quantity(session_id, cart_item.product_id, item_data.quantity)
+    response = cart_item_payload(cart_item, product)
+    store.commit()
     db.commit()
-    db.refresh(cart_item)
-    return cart_item
+    return response
 
 
 @router.delete("/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 def remove_from_cart(
     item_id: int,
     session_id: str = "default",
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    store: CartStore = Depends(get_cart_store)
 ):
     """Remove item from cart"""
-    cart = get_or_create_cart(db, session_id)
-    
-    cart_item = db.query(CartItem).filter(
-        CartItem.id == item_id,
-        CartItem.cart_id == cart.id
-    ).first()
-    
-    if not cart_item:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Cart item not found"
-        )
+    cart_item = get_cart_line(store, session_id, item_id)
     
-    db.delete(cart_item)
+    hold_stock(db, session_id, {cart_item.product_id: 0})
+    store.remove(session_id, cart_item.product_id)
+    store.commit()
     db.commit()
     return None
 
 
 @router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
-def clear_cart(session_id: str = "default", db: Session = Depends(get_db)):
+def clear_cart(
+    session_id: str = "default",
+    db: Session = Depends(get_db),
+    store: CartStore = Depends(get_cart_store)
+):
     """Clear all items from cart"""
-    cart = get_or_create_cart(db, session_id)
-    
-    db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
+    release_stock(db, session_id)
+    store.clear(session_id)
+    store.commit()
     db.commit()
     return None
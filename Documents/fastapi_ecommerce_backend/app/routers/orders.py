@@ -1,32 +1,72 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from typing import List
-from app.database.session import get_db
+from typing import List, Literal, Optional
+from app.database.session import get_db, open_read_session
 from app.models.order import Order, OrderItem
-from app.models.cart import Cart
-from app.models.cart_item import CartItem
-from app.models.product import Product
-from app.schemas.order import OrderCreate, Order as OrderSchema, OrderSummary, OrderItem as OrderItemSchema
+from app.services.cart_store import CartStore, get_cart_store
+from app.services.orders import CREATE_ORDER_SCOPE, checkout_lines, order_items_query, order_item_payload, order_payload
+from app.services.order_export import EXPORT_MEDIA_TYPES, export_chunks, export_filename, order_export_query
+from app.services.idempotency import begin_idempotent, complete_idempotent, request_fingerprint
+from app.services.inventory import commit_stock
+from app.services.jobs import enqueue
+from app.services.tasks import order_created_jobs, stats_delta_jobs
+from app.services.stats import order_deltas, status_change_deltas
+from app.core.auth import admin_required
+from app.utils.pagination import order_keyset, order_next_cursor, NEXT_CURSOR_HEADER
+from app.schemas.order import OrderCreate, OrderStatus, OrderStatusUpdate, Order as OrderSchema, OrderSummary, OrderPage, OrderItem as OrderItemSchema
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
 
-def get_or_create_cart(db: Session, session_id: str = "default") -> Cart:
-    """Get existing cart or create new one for session"""
-    cart = db.query(Cart).filter(Cart.session_id == session_id).first()
-    if not cart:
-        cart = Cart(session_id=session_id)
-        db.add(cart)
-        db.commit()
-        db.refresh(cart)
-    return cart
+@router.get("/", response_model=OrderPage)
+def get_orders(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """List all orders (admin only) - newest first, paginated by cursor"""
+    # Seek past the cursor on (created_at, id); skip is kept for old clients
+    query = order_keyset(db.query(Order), Order, cursor)
+    if skip and not cursor:
+        query = query.offset(skip)
+    orders = query.limit(limit).all()
 
+    next_cursor = order_next_cursor(orders, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return {"items": orders, "next_cursor": next_cursor}
 
-@router.get("/", response_model=List[OrderSummary])
-def get_orders(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """List all orders (admin only) - paginated"""
-    orders = db.query(Order).offset(skip).limit(limit).all()
-    return orders
+
+@router.get("/export")
+def export_orders(
+    fmt: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    order_status: Optional[OrderStatus] = Query(None, alias="status"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    _: bool = admin_required
+):
+    """Stream orders with their items as CSV or NDJSON (admin only)"""
+    query = order_export_query(order_status, created_from, created_to)
+
+    def stream():
+        # Own session: the response outlives the request's dependencies
+        db = open_read_session()
+        try:
+            # Core execution: plain rows without ORM result processing
+            yield from export_chunks(db.connection().execute(query), fmt)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(fmt)}"'}
+    )
 
 
 @router.get("/{order_id}", response_model=OrderSchema)
@@ -38,96 +78,107 @@ def get_order(order_id: int, db: Session = Depends(get_db)):
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Order not found"
         )
-    return order
+
+    rows = db.execute(order_items_query(order_id)).all()
+    return order_payload(order, [order_item_payload(row) for row in rows])
 
 
 @router.post("/", response_model=OrderSchema, status_code=status.HTTP_201_CREATED)
-def create_order(order_data: OrderCreate, session_id: str = "default", db: Session = Depends(get_db)):
+def create_order(
+    order_data: OrderCreate,
+    session_id: str = "default",
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    db: Session = Depends(get_db),
+    store: CartStore = Depends(get_cart_store)
+):
     """Create order from cart with guest information"""
-    # Get the current cart for the session
-    cart = get_or_create_cart(db, session_id)
-    
-    # Check if cart has items
-    cart_items = db.query(CartItem).filter(CartItem.cart_id == cart.id).all()
-    if not cart_items:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot create order from empty cart"
+    # A retried request with the same Idempotency-Key gets the first response back
+    if idempotency_key:
+        fingerprint = request_fingerprint(session_id, order_data.model_dump())
+        replay = begin_idempotent(db, CREATE_ORDER_SCOPE, idempotency_key, fingerprint)
+        if replay is not None:
+            return replay
+
+    # Cart items and their products in one statement
+    lines, total_items, total_price = checkout_lines(store.checkout_rows(db, session_id))
+
+    # Take the stock for every line in one conditional UPDATE; a short line fails the checkout
+    commit_stock(db, session_id, lines)
+
+    # Insert the order with its totals already known
+    order = db.execute(
+        insert(Order)
+        .values(
+            guest_name=order_data.guest_name,
+            guest_email=order_data.guest_email,
+            guest_phone=order_data.guest_phone,
+            total_price=total_price,
+            total_items=total_items
         )
-    
-    # Create the order
-    order = Order(
-        guest_name=order_data.guest_name,
-        guest_email=order_data.guest_email,
-        guest_phone=order_data.guest_phone
-    )
-    db.add(order)
-    db.flush()  # Get the order ID
-    
-    # Create order items from cart items
-    total_price = 0
-    total_items = 0
-    
-    for cart_item in cart_items:
-        # Get product details
-        product = db.query(Product).filter(Product.id == cart_item.product_id).first()
-        if not product:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Product {cart_item.product_id} not found"
-            )
-        
-        # Create order item
-        order_item = OrderItem(
-            order_id=order.id,
-            product_id=cart_item.product_id,
-            quantity=cart_item.quantity
+        .returning(
+            Order.id, Order.guest_name, Order.guest_email, Order.guest_phone,
+            Order.status, Order.total_price, Order.total_items, Order.created_at
         )
-        db.add(order_item)
-        
-        # Calculate totals
-        item_total = product.price * cart_item.quantity
-        total_price += item_total
-        total_items += cart_item.quantity
-    
-    # Update order totals
-    order.total_price = total_price
-    order.total_items = total_items
-    
-    # Clear the cart after successful order creation
-    db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
-    
+    ).one()
+
+    # Insert every order item in a single bulk statement
+    inserted = db.execute(
+        insert(OrderItem).returning(OrderItem.product_id, OrderItem.id),
+        [
+            {"order_id": order.id, "product_id": line["product_id"], "quantity": line["quantity"]}
+            for line in lines
+        ]
+    ).all()
+
+    # Stats and the confirmation email run in the worker once this commits
+    enqueue(db, *order_created_jobs(order))
+
+    # SQL carts are cleared in the order's transaction, not queued: a cart still
+    # full after the 201 could be checked out a second time
+    if store.transactional:
+        store.clear(session_id)
+
+    item_ids = dict(inserted)
+    items = [
+        {"id": item_ids[line["product_id"]], "order_id": order.id, **line}
+        for line in lines
+    ]
+    payload = order_payload(order, items)
+
+    # Keep the response for retries; it commits together with the order
+    if idempotency_key:
+        body = OrderSchema.model_validate(payload).model_dump_json()
+        complete_idempotent(db, CREATE_ORDER_SCOPE, idempotency_key, status.HTTP_201_CREATED, body)
+
     # Commit the transaction
     db.commit()
-    db.refresh(order)
-    
-    # Get order items with product details for response
-    order_items_with_details = []
-    for order_item in order.items:
-        product = db.query(Product).filter(Product.id == order_item.product_id).first()
-        if product:
-            order_items_with_details.append({
-                "id": order_item.id,
-                "order_id": order_item.order_id,
-                "product_id": order_item.product_id,
-                "quantity": order_item.quantity,
-                "product_name": product.name,
-                "product_price": product.price,
-                "total_price": product.price * order_item.quantity
-            })
+
+    # Key-value carts only once the order is saved, so a failed checkout keeps them
+    if not store.transactional:
+        store.clear(session_id)
+    return payload
+
+
+@router.patch("/{order_id}/status", response_model=OrderSummary)
+def update_order_status(
+    order_id: int,
+    status_data: OrderStatusUpdate,
+    db: Session = Depends(get_db),
+    _: bool = admin_required
+):
+    """Change an order's status (admin only)"""
+    order = db.query(Order).filter(Order.id == order_id).first()
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
     
-    # Return enriched order data
-    return {
-        "id": order.id,
-        "guest_name": order.guest_name,
-        "guest_email": order.guest_email,
-        "guest_phone": order.guest_phone,
-        "status": order.status,
-        "total_price": order.total_price,
-        "total_items": order.total_items,
-        "created_at": order.created_at,
-        "items": order_items_with_details
-    }
+    old_status = order.status
+    order.status = status_data.status
+    enqueue(db, *stats_delta_jobs(status_change_deltas(old_status, order.status, order.total_price)))
+    db.commit()
+    return order
 
 
 @router.get("/{order_id}/items", response_model=List[OrderItemSchema])
@@ -140,8 +191,8 @@ def get_order_items(order_id: int, db: Session = Depends(get_db)):
             detail="Order not found"
         )
     
-    order_items = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
-    return order_items
+    rows = db.execute(order_items_query(order_id)).all()
+    return [order_item_payload(row) for row in rows]
 
 
 @router.delete("/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -157,8 +208,9 @@ def delete_order(order_id: int, db: Session = Depends(get_db)):
     # Delete order items first (cascade should handle this, but explicit for safety)
     db.query(OrderItem).filter(OrderItem.order_id == order_id).delete()
     
-    # Delete the order
+    # Delete the order; the worker takes it out of the dashboard stats
     db.delete(order)
+    enqueue(db, *stats_delta_jobs(order_deltas(order.status, order.total_price, -1)))
     db.commit()
     
     return None
@@ -1,61 +1,103 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
-from app.database.session import get_db
+from typing import List, Literal, Optional
+from app.database.session import get_db, get_read_db
 from app.models.product import Product
-from app.schemas.product import ProductCreate, ProductUpdate, Product as ProductSchema
+from app.schemas.product import ProductCreate, ProductUpdate, ProductImportReport, ProductPage, Product as ProductSchema
 from app.core.auth import admin_required
+from app.core.responses import FastJSONResponse
+from app.services.stats import apply_stats_delta
+from app.services.search import search_products, index_product, unindex_product
+from app.services.product_import import DEFAULT_BATCH_SIZE, detect_format, import_products, iter_records
+from app.utils.pagination import id_keyset, id_next_cursor, NEXT_CURSOR_HEADER
+from app.utils.http_cache import CATALOG_CACHE_CONTROL, cache_headers, make_etag, not_modified, products_etag
+from app.services.catalog import (
+    catalog_cache, cached_catalog_read, get_cached_product, bump_catalog_version, product_dict,
+    product_columns, row_product_dict,
+)
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+# Columns listed by /products/debug/list
+DEBUG_FIELDS = ("id", "name", "price", "stock", "is_active", "category")
 
-@router.get("/", response_model=List[ProductSchema])
+
+@router.get("/", response_model=ProductPage)
 def get_products(
+    request: Request,
     skip: int = 0, 
     limit: int = 100, 
     category: str = None,
     active_only: bool = True,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
-    """List all products with optional filtering"""
-    query = db.query(Product)
-    
-    if active_only:
-        query = query.filter(Product.is_active == True)
-    
-    if category:
-        query = query.filter(Product.category == category)
-    
-    products = query.offset(skip).limit(limit).all()
-    return products
+    """List all products with optional filtering, paginated by cursor on id"""
+    def load():
+        # Plain column tuples: no ORM instances for a read-only listing
+        query = select(*product_columns())
+        
+        if active_only:
+            query = query.where(Product.is_active == True)
+        
+        if category:
+            query = query.where(Product.category == category)
+        
+        # Seek past the cursor's id; skip is kept for old clients
+        query = id_keyset(query, Product, cursor)
+        if skip and not cursor:
+            query = query.offset(skip)
+        
+        return [row_product_dict(row) for row in db.execute(query.limit(limit))]
+
+    products = cached_catalog_read(db, ("products", skip, limit, category, active_only, cursor), load)
+    headers = cache_headers(products_etag(products), CATALOG_CACHE_CONTROL)
+    cached = not_modified(request, headers)
+    if cached:
+        return cached
+    next_cursor = id_next_cursor(products, limit)
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    # The cached dicts already have the ProductSchema shape; skip per-item validation
+    return FastJSONResponse({"items": products, "next_cursor": next_cursor}, headers=headers)
+
+
+@router.get("/search", response_model=List[ProductSchema])
+def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    category: str = None,
+    active_only: bool = True,
+    db: Session = Depends(get_read_db)
+):
+    """Relevance-ranked search over product name, description and category"""
+    products = search_products(db, q, category=category, active_only=active_only, skip=skip, limit=limit)
+    return FastJSONResponse(products)
 
 
 @router.get("/debug/list")
-def debug_products(db: Session = Depends(get_db)):
+def debug_products(db: Session = Depends(get_read_db)):
     """Debug endpoint to see all products with their IDs"""
-    products = db.query(Product).all()
-    return [
-        {
-            "id": p.id,
-            "name": p.name,
-            "price": p.price,
-            "stock": p.stock,
-            "is_active": p.is_active,
-            "category": p.category
-        }
-        for p in products
-    ]
+    rows = db.execute(select(*(getattr(Product, field) for field in DEBUG_FIELDS)))
+    return FastJSONResponse([dict(zip(DEBUG_FIELDS, row)) for row in rows])
 
 
 @router.get("/{product_id}", response_model=ProductSchema)
-def get_product(product_id: int, db: Session = Depends(get_db)):
+def get_product(product_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
     """Get product by ID"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = get_cached_product(db, product_id)
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
+    headers = cache_headers(products_etag([product]), CATALOG_CACHE_CONTROL, product["updated_at"])
+    cached = not_modified(request, headers)
+    if cached:
+        return cached
+    response.headers.update(headers)
     return product
 
 
@@ -72,11 +114,28 @@ def create_product(product_data: ProductCreate, db: Session = Depends(get_db), _
     
     product = Product(**product_data.model_dump())
     db.add(product)
+    apply_stats_delta(db, total_products=1)
+    version = bump_catalog_version(db)
     db.commit()
+    catalog_cache.invalidate()
     db.refresh(product)
+    index_product(db, product_dict(product), version)
     return product
 
 
+@router.post("/import", response_model=ProductImportReport)
+def import_products_upload(
+    file: UploadFile = File(...),
+    fmt: Optional[Literal["csv", "ndjson"]] = Query(None, alias="format"),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    _: bool = admin_required
+):
+    """Bulk create/update products from a CSV or NDJSON upload, keyed on name"""
+    fmt = fmt or detect_format(file.filename, file.content_type)
+    return import_products(db, iter_records(file.file, fmt), batch_size).as_dict()
+
+
 @router.put("/{product_id}", response_model=ProductSchema)
 def update_product(product_id: int, product_data: ProductUpdate, db: Session = Depends(get_db), _: bool = admin_required):
     """Update product"""
@@ -101,8 +160,11 @@ def update_product(product_id: int, product_data: ProductUpdate, db: Session = D
     for field, value in update_data.items():
         setattr(product, field, value)
     
+    version = bump_catalog_version(db)
     db.commit()
+    catalog_cache.invalidate()
     db.refresh(product)
+    index_product(db, product_dict(product), version)
     return product
 
 
@@ -117,12 +179,25 @@ def delete_product(product_id: int, db: Session = Depends(get_db), _: bool = adm
         )
     
     db.delete(product)
+    apply_stats_delta(db, total_products=-1)
+    version = bump_catalog_version(db)
     db.commit()
+    catalog_cache.invalidate()
+    unindex_product(db, product_id, version)
     return None
 
 
 @router.get("/categories/list")
-def get_categories(db: Session = Depends(get_db)):
+def get_categories(request: Request, response: Response, db: Session = Depends(get_read_db)):
     """Get list of all product categories"""
-    categories = db.query(Product.category).distinct().filter(Product.category.isnot(None)).all()
-    return [category[0] for category in categories]
+    def load():
+        categories = db.query(Product.category).distinct().filter(Product.category.isnot(None)).all()
+        return [category[0] for category in categories]
+
+    categories = cached_catalog_read(db, ("categories",), load)
+    headers = cache_headers(make_etag(categories), CATALOG_CACHE_CONTROL)
+    cached = not_modified(request, headers)
+    if cached:
+        return cached
+    response.headers.update(headers)
+    return categories
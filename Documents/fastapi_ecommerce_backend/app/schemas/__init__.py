@@ -1,6 +1,6 @@
-from .product import Product, ProductCreate, ProductUpdate, ProductBase
-from .cart import Cart, CartItem, CartItemCreate, CartItemUpdate, CartItemBase
-from .order import Order, OrderCreate, OrderSummary, OrderItem, OrderItemBase
+from .product import Product, ProductCreate, ProductUpdate, ProductBase, ProductImportError, ProductImportReport
+from .cart import Cart, CartBatch, CartItem, CartItemCreate, CartItemUpdate, CartItemBase, CartOperation
+from .order import Order, OrderCreate, OrderStatus, OrderStatusUpdate, OrderSummary, OrderItem, OrderItemBase
 
 __all__ = [
     # Product schemas
@@ -8,17 +8,23 @@ __all__ = [
     "ProductCreate", 
     "ProductUpdate",
     "ProductBase",
+    "ProductImportError",
+    "ProductImportReport",
     
     # Cart schemas
     "Cart",
+    "CartBatch",
     "CartItem",
     "CartItemCreate",
     "CartItemUpdate", 
     "CartItemBase",
+    "CartOperation",
     
     # Order schemas
     "Order",
     "OrderCreate",
+    "OrderStatus",
+    "OrderStatusUpdate",
     "OrderSummary",
     "OrderItem",
     "OrderItemBase",
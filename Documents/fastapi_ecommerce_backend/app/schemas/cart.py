@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 
 
 class CartItemBase(BaseModel):
@@ -15,6 +15,17 @@ class CartItemUpdate(BaseModel):
     quantity: int
 
 
+class CartOperation(BaseModel):
+    op: Literal["add", "set", "remove"]
+    product_id: int
+    # Added for "add", the new quantity for "set" (0 removes), ignored for "remove"
+    quantity: int = Field(1, ge=0)
+
+
+class CartBatch(BaseModel):
+    operations: List[CartOperation] = Field(..., min_length=1, max_length=100)
+
+
 class CartItem(CartItemBase):
     id: int
     cart_id: int
@@ -27,7 +38,8 @@ class CartItem(CartItemBase):
 
 
 class Cart(BaseModel):
-    id: int
+    # None until the first item is added
+    id: Optional[int] = None
     items: List[CartItem] = []
     total_items: int = 0
     total_price: int = 0
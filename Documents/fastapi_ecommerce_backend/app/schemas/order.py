@@ -1,8 +1,11 @@
 from pydantic import BaseModel, EmailStr
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 
+OrderStatus = Literal["pending", "confirmed", "shipping", "completed", "cancelled"]
+
+
 class OrderItemBase(BaseModel):
     product_id: int
     quantity: int
@@ -25,8 +28,13 @@ class OrderCreate(BaseModel):
     guest_phone: str
 
 
+class OrderStatusUpdate(BaseModel):
+    status: OrderStatus
+
+
 class Order(OrderCreate):
     id: int
+    status: str = "pending"
     created_at: datetime
     items: List[OrderItem] = []
     total_items: int = 0
@@ -40,9 +48,15 @@ class OrderSummary(BaseModel):
     id: int
     guest_name: str
     guest_email: str
+    status: str
     created_at: datetime
     total_items: int
     total_price: int
 
     class Config:
         from_attributes = True
+
+
+class OrderPage(BaseModel):
+    items: List[OrderSummary]
+    next_cursor: Optional[str] = None
@@ -1,5 +1,6 @@
+from datetime import datetime
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 
 class ProductBase(BaseModel):
@@ -28,6 +29,26 @@ class ProductUpdate(BaseModel):
 
 class Product(ProductBase):
     id: int
+    version: int = 1
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
+
+
+class ProductPage(BaseModel):
+    items: List[Product]
+    next_cursor: Optional[str] = None
+
+
+class ProductImportError(BaseModel):
+    row: int
+    error: str
+
+
+class ProductImportReport(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    errors: List[ProductImportError]
+    errors_truncated: bool
@@ -0,0 +1,209 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func, insert, update, delete
+from app.models.cart import Cart
+from app.models.cart_item import CartItem
+from app.models.product import Product
+
+
+def cart_contents_query(session_id: str):
+    """Select the session's cart joined with its items and their products in one statement"""
+    cart_id = (
+        select(func.min(Cart.id))
+        .where(Cart.session_id == session_id)
+        .scalar_subquery()
+    )
+    return (
+        select(
+            Cart.id.label("cart_id"),
+            CartItem.id.label("item_id"),
+            CartItem.product_id,
+            CartItem.quantity,
+            Product.name.label("product_name"),
+            Product.price.label("product_price"),
+        )
+        .outerjoin(CartItem, CartItem.cart_id == Cart.id)
+        .outerjoin(Product, Product.id == CartItem.product_id)
+        .where(Cart.id == cart_id)
+        .order_by(CartItem.id)
+    )
+
+
+def summarize_cart(rows) -> Optional[dict]:
+    """Build the cart payload and its totals from joined rows in a single pass"""
+    if not rows:
+        return None
+
+    total_items = 0
+    total_price = 0
+    items = []
+    for row in rows:
+        # Outer join yields one row with NULL item columns for an empty cart
+        if row.item_id is None:
+            continue
+
+        total_items += row.quantity
+        if row.product_name is None:
+            continue
+
+        item_total = row.product_price * row.quantity
+        total_price += item_total
+        items.append({
+            "id": row.item_id,
+            "cart_id": row.cart_id,
+            "product_id": row.product_id,
+            "quantity": row.quantity,
+            "product_name": row.product_name,
+            "product_price": row.product_price,
+            "total_price": item_total
+        })
+
+    return {
+        "id": rows[0].cart_id,
+        "items": items,
+        "total_items": total_items,
+        "total_price": total_price
+    }
+
+
+def empty_cart(cart_id: Optional[int] = None) -> dict:
+    """Payload of a cart without items; the id stays None until a first write creates the cart"""
+    return {"id": cart_id, "items": [], "total_items": 0, "total_price": 0}
+
+
+def touch_cart_statement(cart_id: int):
+    """Mark a cart as used now, keeping it out of the idle cart purge"""
+    return update(Cart).where(Cart.id == cart_id).values(updated_at=func.now())
+
+
+def cart_item_payload(item, product) -> dict:
+    """Build a cart item response enriched with its product details"""
+    return {
+        "id": item.id,
+        "cart_id": item.cart_id,
+        "product_id": item.product_id,
+        "quantity": item.quantity,
+        "product_name": product.name,
+        "product_price": product.price,
+        "total_price": product.price * item.quantity
+    }
+
+
+def batch_products_query(product_ids: Iterable[int]):
+    """Select what cart validation needs for a set of products in one statement"""
+    return select(
+        Product.id, Product.name, Product.price, Product.stock, Product.is_active
+    ).where(Product.id.in_(list(product_ids)))
+
+
+def apply_cart_operations(quantities: Dict[int, int], operations, products: Dict[int, object],
+                          check_stock: bool = True) -> Dict[int, int]:
+    """
+    Replay add/set/remove operations on {product_id: quantity} and validate the
+    result against the products, all or nothing. Returns the changed lines
+    with 0 meaning removed. Pass check_stock=False when stock reservations
+    enforce availability instead.
+    """
+    result = dict(quantities)
+    touched = set()
+    for operation in operations:
+        if operation.op == "remove" or (operation.op == "set" and operation.quantity == 0):
+            result.pop(operation.product_id, None)
+            touched.discard(operation.product_id)
+            continue
+
+        product = products.get(operation.product_id)
+        if not product:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Product with ID {operation.product_id} not found"
+            )
+        if not product.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Product '{product.name}' is not available for purchase"
+            )
+        if operation.op == "add":
+            result[operation.product_id] = result.get(operation.product_id, 0) + operation.quantity
+        else:
+            result[operation.product_id] = operation.quantity
+        touched.add(operation.product_id)
+
+    # Stock is checked against final quantities, once per product
+    for product_id in touched if check_stock else ():
+        product = products[product_id]
+        if product.stock is not None and product.stock < result[product_id]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient stock for '{product.name}'. Available: {product.stock}, Requested: {result[product_id]}"
+            )
+
+    changes = {product_id: 0 for product_id in quantities if product_id not in result}
+    changes.update({
+        product_id: quantity for product_id, quantity in result.items()
+        if quantities.get(product_id) != quantity
+    })
+    return changes
+
+
+def cart_change_statements(cart_id: int, item_ids: Dict[int, int], changes: Dict[int, int]) -> List[Tuple[object, object]]:
+    """
+    Bulk statements applying {product_id: quantity} changes (0 removes) to a
+    cart whose existing lines are {product_id: item_id}: at most one DELETE,
+    one executemany UPDATE and one executemany INSERT.
+    """
+    removed = [product_id for product_id, quantity in changes.items() if quantity == 0 and product_id in item_ids]
+    updated = [
+        {"id": item_ids[product_id], "quantity": quantity}
+        for product_id, quantity in changes.items() if quantity and product_id in item_ids
+    ]
+    added = [
+        {"cart_id": cart_id, "product_id": product_id, "quantity": quantity}
+        for product_id, quantity in changes.items() if quantity and product_id not in item_ids
+    ]
+
+    statements = []
+    if removed:
+        statements.append((delete(CartItem).where(CartItem.cart_id == cart_id, CartItem.product_id.in_(removed)), None))
+    if updated:
+        statements.append((update(CartItem), updated))
+    if added:
+        statements.append((insert(CartItem), added))
+    return statements
+
+
+def idle_carts_query(cutoff: datetime, batch_size: int):
+    """
+    Up to batch_size carts untouched since cutoff, oldest first via
+    ix_carts_updated_at. Carts locked by an in-flight write are skipped
+    (PostgreSQL) rather than waited for.
+    """
+    return (
+        select(Cart.id)
+        .where(Cart.updated_at < cutoff)
+        .order_by(Cart.updated_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def purge_idle_carts(db: Session, idle_seconds: int, batch_size: int = 1000, max_batches: int = None) -> dict:
+    """
+    Delete carts (and their items) idle for more than idle_seconds, one
+    committed batch at a time so row locks stay short. Returns counts of
+    what was removed.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=idle_seconds)
+    report = {"carts": 0, "items": 0, "batches": 0}
+    while max_batches is None or report["batches"] < max_batches:
+        cart_ids = db.scalars(idle_carts_query(cutoff, batch_size)).all()
+        if not cart_ids:
+            db.rollback()
+            break
+        report["items"] += db.execute(delete(CartItem).where(CartItem.cart_id.in_(cart_ids))).rowcount
+        report["carts"] += db.execute(delete(Cart).where(Cart.id.in_(cart_ids))).rowcount
+        db.commit()
+        report["batches"] += 1
+    return report
@@ -0,0 +1,349 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, NamedTuple, Optional
+from fastapi import Depends
+from sqlalchemy import insert, update, delete
+from sqlalchemy.orm import Session
+from app.database.session import get_db
+from app.models.cart import Cart
+from app.models.cart_item import CartItem
+from app.models.product import Product
+from app.services.cart import (
+    cart_change_statements, cart_contents_query, empty_cart, summarize_cart, touch_cart_statement
+)
+
+# "sql" (default) keeps carts in the carts/cart_items tables, "memory" and
+# "redis" keep them in a key-value store so cart traffic never hits SQL
+CART_BACKEND = os.getenv("CART_BACKEND", "sql").lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Idle carts expire from the Redis store after this many seconds; SQL carts
+# are deleted by python -m app.commands.purge_carts once idle this long
+CART_TTL = int(os.getenv("CART_TTL", str(7 * 24 * 3600)))
+
+
+class CartLine(NamedTuple):
+    """One line of a cart as returned by a cart store"""
+    id: int
+    cart_id: int
+    product_id: int
+    quantity: int
+
+
+class CheckoutRow(NamedTuple):
+    """Cart line joined with its product, shaped like cart_contents_query rows"""
+    cart_id: int
+    item_id: Optional[int]
+    product_id: Optional[int]
+    quantity: Optional[int]
+    product_name: Optional[str]
+    product_price: Optional[int]
+
+
+class CartStore(ABC):
+    """
+    Cart storage backend.
+    Mutations are staged in the request's DB session for SQL carts and applied
+    immediately for key-value carts; routers call commit() once they are done.
+    """
+
+    # True when mutations are staged in the request's DB session and commit or
+    # roll back with it; key-value stores apply them immediately
+    transactional = False
+
+    def commit(self) -> None:
+        pass
+
+    @abstractmethod
+    def get_cart_id(self, session_id: str, create: bool = False) -> Optional[int]:
+        """The session's cart id, assigning one when create is set"""
+
+    @abstractmethod
+    def get_lines(self, session_id: str) -> List[CartLine]:
+        """Lines of the session's cart, empty when it has none"""
+
+    @abstractmethod
+    def set_quantity(self, session_id: str, product_id: int, quantity: int) -> CartLine:
+        """Add a product to the cart or change its quantity"""
+
+    @abstractmethod
+    def remove(self, session_id: str, product_id: int) -> bool:
+        """Remove a product's line, returning whether there was one"""
+
+    def set_quantities(self, session_id: str, changes: Dict[int, int]) -> None:
+        """Apply {product_id: quantity} changes at once; a quantity of 0 removes the line"""
+        for product_id, quantity in changes.items():
+            if quantity:
+                self.set_quantity(session_id, product_id, quantity)
+            else:
+                self.remove(session_id, product_id)
+
+    @abstractmethod
+    def clear(self, session_id: str) -> None:
+        """Remove every line of the session's cart"""
+
+    def checkout_rows(self, db: Session, session_id: str) -> List[CheckoutRow]:
+        """Cart lines joined with their products via one batched IN query"""
+        lines = self.get_lines(session_id)
+        if not lines:
+            return []
+
+        products = {
+            row.id: row
+            for row in db.query(Product.id, Product.name, Product.price)
+            .filter(Product.id.in_([line.product_id for line in lines]))
+        }
+        rows = []
+        for line in lines:
+            product = products.get(line.product_id)
+            rows.append(CheckoutRow(
+                cart_id=line.cart_id,
+                item_id=line.id,
+                product_id=line.product_id,
+                quantity=line.quantity,
+                product_name=product.name if product else None,
+                product_price=product.price if product else None
+            ))
+        return rows
+
+    def get_cart(self, db: Session, session_id: str) -> dict:
+        """Cart payload with items and totals; reading never creates a cart"""
+        cart = summarize_cart(self.checkout_rows(db, session_id))
+        if cart is None:
+            return empty_cart(self.get_cart_id(session_id))
+        return cart
+
+
+class SqlCartStore(CartStore):
+    """Carts in the carts/cart_items tables, bound to one request's session"""
+
+    transactional = True
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._rows = None
+        # Cart written by this request, whose updated_at is bumped on commit
+        self._touched = None
+
+    def commit(self) -> None:
+        if self._touched is not None:
+            self.db.execute(touch_cart_statement(self._touched))
+            self._touched = None
+        self.db.commit()
+
+    def _load(self, session_id: str):
+        # Cart, items and products in one joined query, reused for the request
+        if self._rows is None:
+            self._rows = self.db.execute(cart_contents_query(session_id)).all()
+        return self._rows
+
+    def get_cart_id(self, session_id: str, create: bool = False) -> Optional[int]:
+        rows = self._load(session_id)
+        if rows:
+            return rows[0].cart_id
+        if not create:
+            return None
+
+        cart = Cart(session_id=session_id)
+        self.db.add(cart)
+        self.db.flush()
+        self._rows = [CheckoutRow(cart.id, None, None, None, None, None)]
+        return cart.id
+
+    def get_lines(self, session_id: str) -> List[CartLine]:
+        return [
+            CartLine(row.item_id, row.cart_id, row.product_id, row.quantity)
+            for row in self._load(session_id)
+            if row.item_id is not None
+        ]
+
+    def set_quantity(self, session_id: str, product_id: int, quantity: int) -> CartLine:
+        existing = next((line for line in self.get_lines(session_id) if line.product_id == product_id), None)
+        if existing:
+            self.db.execute(
+                update(CartItem).where(CartItem.id == existing.id).values(quantity=quantity)
+            )
+            line = existing._replace(quantity=quantity)
+        else:
+            cart_id = self.get_cart_id(session_id, create=True)
+            item_id = self.db.scalar(
+                insert(CartItem)
+                .values(cart_id=cart_id, product_id=product_id, quantity=quantity)
+                .returning(CartItem.id)
+            )
+            line = CartLine(item_id, cart_id, product_id, quantity)
+        self._rows = None
+        self._touched = line.cart_id
+        return line
+
+    def remove(self, session_id: str, product_id: int) -> bool:
+        cart_id = self.get_cart_id(session_id)
+        if cart_id is None:
+            return False
+        result = self.db.execute(
+            delete(CartItem).where(CartItem.cart_id == cart_id, CartItem.product_id == product_id)
+        )
+        self._rows = None
+        self._touched = cart_id
+        return result.rowcount > 0
+
+    def set_quantities(self, session_id: str, changes: Dict[int, int]) -> None:
+        item_ids = {line.product_id: line.id for line in self.get_lines(session_id)}
+        cart_id = self.get_cart_id(session_id, create=any(changes.values()))
+        if cart_id is None:
+            return
+        for statement, params in cart_change_statements(cart_id, item_ids, changes):
+            self.db.execute(statement, params)
+        self._rows = None
+        self._touched = cart_id
+
+    def clear(self, session_id: str) -> None:
+        cart_id = self.get_cart_id(session_id)
+        if cart_id is not None:
+            self.db.execute(delete(CartItem).where(CartItem.cart_id == cart_id))
+            self._touched = cart_id
+        self._rows = None
+
+    def checkout_rows(self, db: Session, session_id: str) -> List[CheckoutRow]:
+        return self._load(session_id)
+
+    def get_cart(self, db: Session, session_id: str) -> dict:
+        return summarize_cart(self._load(session_id)) or empty_cart()
+
+
+class InMemoryCartStore(CartStore):
+    """Process-local carts; for development and single-worker deployments"""
+
+    def __init__(self):
+        self._carts: Dict[str, Dict[int, int]] = {}
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get_cart_id(self, session_id: str, create: bool = False) -> Optional[int]:
+        with self._lock:
+            if session_id not in self._ids and create:
+                self._ids[session_id] = len(self._ids) + 1
+            return self._ids.get(session_id)
+
+    def get_lines(self, session_id: str) -> List[CartLine]:
+        with self._lock:
+            cart_id = self._ids.get(session_id)
+            items = dict(self._carts.get(session_id, {}))
+        return [CartLine(product_id, cart_id, product_id, quantity) for product_id, quantity in sorted(items.items())]
+
+    def set_quantity(self, session_id: str, product_id: int, quantity: int) -> CartLine:
+        cart_id = self.get_cart_id(session_id, create=True)
+        with self._lock:
+            self._carts.setdefault(session_id, {})[product_id] = quantity
+        return CartLine(product_id, cart_id, product_id, quantity)
+
+    def remove(self, session_id: str, product_id: int) -> bool:
+        with self._lock:
+            return self._carts.get(session_id, {}).pop(product_id, None) is not None
+
+    def set_quantities(self, session_id: str, changes: Dict[int, int]) -> None:
+        self.get_cart_id(session_id, create=True)
+        with self._lock:
+            items = self._carts.setdefault(session_id, {})
+            for product_id, quantity in changes.items():
+                if quantity:
+                    items[product_id] = quantity
+                else:
+                    items.pop(product_id, None)
+
+    def clear(self, session_id: str) -> None:
+        with self._lock:
+            self._carts.pop(session_id, None)
+
+
+class RedisCartStore(CartStore):
+    """
+    Carts as Redis hashes (product_id -> quantity) with a sliding TTL.
+    Works with any client exposing the redis-py command API.
+    """
+
+    def __init__(self, client, ttl: int = CART_TTL, prefix: str = "cart"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisCartStore":
+        import redis
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def _items_key(self, session_id: str) -> str:
+        return f"{self.prefix}:{session_id}:items"
+
+    def _id_key(self, session_id: str) -> str:
+        return f"{self.prefix}:{session_id}:id"
+
+    def get_cart_id(self, session_id: str, create: bool = False) -> Optional[int]:
+        cart_id = self.client.get(self._id_key(session_id))
+        if cart_id is None and create:
+            # SET NX so concurrent first writes agree on a single id
+            self.client.set(self._id_key(session_id), self.client.incr(f"{self.prefix}:ids"), nx=True, ex=self.ttl)
+            cart_id = self.client.get(self._id_key(session_id))
+        return int(cart_id) if cart_id is not None else None
+
+    def get_lines(self, session_id: str) -> List[CartLine]:
+        pipe = self.client.pipeline()
+        pipe.get(self._id_key(session_id))
+        pipe.hgetall(self._items_key(session_id))
+        cart_id, items = pipe.execute()
+        if cart_id is None:
+            return []
+        return sorted(
+            CartLine(int(product_id), int(cart_id), int(product_id), int(quantity))
+            for product_id, quantity in items.items()
+        )
+
+    def set_quantity(self, session_id: str, product_id: int, quantity: int) -> CartLine:
+        cart_id = self.get_cart_id(session_id, create=True)
+        pipe = self.client.pipeline()
+        pipe.hset(self._items_key(session_id), product_id, quantity)
+        pipe.expire(self._items_key(session_id), self.ttl)
+        pipe.expire(self._id_key(session_id), self.ttl)
+        pipe.execute()
+        return CartLine(product_id, cart_id, product_id, quantity)
+
+    def remove(self, session_id: str, product_id: int) -> bool:
+        return self.client.hdel(self._items_key(session_id), product_id) > 0
+
+    def set_quantities(self, session_id: str, changes: Dict[int, int]) -> None:
+        self.get_cart_id(session_id, create=True)
+        updated = {product_id: quantity for product_id, quantity in changes.items() if quantity}
+        removed = [product_id for product_id, quantity in changes.items() if not quantity]
+        # One round trip for the whole batch
+        pipe = self.client.pipeline()
+        if updated:
+            pipe.hset(self._items_key(session_id), mapping=updated)
+        if removed:
+            pipe.hdel(self._items_key(session_id), *removed)
+        pipe.expire(self._items_key(session_id), self.ttl)
+        pipe.expire(self._id_key(session_id), self.ttl)
+        pipe.execute()
+
+    def clear(self, session_id: str) -> None:
+        self.client.delete(self._items_key(session_id))
+
+
+_kv_store: Optional[CartStore] = None
+
+
+def get_kv_cart_store() -> CartStore:
+    """Process-wide key-value cart store for the configured backend"""
+    global _kv_store
+    if _kv_store is None:
+        if CART_BACKEND == "redis":
+            _kv_store = RedisCartStore.from_url(REDIS_URL)
+        else:
+            _kv_store = InMemoryCartStore()
+    return _kv_store
+
+
+def get_cart_store(db: Session = Depends(get_db)) -> CartStore:
+    """Dependency returning the cart store for this request"""
+    if CART_BACKEND == "sql":
+        return SqlCartStore(db)
+    return get_kv_cart_store()
@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+from typing import Callable, List
+from sqlalchemy import select, update, insert
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache, MISSING
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.catalog_state import CatalogState
+from app.models.product import Product
+
+CATALOG_STATE_ID = 1
+
+
+class CatalogCache:
+    """Catalog read cache whose entries are namespaced by the DB catalog version"""
+
+    def __init__(self, maxsize: int, ttl: float, version_check_interval: float):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.version_check_interval = version_check_interval
+        self.version = None
+        # Caches of values derived from the catalog (e.g. rendered pages), cleared along with this one
+        self.dependents: List[TTLCache] = []
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def version_stale(self) -> bool:
+        """True when the DB catalog version should be re-read"""
+        return self.version is None or time.monotonic() - self._checked_at >= self.version_check_interval
+
+    def observe_version(self, version: int) -> None:
+        """Record the version read from the DB, dropping entries from older versions"""
+        with self._lock:
+            if version != self.version:
+                self._clear()
+                self.version = version
+            self._checked_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        """Drop everything and force a version re-read on the next request"""
+        with self._lock:
+            self._clear()
+            self.version = None
+
+    def _clear(self) -> None:
+        self.cache.clear()
+        for cache in self.dependents:
+            cache.clear()
+
+    def get(self, version: int, key: tuple):
+        return self.cache.get((version,) + key)
+
+    def set(self, version: int, key: tuple, value) -> None:
+        self.cache.set((version,) + key, value)
+
+    def stats(self) -> dict:
+        return {"version": self.version, **self.cache.stats()}
+
+
+catalog_cache = CatalogCache(
+    maxsize=int(os.getenv("CATALOG_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("CATALOG_CACHE_TTL", "60")),
+    version_check_interval=float(os.getenv("CATALOG_VERSION_CHECK_INTERVAL", "1")),
+)
+
+
+def catalog_version_query():
+    """Select the current catalog version"""
+    return select(CatalogState.version).where(CatalogState.id == CATALOG_STATE_ID)
+
+
+def sync_catalog_version(db: Session) -> None:
+    """Refresh the cached catalog version from the DB if the check interval has passed"""
+    if catalog_cache.version_stale():
+        catalog_cache.observe_version(db.scalar(catalog_version_query()) or 0)
+
+
+def cached_catalog_read(db: Session, key: tuple, loader: Callable):
+    """Return a cached catalog value, calling loader() and caching its result on a miss"""
+    sync_catalog_version(db)
+    # Pin the version so a concurrent invalidation can't file this load under a newer one
+    version = catalog_cache.version
+    value = catalog_cache.get(version, key)
+    if value is MISSING:
+        value = loader()
+        catalog_cache.set(version, key, value)
+    return value
+
+
+async def cached_catalog_read_async(db: AsyncSession, key: tuple, loader: Callable):
+    """Async variant of cached_catalog_read; loader is a coroutine function"""
+    if catalog_cache.version_stale():
+        catalog_cache.observe_version(await db.scalar(catalog_version_query()) or 0)
+    version = catalog_cache.version
+    value = catalog_cache.get(version, key)
+    if value is MISSING:
+        value = await loader()
+        catalog_cache.set(version, key, value)
+    return value
+
+
+def get_cached_product(db: Session, product_id: int):
+    """Get a product snapshot through the catalog cache (None when missing)"""
+    def load():
+        product = db.query(Product).filter(Product.id == product_id).first()
+        return product_dict(product) if product else None
+
+    return cached_catalog_read(db, ("product", product_id), load)
+
+
+def bump_catalog_version_statements():
+    """Statements that increment the catalog version, creating the row if it is missing"""
+    return (
+        update(CatalogState)
+        .where(CatalogState.id == CATALOG_STATE_ID)
+        .values(version=CatalogState.version + 1)
+        .returning(CatalogState.version),
+        insert(CatalogState).values(id=CATALOG_STATE_ID, version=1),
+    )
+
+
+def bump_catalog_version(db: Session) -> int:
+    """Increment the catalog version inside the caller's transaction and return it"""
+    bump, create = bump_catalog_version_statements()
+    version = db.scalar(bump)
+    if version is None:
+        db.execute(create)
+        version = 1
+    return version
+
+
+async def bump_catalog_version_async(db: AsyncSession) -> int:
+    """Async variant of bump_catalog_version"""
+    bump, create = bump_catalog_version_statements()
+    version = await db.scalar(bump)
+    if version is None:
+        await db.execute(create)
+        version = 1
+    return version
+
+
+# Fields of a product snapshot, in the order product_columns() selects them
+PRODUCT_FIELDS = (
+    "id", "name", "description", "price", "image", "stock", "category", "is_active", "version", "updated_at",
+)
+
+
+def product_columns():
+    """Product columns for select(); skips building ORM instances for read-only listings"""
+    return [getattr(Product, field) for field in PRODUCT_FIELDS]
+
+
+def row_product_dict(row) -> dict:
+    """product_dict for a row selected with product_columns()"""
+    return dict(zip(PRODUCT_FIELDS, row))
+
+
+def product_dict(product) -> dict:
+    """Plain-dict snapshot of a product that is safe to share across requests"""
+    return {field: getattr(product, field) for field in PRODUCT_FIELDS}
@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import HTTPException, Response, status
+from sqlalchemy import delete, func, insert, select, text, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.idempotency_key import IdempotencyKey
+
+# Response header set when a stored response is replayed
+REPLAYED_HEADER = "Idempotent-Replayed"
+# Seconds a key and its stored response are kept
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", "86400"))
+# Seconds a duplicate waits for the request holding its key before giving up with 409
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+IDEMPOTENCY_POLL_INTERVAL = 0.05
+
+
+def request_fingerprint(*parts) -> str:
+    """Digest of the request a key was first used with, to reject reuse for a different one"""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def stored_response_query(scope: str, key: str):
+    """Primary key lookup of a completed request"""
+    return select(
+        IdempotencyKey.request_hash,
+        IdempotencyKey.response_status,
+        IdempotencyKey.response_body,
+        IdempotencyKey.created_at,
+    ).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+
+
+def claim_lock_timeout(deadline: float):
+    """
+    PostgreSQL: cap how long the claim waits on a duplicate's uncommitted key
+    at the time left until deadline; past it the INSERT fails with a lock
+    timeout instead of blocking until the first request ends.
+    """
+    remaining_ms = max(1, int((deadline - time.monotonic()) * 1000))
+    return select(func.set_config("lock_timeout", f"{remaining_ms}ms", True))
+
+
+# Back to the server's lock_timeout for the rest of the request's transaction
+RESTORE_LOCK_TIMEOUT = text("SET LOCAL lock_timeout TO DEFAULT")
+
+
+def _key_filter(scope: str, key: str):
+    return (IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+
+
+def _expired(created_at: datetime) -> bool:
+    # SQLite hands back naive UTC timestamps
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at < datetime.now(timezone.utc) - timedelta(seconds=IDEMPOTENCY_KEY_TTL)
+
+
+def replay_response(row, fingerprint: str) -> Response:
+    if row.request_hash != fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used for a different request"
+        )
+    return Response(
+        row.response_body,
+        status_code=row.response_status,
+        media_type="application/json",
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+def _still_running() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="A request with this Idempotency-Key is still being processed",
+        headers={"Retry-After": "1"},
+    )
+
+
+def begin_idempotent(db: Session, scope: str, key: str, fingerprint: str) -> Optional[Response]:
+    """
+    Replay the stored response for key, or claim the key in the current
+    transaction and return None so the caller runs the request and then
+    calls complete_idempotent() before committing. Call it before any other
+    work in the transaction.
+
+    The claim row is only visible once the caller commits along with its
+    response, so a duplicate's INSERT blocks on the primary key (PostgreSQL)
+    or the write lock (SQLite) until the first request finishes; it then
+    finds the stored response. A rolled back first request frees the key.
+    A duplicate gives up with 409 after IDEMPOTENCY_WAIT_SECONDS (on SQLite
+    once the busy timeout, DB_CONNECT_TIMEOUT, has also passed).
+    """
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    postgres = db.bind.dialect.name == "postgresql"
+    while True:
+        row = db.execute(stored_response_query(scope, key)).first()
+        if row is not None and not _expired(row.created_at):
+            return replay_response(row, fingerprint)
+        try:
+            if postgres:
+                db.execute(claim_lock_timeout(deadline))
+            if row is not None:
+                db.execute(delete(IdempotencyKey).where(*_key_filter(scope, key)))
+            db.execute(insert(IdempotencyKey).values(scope=scope, key=key, request_hash=fingerprint))
+            if postgres:
+                db.execute(RESTORE_LOCK_TIMEOUT)
+            return None
+        except IntegrityError:
+            # The first request committed while we waited: look its response up
+            db.rollback()
+        except OperationalError:
+            # Lock timeout: end the transaction and try again shortly
+            db.rollback()
+            if time.monotonic() >= deadline:
+                raise _still_running()
+            time.sleep(IDEMPOTENCY_POLL_INTERVAL)
+
+
+async def begin_idempotent_async(db: AsyncSession, scope: str, key: str, fingerprint: str) -> Optional[Response]:
+    """Async variant of begin_idempotent"""
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    postgres = db.bind.dialect.name == "postgresql"
+    while True:
+        row = (await db.execute(stored_response_query(scope, key))).first()
+        if row is not None and not _expired(row.created_at):
+            return replay_response(row, fingerprint)
+        try:
+            if postgres:
+                await db.execute(claim_lock_timeout(deadline))
+            if row is not None:
+                await db.execute(delete(IdempotencyKey).where(*_key_filter(scope, key)))
+            await db.execute(insert(IdempotencyKey).values(scope=scope, key=key, request_hash=fingerprint))
+            if postgres:
+                await db.execute(RESTORE_LOCK_TIMEOUT)
+            return None
+        except IntegrityError:
+            await db.rollback()
+        except OperationalError:
+            await db.rollback()
+            if time.monotonic() >= deadline:
+                raise _still_running()
+            await asyncio.sleep(IDEMPOTENCY_POLL_INTERVAL)
+
+
+def complete_statement(scope: str, key: str, status_code: int, body: str):
+    """Store the response on the claimed key, inside the request's transaction"""
+    return (
+        update(IdempotencyKey)
+        .where(*_key_filter(scope, key))
+        .values(response_status=status_code, response_body=body)
+    )
+
+
+def complete_idempotent(db: Session, scope: str, key: str, status_code: int, body: str) -> None:
+    db.execute(complete_statement(scope, key, status_code, body))
+
+
+async def complete_idempotent_async(db: AsyncSession, scope: str, key: str, status_code: int, body: str) -> None:
+    await db.execute(complete_statement(scope, key, status_code, body))
+
+
+def purge_idempotency_keys(db: Session) -> int:
+    """Delete keys older than IDEMPOTENCY_KEY_TTL, returning how many were removed"""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=IDEMPOTENCY_KEY_TTL)
+    removed = db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff)).rowcount
+    db.commit()
+    return removed
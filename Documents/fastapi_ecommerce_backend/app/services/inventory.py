@@ -0,0 +1,256 @@
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import case, delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.product import Product
+from app.models.stock_reservation import StockReservation
+from app.services.catalog import bump_catalog_version, bump_catalog_version_async
+
+# Seconds stock stays held for a cart after its last change to that line;
+# 0 disables reservations and stock is only taken at checkout
+STOCK_RESERVATION_TTL = int(os.getenv("STOCK_RESERVATION_TTL", "0"))
+
+
+def stock_adjust_statement(changes: Dict[int, int]):
+    """
+    One UPDATE taking {product_id: quantity} from products.stock for every
+    product at once (negative quantities put stock back). Each row is only
+    changed if it still has enough stock, which the database checks again
+    under the row lock, so concurrent checkouts can't oversell and nobody
+    holds a lock between a read and the write. RETURNING lists the products
+    that were changed with their new stock.
+    """
+    quantity = case(changes, value=Product.id)
+    return (
+        update(Product)
+        .where(Product.id.in_(list(changes)), Product.stock >= quantity)
+        .values(stock=Product.stock - quantity)
+        .returning(Product.id, Product.stock)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _stock_changes(changes: Dict[int, int]) -> Dict[int, int]:
+    return {product_id: quantity for product_id, quantity in changes.items() if quantity}
+
+
+def _check_stock_taken(changes: Dict[int, int], changed: Iterable[int], names: Optional[Dict[int, str]]) -> None:
+    # Stock given back to a product deleted meanwhile matches no row, which is fine
+    changed = set(changed)
+    short = [product_id for product_id, quantity in changes.items() if quantity > 0 and product_id not in changed]
+    if short:
+        names = names or {}
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Insufficient stock for " + ", ".join(
+                f"'{names[product_id]}'" if product_id in names else f"product {product_id}" for product_id in short
+            )
+        )
+
+
+def availability_changed(changes: Dict[int, int], adjusted) -> bool:
+    """True when an adjustment sold a product out or brought one back into stock"""
+    return any(
+        (changes[product_id] > 0 and stock == 0) or (changes[product_id] < 0 and stock == -changes[product_id])
+        for product_id, stock in adjusted
+    )
+
+
+def take_stock(db: Session, changes: Dict[int, int], names: Dict[int, str] = None) -> None:
+    """
+    Apply stock_adjust_statement in the caller's transaction, raising 400 if
+    any product was short. The caller must not commit after that error: the
+    other products may already have been decremented.
+
+    Catalog caches, ETags and the search snapshot only follow the catalog
+    version, so it is bumped when a product sells out or comes back; other
+    stock counts they show may lag for up to the cache TTL.
+    """
+    changes = _stock_changes(changes)
+    if not changes:
+        return
+    adjusted = db.execute(stock_adjust_statement(changes)).all()
+    _check_stock_taken(changes, (product_id for product_id, _ in adjusted), names)
+    if availability_changed(changes, adjusted):
+        bump_catalog_version(db)
+
+
+async def take_stock_async(db: AsyncSession, changes: Dict[int, int], names: Dict[int, str] = None) -> None:
+    """Async variant of take_stock"""
+    changes = _stock_changes(changes)
+    if not changes:
+        return
+    adjusted = (await db.execute(stock_adjust_statement(changes))).all()
+    _check_stock_taken(changes, (product_id for product_id, _ in adjusted), names)
+    if availability_changed(changes, adjusted):
+        await bump_catalog_version_async(db)
+
+
+def held_stock_query(session_id: str, product_ids: Iterable[int]):
+    return select(StockReservation.product_id, StockReservation.quantity).where(
+        StockReservation.session_id == session_id,
+        StockReservation.product_id.in_(list(product_ids))
+    )
+
+
+def reservation_deltas(quantities: Dict[int, int], held: Dict[int, int]) -> Dict[int, int]:
+    """Stock to take (or, negative, give back) so the holds match the new cart quantities"""
+    return {
+        product_id: quantity - held.get(product_id, 0)
+        for product_id, quantity in quantities.items()
+        if quantity or held.get(product_id)
+    }
+
+
+def reservation_statements(dialect_name: str, session_id: str, deltas: Dict[int, int]):
+    """
+    (statement, params) pairs adding deltas to the session's reservations
+    and renewing their expiry. Holds are incremented rather than overwritten,
+    so two concurrent requests for one cart still add up to the stock taken;
+    holds that dropped to zero are deleted.
+    """
+    dialect = postgresql if dialect_name == "postgresql" else sqlite
+    insert = dialect.insert(StockReservation)
+    upsert = insert.on_conflict_do_update(
+        index_elements=[StockReservation.session_id, StockReservation.product_id],
+        set_={
+            "quantity": StockReservation.quantity + insert.excluded.quantity,
+            "expires_at": insert.excluded.expires_at,
+        },
+    )
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=STOCK_RESERVATION_TTL)
+    rows = [
+        {"session_id": session_id, "product_id": product_id, "quantity": delta, "expires_at": expires_at}
+        for product_id, delta in deltas.items()
+    ]
+    statements = [(upsert, rows)]
+    if any(delta < 0 for delta in deltas.values()):
+        emptied = delete(StockReservation).where(
+            StockReservation.session_id == session_id, StockReservation.quantity <= 0
+        ).execution_options(synchronize_session=False)
+        statements.append((emptied, None))
+    return statements
+
+
+def hold_stock(db: Session, session_id: str, quantities: Dict[int, int], names: Dict[int, str] = None) -> None:
+    """
+    Reserve stock for new cart quantities {product_id: quantity} (0 means the
+    line was removed), taking or returning only the difference to what the
+    session already holds. Raises 400 if stock ran out. A no-op unless
+    STOCK_RESERVATION_TTL is set.
+    """
+    if not STOCK_RESERVATION_TTL or not quantities:
+        return
+    held = dict(db.execute(held_stock_query(session_id, quantities)).all())
+    deltas = reservation_deltas(quantities, held)
+    take_stock(db, deltas, names)
+    if deltas:
+        for statement, params in reservation_statements(db.bind.dialect.name, session_id, deltas):
+            db.execute(statement, params)
+
+
+async def hold_stock_async(db: AsyncSession, session_id: str, quantities: Dict[int, int],
+                           names: Dict[int, str] = None) -> None:
+    """Async variant of hold_stock"""
+    if not STOCK_RESERVATION_TTL or not quantities:
+        return
+    held = dict((await db.execute(held_stock_query(session_id, quantities))).all())
+    deltas = reservation_deltas(quantities, held)
+    await take_stock_async(db, deltas, names)
+    if deltas:
+        for statement, params in reservation_statements(db.bind.dialect.name, session_id, deltas):
+            await db.execute(statement, params)
+
+
+def claim_reservations_statement(session_id: str):
+    """Delete the session's holds, returning them; a hold is claimed by exactly one checkout or sweep"""
+    return (
+        delete(StockReservation)
+        .where(StockReservation.session_id == session_id)
+        .returning(StockReservation.product_id, StockReservation.quantity)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def checkout_stock_changes(lines, held: Dict[int, int]) -> Dict[int, int]:
+    """Stock still to take for order lines once the session's holds are used up"""
+    changes = defaultdict(int)
+    for line in lines:
+        changes[line["product_id"]] += line["quantity"]
+    for product_id, quantity in held.items():
+        changes[product_id] -= quantity
+    return changes
+
+
+def commit_stock(db: Session, session_id: str, lines) -> None:
+    """
+    Take the stock for order lines in one conditional UPDATE within the
+    checkout transaction, converting the session's holds first (surplus
+    holds go back to stock). Raises 400 if any line is short.
+    """
+    held = dict(db.execute(claim_reservations_statement(session_id)).all()) if STOCK_RESERVATION_TTL else {}
+    names = {line["product_id"]: line["product_name"] for line in lines}
+    take_stock(db, checkout_stock_changes(lines, held), names)
+
+
+async def commit_stock_async(db: AsyncSession, session_id: str, lines) -> None:
+    """Async variant of commit_stock"""
+    held = dict((await db.execute(claim_reservations_statement(session_id))).all()) if STOCK_RESERVATION_TTL else {}
+    names = {line["product_id"]: line["product_name"] for line in lines}
+    await take_stock_async(db, checkout_stock_changes(lines, held), names)
+
+
+def release_stock(db: Session, session_id: str) -> None:
+    """Return all of the session's holds to stock (the cart was cleared)"""
+    if not STOCK_RESERVATION_TTL:
+        return
+    held = db.execute(claim_reservations_statement(session_id)).all()
+    take_stock(db, {product_id: -quantity for product_id, quantity in held})
+
+
+async def release_stock_async(db: AsyncSession, session_id: str) -> None:
+    """Async variant of release_stock"""
+    if not STOCK_RESERVATION_TTL:
+        return
+    held = (await db.execute(claim_reservations_statement(session_id))).all()
+    await take_stock_async(db, {product_id: -quantity for product_id, quantity in held})
+
+
+def sweep_reservations(db: Session, batch_size: int = 1000, max_batches: int = None) -> dict:
+    """
+    Return expired holds to stock, one committed batch at a time. Holds being
+    claimed by a checkout right now are skipped (PostgreSQL) rather than
+    waited for. Returns counts of what was released.
+    """
+    report = {"reservations": 0, "units": 0, "batches": 0}
+    while max_batches is None or report["batches"] < max_batches:
+        expired = (
+            select(StockReservation.id)
+            .where(StockReservation.expires_at < datetime.now(timezone.utc))
+            .order_by(StockReservation.expires_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        released = db.execute(
+            delete(StockReservation)
+            .where(StockReservation.id.in_(expired))
+            .returning(StockReservation.product_id, StockReservation.quantity)
+            .execution_options(synchronize_session=False)
+        ).all()
+        if not released:
+            db.rollback()
+            break
+        restock = defaultdict(int)
+        for product_id, quantity in released:
+            restock[product_id] -= quantity
+        take_stock(db, restock)
+        db.commit()
+        report["reservations"] += len(released)
+        report["units"] += sum(quantity for _, quantity in released)
+        report["batches"] += 1
+    return report
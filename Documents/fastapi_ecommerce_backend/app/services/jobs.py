@@ -0,0 +1,114 @@
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, Tuple
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+# Retries wait JOB_RETRY_BASE_SECONDS * 2 ** (attempt - 1), capped at JOB_RETRY_MAX_SECONDS
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "3600"))
+
+# kind -> handler(db, **payload); filled in by app.services.tasks
+job_handlers: Dict[str, Callable] = {}
+
+
+def job_handler(kind: str):
+    """Register a function as the handler for jobs of this kind"""
+    def register(func: Callable) -> Callable:
+        job_handlers[kind] = func
+        return func
+    return register
+
+
+def enqueue_statement(jobs: Iterable[Tuple[str, dict]]):
+    """
+    Statement and parameters inserting (kind, payload) jobs. Executed on the
+    caller's session, so the jobs commit or roll back with its business write.
+    """
+    return insert(Job), [
+        {"kind": kind, "payload": payload, "max_attempts": JOB_MAX_ATTEMPTS}
+        for kind, payload in jobs
+    ]
+
+
+def enqueue(db: Session, *jobs: Tuple[str, dict]) -> None:
+    """Queue jobs inside the caller's transaction; nothing runs until it commits"""
+    if jobs:
+        db.execute(*enqueue_statement(jobs))
+
+
+async def enqueue_async(db: AsyncSession, *jobs: Tuple[str, dict]) -> None:
+    """Async variant of enqueue"""
+    if jobs:
+        await db.execute(*enqueue_statement(jobs))
+
+
+def next_job_query():
+    """
+    The oldest due job, row-locked. SKIP LOCKED lets any number of workers
+    poll concurrently without blocking on, or double-running, each other's
+    jobs (PostgreSQL; SQLite ignores the lock clause and serializes writers).
+    """
+    return (
+        select(Job)
+        .where(Job.status == "queued", Job.run_at <= func.now())
+        .order_by(Job.run_at, Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def retry_delay(attempts: int) -> float:
+    return min(JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), JOB_RETRY_MAX_SECONDS)
+
+
+def run_next_job(db: Session) -> bool:
+    """
+    Run the next due job, returning False when the queue has none.
+
+    The row lock is held while the handler runs and the handler's writes
+    commit together with the job's completion, so a worker that dies
+    mid-job just releases it to the next poll. Delivery is at least once:
+    handlers must tolerate running again.
+    """
+    job = db.scalars(next_job_query()).first()
+    if job is None:
+        db.rollback()
+        return False
+
+    job.attempts += 1
+    handler = job_handlers.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job kind {job.kind!r}")
+        with db.begin_nested():
+            handler(db, **job.payload)
+    except Exception as exc:
+        job.last_error = f"{type(exc).__name__}: {exc}"
+        if job.attempts >= job.max_attempts:
+            job.status = "failed"
+            job.finished_at = func.now()
+            logger.error("Job %s (%s) failed permanently: %s", job.id, job.kind, job.last_error)
+        else:
+            delay = retry_delay(job.attempts)
+            job.run_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+            logger.warning("Job %s (%s) failed, retrying in %.0fs: %s", job.id, job.kind, delay, job.last_error)
+    else:
+        job.status = "done"
+        job.finished_at = func.now()
+    db.commit()
+    return True
+
+
+def run_pending_jobs(db: Session, limit: int = None) -> int:
+    """Run due jobs until the queue is empty (or limit jobs ran); returns how many ran"""
+    ran = 0
+    while (limit is None or ran < limit) and run_next_job(db):
+        ran += 1
+    return ran
@@ -0,0 +1,51 @@
+import logging
+import os
+import smtplib
+from email.message import EmailMessage
+from typing import List
+from sqlalchemy.orm import Session
+from app.models.order import Order
+from app.services.orders import order_items_query
+
+logger = logging.getLogger(__name__)
+
+# SMTP relay for customer email; unset EMAIL_HOST logs messages instead of sending them
+EMAIL_HOST = os.getenv("EMAIL_HOST")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", "587"))
+EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
+EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
+EMAIL_FROM = os.getenv("EMAIL_FROM") or EMAIL_HOST_USER or "no-reply@localhost"
+EMAIL_TIMEOUT = 10
+
+
+def order_confirmation_message(order, items: List) -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = f"Order #{order.id} received"
+    message["From"] = EMAIL_FROM
+    message["To"] = order.guest_email
+    lines = [f"Hello {order.guest_name},", "", f"We received your order #{order.id}:", ""]
+    lines += [f"- {item.product_name} x {item.quantity}: {item.product_price * item.quantity}" for item in items]
+    lines += ["", f"Total: {order.total_price}", "", "We will contact you on " + order.guest_phone + "."]
+    message.set_content("\n".join(lines))
+    return message
+
+
+def send_email(message: EmailMessage) -> None:
+    if not EMAIL_HOST:
+        logger.info("EMAIL_HOST is not set; not sending %r to %s", message["Subject"], message["To"])
+        return
+    with smtplib.SMTP(EMAIL_HOST, EMAIL_PORT, timeout=EMAIL_TIMEOUT) as smtp:
+        if EMAIL_PORT != 25:
+            smtp.starttls()
+        if EMAIL_HOST_USER:
+            smtp.login(EMAIL_HOST_USER, EMAIL_HOST_PASSWORD or "")
+        smtp.send_message(message)
+
+
+def send_order_confirmation(db: Session, order_id: int) -> None:
+    """Email the guest a summary of their order (skipped if it was deleted meanwhile)"""
+    order = db.get(Order, order_id)
+    if order is None:
+        return
+    items = db.execute(order_items_query(order_id)).all()
+    send_email(order_confirmation_message(order, items))
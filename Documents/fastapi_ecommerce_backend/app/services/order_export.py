@@ -0,0 +1,145 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Optional
+from sqlalchemy import select
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+from app.utils.pagination import cursor_timestamp
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+# Rows fetched per round trip from the server-side cursor
+EXPORT_FETCH_SIZE = 1000
+# Encoded rows buffered before a chunk is sent to the client
+EXPORT_CHUNK_ROWS = 500
+
+ORDER_FIELDS = (
+    "order_id", "created_at", "status", "guest_name", "guest_email", "guest_phone",
+    "total_items", "total_price",
+)
+ITEM_FIELDS = ("item_id", "product_id", "product_name", "product_price", "quantity")
+# Rows are handled as plain tuples in this column order; attribute access per field is slow
+EXPORT_FIELDS = ORDER_FIELDS + ITEM_FIELDS
+CREATED_AT = EXPORT_FIELDS.index("created_at")
+ITEM_ID = EXPORT_FIELDS.index("item_id")
+
+
+def order_export_query(status: str = None, created_from: datetime = None, created_to: datetime = None):
+    """
+    Orders joined with their items, oldest first, one row per item (or per
+    order without items). Walks ix_orders_created_at_id for date ranges.
+    """
+    query = (
+        select(
+            Order.id.label("order_id"),
+            Order.created_at,
+            Order.status,
+            Order.guest_name,
+            Order.guest_email,
+            Order.guest_phone,
+            Order.total_items,
+            Order.total_price,
+            OrderItem.id.label("item_id"),
+            OrderItem.product_id,
+            Product.name.label("product_name"),
+            Product.price.label("product_price"),
+            OrderItem.quantity,
+        )
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .outerjoin(Product, Product.id == OrderItem.product_id)
+    )
+    if status:
+        query = query.where(Order.status == status)
+    # Bound like cursors, in created_at's stored form, so rows on a boundary second fall on the right side
+    if created_from:
+        query = query.where(Order.created_at >= cursor_timestamp(created_from))
+    if created_to:
+        query = query.where(Order.created_at < cursor_timestamp(created_to))
+    return (
+        query.order_by(Order.created_at, Order.id, OrderItem.id)
+        .execution_options(stream_results=True, yield_per=EXPORT_FETCH_SIZE)
+    )
+
+
+class OrderExportEncoder:
+    """
+    Turns joined export rows into byte chunks. CSV is one line per order item;
+    NDJSON is one object per order with an items list, so consecutive rows of
+    the same order are folded together.
+    """
+
+    def __init__(self, fmt: str):
+        self.fmt = fmt
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer) if fmt == "csv" else None
+        self._rows = 0
+        self._order: Optional[dict] = None
+
+    def header(self) -> bytes:
+        if self.fmt == "csv":
+            self._writer.writerow(EXPORT_FIELDS)
+        return self._drain()
+
+    def feed(self, row) -> Optional[bytes]:
+        """Encode one row; returns a chunk once enough rows are buffered"""
+        values = list(row)
+        if values[CREATED_AT] is not None:
+            values[CREATED_AT] = values[CREATED_AT].isoformat()
+
+        if self.fmt == "csv":
+            self._writer.writerow(values)
+        else:
+            if self._order is not None and self._order["order_id"] != values[0]:
+                self._write_order()
+            if self._order is None:
+                self._order = dict(zip(ORDER_FIELDS, values))
+                self._order["items"] = []
+            if values[ITEM_ID] is not None:
+                self._order["items"].append(dict(zip(ITEM_FIELDS, values[ITEM_ID:])))
+
+        self._rows += 1
+        return self._drain() if self._rows >= EXPORT_CHUNK_ROWS else None
+
+    def finish(self) -> bytes:
+        if self._order is not None:
+            self._write_order()
+        return self._drain()
+
+    def _write_order(self) -> None:
+        self._buffer.write(json.dumps(self._order, ensure_ascii=False))
+        self._buffer.write("\n")
+        self._order = None
+
+    def _drain(self) -> bytes:
+        chunk = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._rows = 0
+        return chunk
+
+
+def export_chunks(rows: Iterable, fmt: str) -> Iterator[bytes]:
+    """Stream an export from an iterable of joined rows"""
+    encoder = OrderExportEncoder(fmt)
+    yield encoder.header()
+    for row in rows:
+        chunk = encoder.feed(row)
+        if chunk:
+            yield chunk
+    yield encoder.finish()
+
+
+async def export_chunks_async(rows: AsyncIterable, fmt: str) -> AsyncIterator[bytes]:
+    """Async variant of export_chunks for AsyncSession.stream results"""
+    encoder = OrderExportEncoder(fmt)
+    yield encoder.header()
+    async for row in rows:
+        chunk = encoder.feed(row)
+        if chunk:
+            yield chunk
+    yield encoder.finish()
+
+
+def export_filename(fmt: str) -> str:
+    return f"orders-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{fmt}"
@@ -0,0 +1,88 @@
+from typing import List, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from app.models.order import OrderItem
+from app.models.product import Product
+
+# Idempotency-Key namespace for POST /orders/
+CREATE_ORDER_SCOPE = "orders.create"
+
+
+def checkout_lines(rows) -> Tuple[List[dict], int, int]:
+    """Turn joined cart rows into order lines plus totals, rejecting empty carts"""
+    lines = []
+    total_items = 0
+    total_price = 0
+
+    for row in rows:
+        if row.item_id is None:
+            continue
+        if row.product_name is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Product {row.product_id} not found"
+            )
+
+        item_total = row.product_price * row.quantity
+        total_price += item_total
+        total_items += row.quantity
+        lines.append({
+            "product_id": row.product_id,
+            "quantity": row.quantity,
+            "product_name": row.product_name,
+            "product_price": row.product_price,
+            "total_price": item_total
+        })
+
+    if not lines:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot create order from empty cart"
+        )
+
+    return lines, total_items, total_price
+
+
+def order_items_query(order_id: int):
+    """Select an order's items joined with their products"""
+    return (
+        select(
+            OrderItem.id,
+            OrderItem.order_id,
+            OrderItem.product_id,
+            OrderItem.quantity,
+            Product.name.label("product_name"),
+            Product.price.label("product_price"),
+        )
+        .join(Product, Product.id == OrderItem.product_id)
+        .where(OrderItem.order_id == order_id)
+        .order_by(OrderItem.id)
+    )
+
+
+def order_item_payload(row) -> dict:
+    """Build an order item response from a joined order item row"""
+    return {
+        "id": row.id,
+        "order_id": row.order_id,
+        "product_id": row.product_id,
+        "quantity": row.quantity,
+        "product_name": row.product_name,
+        "product_price": row.product_price,
+        "total_price": row.product_price * row.quantity
+    }
+
+
+def order_payload(order, items: List[dict]) -> dict:
+    """Build the order response from an order row and its item payloads"""
+    return {
+        "id": order.id,
+        "guest_name": order.guest_name,
+        "guest_email": order.guest_email,
+        "guest_phone": order.guest_phone,
+        "status": order.status,
+        "total_price": order.total_price,
+        "total_items": order.total_items,
+        "created_at": order.created_at,
+        "items": items
+    }
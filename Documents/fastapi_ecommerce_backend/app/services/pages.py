@@ -0,0 +1,47 @@
+import os
+from typing import Callable, NamedTuple
+from fastapi import Request, Response
+from fastapi.responses import HTMLResponse
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache, MISSING
+from app.services.catalog import catalog_cache, sync_catalog_version
+from app.utils.http_cache import not_modified
+
+# Rendered storefront pages kept per worker; entries also go whenever the catalog version changes
+page_cache = TTLCache(
+    maxsize=int(os.getenv("PAGE_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("PAGE_CACHE_TTL", "60")),
+)
+catalog_cache.dependents.append(page_cache)
+
+# Response headers stored with a page so hits answer conditional requests the same way
+CACHED_HEADERS = ("ETag", "Cache-Control")
+
+
+class CachedPage(NamedTuple):
+    body: bytes
+    headers: dict
+
+
+def page_key(request: Request) -> tuple:
+    """Path plus query parameters in a stable order"""
+    return request.url.path, tuple(sorted(request.query_params.multi_items()))
+
+
+def cached_page(db: Session, request: Request, render: Callable[[], Response]) -> Response:
+    """
+    Serve a storefront page from the page cache, calling render() on a miss.
+    Pages carry no per-visitor content, so one copy serves every anonymous
+    request for the same URL and catalog version. Only 200s are stored.
+    """
+    sync_catalog_version(db)
+    # Pin the version so a concurrent invalidation can't file this render under a newer one
+    key = (catalog_cache.version,) + page_key(request)
+    page = page_cache.get(key)
+    if page is MISSING:
+        response = render()
+        if response.status_code != 200:
+            return response
+        page = CachedPage(response.body, {name: response.headers[name] for name in CACHED_HEADERS})
+        page_cache.set(key, page)
+    return not_modified(request, page.headers) or HTMLResponse(page.body, headers=page.headers)
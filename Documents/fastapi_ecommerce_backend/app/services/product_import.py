@@ -0,0 +1,173 @@
+import csv
+import io
+import json
+from collections import defaultdict
+from typing import IO, Dict, Iterable, Iterator, List, Tuple
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from app.database.session import SessionLocal
+from app.models.product import Product
+from app.schemas.product import ProductCreate
+from app.services.catalog import bump_catalog_version, catalog_cache
+from app.services.stats import apply_stats_delta
+
+IMPORT_FORMATS = ("csv", "ndjson")
+DEFAULT_BATCH_SIZE = 1000
+# Per-row errors kept for the report; further failures are only counted
+MAX_REPORTED_ERRORS = 1000
+
+
+def detect_format(filename: str = None, content_type: str = None) -> str:
+    """Guess the import format from an upload's name or content type, defaulting to CSV"""
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in (content_type or ""):
+        return "ndjson"
+    return "csv"
+
+
+def iter_records(stream: IO[bytes], fmt: str) -> Iterator[Tuple[int, object]]:
+    """
+    Parse an upload line by line, yielding (row number, dict) for each record.
+    A record that cannot be parsed is yielded as (row number, error message).
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for record in reader:
+            # Header is line 1; empty cells mean "not provided"
+            yield reader.line_num, {key: value for key, value in record.items() if key and value != ""}
+        return
+
+    for row, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield row, f"Invalid JSON: {exc}"
+            continue
+        yield row, record if isinstance(record, dict) else "Expected a JSON object"
+
+
+def upsert_statement(db: Session, update_columns: Iterable[str]):
+    """
+    INSERT ... ON CONFLICT (name) for the session's dialect, executed with a
+    list of rows. Existing rows only change update_columns.
+    """
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(Product.__table__)
+    update_columns = [column for column in update_columns if column != "name"]
+    if not update_columns:
+        return statement.on_conflict_do_nothing(index_elements=[Product.name])
+    # Column onupdate defaults don't apply to ON CONFLICT, so bump the ETag version here
+    set_ = {column: statement.excluded[column] for column in update_columns}
+    set_.update(version=Product.__table__.c.version + 1, updated_at=func.now())
+    return statement.on_conflict_do_update(index_elements=[Product.name], set_=set_)
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def fail(self, row: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": error})
+
+    def as_dict(self) -> dict:
+        return {
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+    )
+
+
+def _write_batch(db: Session, batch: Dict[str, Tuple[int, ProductCreate]], report: ImportReport) -> None:
+    """Upsert one batch in its own transaction, isolating failing rows if the batch is rejected"""
+    # One statement per set of provided fields, so a row never resets a column it left out
+    groups: Dict[frozenset, List[Tuple[int, ProductCreate]]] = defaultdict(list)
+    for row, product in batch.values():
+        groups[frozenset(product.model_fields_set)].append((row, product))
+
+    existing = set(db.scalars(select(Product.name).where(Product.name.in_(list(batch)))))
+    written = []
+    for fields, products in groups.items():
+        try:
+            # Core executemany: batched into multi-row INSERTs without per-row ORM overhead
+            with db.begin_nested():
+                db.connection().execute(upsert_statement(db, fields), [product.model_dump() for _, product in products])
+            written.extend(product.name for _, product in products)
+        except DBAPIError:
+            # Retry row by row so only the offending rows are reported
+            for row, product in products:
+                try:
+                    with db.begin_nested():
+                        db.connection().execute(upsert_statement(db, fields), [product.model_dump()])
+                    written.append(product.name)
+                except DBAPIError as exc:
+                    report.fail(row, str(exc.orig))
+
+    created = sum(1 for name in written if name not in existing)
+    report.created += created
+    report.updated += len(written) - created
+    if written:
+        apply_stats_delta(db, total_products=created)
+        bump_catalog_version(db)
+    db.commit()
+
+
+def import_products(db: Session, records: Iterable[Tuple[int, object]],
+                    batch_size: int = DEFAULT_BATCH_SIZE) -> ImportReport:
+    """
+    Validate and upsert parsed records keyed on the unique product name,
+    committing every batch_size rows so memory stays flat for any file size.
+    Existing products only change the fields a row provides; later rows win
+    when a name repeats.
+    """
+    report = ImportReport()
+    batch: Dict[str, Tuple[int, ProductCreate]] = {}
+    try:
+        for row, record in records:
+            if isinstance(record, str):
+                report.fail(row, record)
+                continue
+            try:
+                product = ProductCreate.model_validate(record)
+            except ValidationError as exc:
+                report.fail(row, _validation_message(exc))
+                continue
+
+            batch.pop(product.name, None)
+            batch[product.name] = (row, product)
+            if len(batch) >= batch_size:
+                _write_batch(db, batch, report)
+                batch = {}
+        if batch:
+            _write_batch(db, batch, report)
+    finally:
+        # Committed batches are visible even if a later one failed
+        catalog_cache.invalidate()
+    return report
+
+
+def import_products_file(stream: IO[bytes], fmt: str, batch_size: int = DEFAULT_BATCH_SIZE) -> ImportReport:
+    """Import an upload or file with a session of its own (CLI and async routers)"""
+    db = SessionLocal()
+    try:
+        return import_products(db, iter_records(stream, fmt), batch_size)
+    finally:
+        db.close()
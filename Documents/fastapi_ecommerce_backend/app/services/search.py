@@ -0,0 +1,174 @@
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+from sqlalchemy import select, func, literal_column, or_
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.product import Product
+from app.services.catalog import (
+    catalog_cache, sync_catalog_version, catalog_version_query, product_columns, row_product_dict,
+)
+
+# Weighted document vector over name (A), category (B) and description (C).
+# Must match the expression of the ix_products_search GIN index exactly.
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(products.name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(products.category, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(products.description, '')), 'C')"
+)
+
+# Field weights used by the in-process index, mirroring the A/B/C weights above
+FIELD_WEIGHTS = {"name": 3.0, "category": 2.0, "description": 1.0}
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+def postgres_search_query(q: str, category: str = None, active_only: bool = True):
+    """Full-text match on the weighted vector, or trigram match on the name for typos"""
+    vector = literal_column(f"({SEARCH_VECTOR_SQL})")
+    tsquery = func.websearch_to_tsquery("simple", q)
+    rank = (func.ts_rank_cd(vector, tsquery) + func.similarity(Product.name, q)).label("rank")
+
+    query = select(*product_columns(), rank).where(or_(vector.op("@@")(tsquery), Product.name.op("%")(q)))
+    if active_only:
+        query = query.where(Product.is_active == True)
+    if category:
+        query = query.where(Product.category == category)
+    return query.order_by(rank.desc(), Product.id)
+
+
+class InvertedIndex:
+    """
+    In-process inverted index used when the database has no full-text search (SQLite).
+    Ranks with field-weighted TF-IDF and requires every query term to match.
+    """
+
+    def __init__(self):
+        self.version = None
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._docs: Dict[int, dict] = {}
+        self._lock = threading.RLock()
+
+    def rebuild(self, products: List[dict], version: int) -> None:
+        with self._lock:
+            self._postings = defaultdict(dict)
+            self._docs = {}
+            for product in products:
+                self._add(product)
+            self.version = version
+
+    def _add(self, product: dict) -> None:
+        self._docs[product["id"]] = product
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(product.get(field)):
+                postings = self._postings[token]
+                postings[product["id"]] = postings.get(product["id"], 0.0) + weight
+
+    def _remove(self, product_id: int) -> None:
+        product = self._docs.pop(product_id, None)
+        if product is None:
+            return
+        for field in FIELD_WEIGHTS:
+            for token in tokenize(product.get(field)):
+                postings = self._postings.get(token)
+                if postings is not None:
+                    postings.pop(product_id, None)
+                    if not postings:
+                        del self._postings[token]
+
+    def upsert(self, product: dict, version: int) -> None:
+        """Apply one product write; a gap in versions means another worker wrote too, so force a rebuild"""
+        with self._lock:
+            self._remove(product["id"])
+            self._add(product)
+            self.version = version if self.version == version - 1 else None
+
+    def remove(self, product_id: int, version: int) -> None:
+        with self._lock:
+            self._remove(product_id)
+            self.version = version if self.version == version - 1 else None
+
+    def search(self, q: str, category: str = None, active_only: bool = True) -> List[dict]:
+        terms = set(tokenize(q))
+        if not terms:
+            return []
+
+        with self._lock:
+            total = len(self._docs) or 1
+            scores: Dict[int, float] = {}
+            for i, term in enumerate(terms):
+                postings = self._postings.get(term, {})
+                idf = math.log(1 + total / (1 + len(postings)))
+                matched = {pid: tf * idf for pid, tf in postings.items()}
+                if i == 0:
+                    scores = matched
+                else:
+                    scores = {pid: score + matched[pid] for pid, score in scores.items() if pid in matched}
+                if not scores:
+                    return []
+
+            results = []
+            for product_id, score in sorted(scores.items(), key=lambda item: (-item[1], item[0])):
+                product = self._docs[product_id]
+                if active_only and not product["is_active"]:
+                    continue
+                if category and product["category"] != category:
+                    continue
+                results.append(product)
+            return results
+
+
+search_index = InvertedIndex()
+
+
+def is_postgres(db) -> bool:
+    return db.bind.dialect.name == "postgresql"
+
+
+def search_products(db: Session, q: str, category: str = None, active_only: bool = True,
+                    skip: int = 0, limit: int = 20) -> List[dict]:
+    """Relevance-ranked product search over name, description and category"""
+    if is_postgres(db):
+        rows = db.execute(postgres_search_query(q, category, active_only).offset(skip).limit(limit))
+        return [row_product_dict(row) for row in rows]
+
+    # Rebuild the in-process index whenever the catalog changed elsewhere
+    sync_catalog_version(db)
+    version = catalog_cache.version
+    if search_index.version != version:
+        search_index.rebuild([row_product_dict(row) for row in db.execute(select(*product_columns()))], version)
+    return search_index.search(q, category, active_only)[skip:skip + limit]
+
+
+async def search_products_async(db: AsyncSession, q: str, category: str = None, active_only: bool = True,
+                                skip: int = 0, limit: int = 20) -> List[dict]:
+    """Async variant of search_products"""
+    if is_postgres(db):
+        rows = await db.execute(postgres_search_query(q, category, active_only).offset(skip).limit(limit))
+        return [row_product_dict(row) for row in rows]
+
+    if catalog_cache.version_stale():
+        catalog_cache.observe_version(await db.scalar(catalog_version_query()) or 0)
+    version = catalog_cache.version
+    if search_index.version != version:
+        rows = await db.execute(select(*product_columns()))
+        search_index.rebuild([row_product_dict(row) for row in rows], version)
+    return search_index.search(q, category, active_only)[skip:skip + limit]
+
+
+def index_product(db, product: dict, version: int) -> None:
+    """Keep the in-process index in step with a committed product write"""
+    if not is_postgres(db):
+        search_index.upsert(product, version)
+
+
+def unindex_product(db, product_id: int, version: int) -> None:
+    """Drop a committed product delete from the in-process index"""
+    if not is_postgres(db):
+        search_index.remove(product_id, version)
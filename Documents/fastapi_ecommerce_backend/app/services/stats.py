@@ -0,0 +1,155 @@
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.session import engine
+from app.models.job import Job
+from app.models.order import Order
+from app.models.product import Product
+from app.models.store_stats import StoreStats
+
+STORE_STATS_ID = 1
+
+# Job kind carrying an order write's counter changes to the worker (handled in app.services.tasks)
+STATS_DELTA = "stats.delta"
+
+# Statuses an order can move through
+ORDER_STATUSES = ("pending", "confirmed", "shipping", "completed", "cancelled")
+
+
+def order_deltas(status: str, total_price: int, sign: int = 1) -> dict:
+    """Counter changes caused by an order with this status appearing (sign=1) or disappearing (sign=-1)"""
+    return {
+        "total_orders": sign,
+        "pending_orders": sign if status == "pending" else 0,
+        "total_revenue": sign * total_price if status == "completed" else 0,
+    }
+
+
+def status_change_deltas(old_status: str, new_status: str, total_price: int) -> dict:
+    """Counter changes caused by moving an order from one status to another"""
+    old = order_deltas(old_status, total_price, -1)
+    new = order_deltas(new_status, total_price)
+    return {field: old[field] + new[field] for field in ("pending_orders", "total_revenue")}
+
+
+def stats_delta_statement(**deltas):
+    """UPDATE adding the given deltas to the stats row"""
+    return (
+        update(StoreStats)
+        .where(StoreStats.id == STORE_STATS_ID)
+        .values({
+            field: getattr(StoreStats, field) + delta
+            for field, delta in deltas.items()
+            if delta
+        })
+    )
+
+
+def stats_aggregate_query():
+    """Recompute every counter from the products and orders tables"""
+    return select(
+        select(func.count(Product.id)).scalar_subquery().label("total_products"),
+        select(func.count(Order.id)).scalar_subquery().label("total_orders"),
+        select(func.count(Order.id)).where(Order.status == "pending").scalar_subquery().label("pending_orders"),
+        select(func.coalesce(func.sum(Order.total_price), 0))
+        .where(Order.status == "completed").scalar_subquery().label("total_revenue"),
+    )
+
+
+def stats_upsert_statement(dialect_name: str, counters: dict, deltas: dict = None):
+    """
+    INSERT of the stats row with the given counters that tolerates a concurrent
+    first write: if another transaction created the row meanwhile, the deltas
+    are added to it instead, or without deltas it is overwritten with counters.
+    """
+    dialect = postgresql if dialect_name == "postgresql" else sqlite
+    statement = dialect.insert(StoreStats).values(id=STORE_STATS_ID, **counters)
+    if deltas is None:
+        set_ = {field: statement.excluded[field] for field in counters}
+    else:
+        set_ = {field: getattr(StoreStats, field) + delta for field, delta in deltas.items() if delta}
+    return statement.on_conflict_do_update(index_elements=[StoreStats.id], set_=set_)
+
+
+def supersede_stats_jobs_statement():
+    """
+    Mark every queued stats.delta job done. A recount already includes the
+    orders behind them, since each job commits together with its order write.
+    """
+    return (
+        update(Job)
+        .where(Job.kind == STATS_DELTA, Job.status == "queued")
+        .values(status="done", finished_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def stats_recount_statements(dialect_name: str):
+    """
+    Statements superseding the queued deltas and recounting, the last one
+    returning the counters. PostgreSQL runs both in one statement so they see
+    the same snapshot; SQLite holds the write lock from the first one on.
+    """
+    if dialect_name == "postgresql":
+        return [stats_aggregate_query().add_cte(supersede_stats_jobs_statement().returning(Job.id).cte("superseded"))]
+    return [supersede_stats_jobs_statement(), stats_aggregate_query()]
+
+
+def recount_stats(db: Session, deltas: dict = None) -> None:
+    """
+    Write the stats row from the source tables inside the caller's transaction.
+    deltas is the caller's own (flushed) change: if a concurrent transaction
+    created the row first, only that is added to it.
+    """
+    *supersede, aggregate = stats_recount_statements(db.bind.dialect.name)
+    for statement in supersede:
+        db.execute(statement)
+    row = db.execute(aggregate).one()
+    db.execute(stats_upsert_statement(db.bind.dialect.name, row._mapping, deltas))
+
+
+async def recount_stats_async(db: AsyncSession, deltas: dict = None) -> None:
+    """Async variant of recount_stats"""
+    *supersede, aggregate = stats_recount_statements(db.bind.dialect.name)
+    for statement in supersede:
+        await db.execute(statement)
+    row = (await db.execute(aggregate)).one()
+    await db.execute(stats_upsert_statement(db.bind.dialect.name, row._mapping, deltas))
+
+
+def apply_stats_delta(db: Session, **deltas) -> None:
+    """Add deltas to the stats row inside the caller's transaction"""
+    if not any(deltas.values()):
+        return
+    if db.execute(stats_delta_statement(**deltas)).rowcount == 0:
+        # No row yet: build it from scratch, which already includes this change once flushed
+        db.flush()
+        recount_stats(db, deltas)
+
+
+async def apply_stats_delta_async(db: AsyncSession, **deltas) -> None:
+    """Async variant of apply_stats_delta"""
+    if not any(deltas.values()):
+        return
+    if (await db.execute(stats_delta_statement(**deltas))).rowcount == 0:
+        await db.flush()
+        await recount_stats_async(db, deltas)
+
+
+def rebuild_stats(db: Session) -> StoreStats:
+    """Recompute the stats row from the source tables inside the caller's transaction"""
+    recount_stats(db)
+    return db.get(StoreStats, STORE_STATS_ID, populate_existing=True)
+
+
+def get_stats(db: Session) -> StoreStats:
+    """Read the precomputed stats row, building it on first use"""
+    stats = db.get(StoreStats, STORE_STATS_ID)
+    if stats is None:
+        if db.get_bind() is not engine:
+            # Read replica: aggregate without persisting; the primary builds the row on its first write
+            return StoreStats(id=STORE_STATS_ID, **db.execute(stats_aggregate_query()).one()._mapping)
+        stats = rebuild_stats(db)
+        db.commit()
+    return stats
@@ -0,0 +1,39 @@
+from typing import List, Tuple
+from sqlalchemy.orm import Session
+from app.services.jobs import job_handler
+from app.services.notifications import send_order_confirmation
+from app.services.stats import STATS_DELTA, order_deltas, recount_stats, stats_delta_statement
+
+# Job kinds run by python -m app.commands.worker; routers queue them with
+# app.services.jobs.enqueue in the same transaction as the write behind them
+ORDER_CONFIRMATION = "orders.confirmation"
+
+
+@job_handler(STATS_DELTA)
+def apply_stats_delta_job(db: Session, **deltas) -> None:
+    # Deltas are additions, so jobs applied in any order give the same counters
+    if db.execute(stats_delta_statement(**deltas)).rowcount == 0:
+        # No row yet: the recount already includes this job's order, committed with it
+        recount_stats(db)
+
+
+@job_handler(ORDER_CONFIRMATION)
+def order_confirmation_job(db: Session, order_id: int) -> None:
+    send_order_confirmation(db, order_id)
+
+
+def stats_delta_jobs(deltas: dict) -> List[Tuple[str, dict]]:
+    """
+    The job applying an order write's counter changes, if it changes any.
+    Every order write queues its delta this way (none is applied inline), so
+    the dashboard lags the worker but never double counts or goes negative.
+    """
+    return [(STATS_DELTA, deltas)] if any(deltas.values()) else []
+
+
+def order_created_jobs(order) -> List[Tuple[str, dict]]:
+    """Follow-up work for a newly inserted order row"""
+    return [
+        *stats_delta_jobs(order_deltas(order.status, order.total_price)),
+        (ORDER_CONFIRMATION, {"order_id": order.id}),
+    ]
@@ -0,0 +1,93 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional
+from fastapi import Request, Response, status
+
+# Seconds browsers and CDNs may reuse a catalog response before revalidating
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+# Further seconds a CDN may serve the stale copy while it revalidates in the background
+HTTP_CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("HTTP_CACHE_STALE_WHILE_REVALIDATE", "300"))
+
+# JSON catalog endpoints: cacheable everywhere for max-age
+CATALOG_CACHE_CONTROL = (
+    f"public, max-age={HTTP_CACHE_MAX_AGE}, stale-while-revalidate={HTTP_CACHE_STALE_WHILE_REVALIDATE}"
+)
+# Storefront HTML: browsers revalidate every time (a cheap 304), shared caches keep it for max-age
+PAGE_CACHE_CONTROL = (
+    f"public, max-age=0, s-maxage={HTTP_CACHE_MAX_AGE}, "
+    f"stale-while-revalidate={HTTP_CACHE_STALE_WHILE_REVALIDATE}"
+)
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from a digest of parts"""
+    return '"' + hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest() + '"'
+
+
+def _field(product, name: str):
+    return product[name] if isinstance(product, dict) else getattr(product, name)
+
+
+def products_etag(products: Iterable, *extra) -> str:
+    """
+    ETag for a representation built from products (dicts or ORM rows). Every
+    update bumps a product's version, so (id, version) pairs identify the body.
+    """
+    return make_etag(tuple((_field(p, "id"), _field(p, "version")) for p in products), *extra)
+
+
+def http_date(value: datetime) -> str:
+    # SQLite hands back naive UTC timestamps
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def cache_headers(etag: str, cache_control: str, last_modified: Optional[datetime] = None) -> dict:
+    """
+    Validator and Cache-Control headers for a response. Only pass last_modified
+    for single resources: a list's newest updated_at doesn't move on deletes.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def _matching_etag(if_none_match: str, etag: str) -> Optional[str]:
+    """The tag in If-None-Match that matches etag, as the client sent it"""
+    if if_none_match.strip() == "*":
+        return etag
+    # If-None-Match uses weak comparison, so the W/ that CompressionMiddleware
+    # (or a proxy) puts on compressed copies still matches
+    for tag in if_none_match.split(","):
+        if tag.strip().removeprefix("W/") == etag:
+            return tag.strip()
+    return None
+
+
+def not_modified(request: Request, headers: dict) -> Optional[Response]:
+    """
+    A bodiless 304 carrying headers when the request's If-None-Match (or,
+    without one, If-Modified-Since) shows the client's copy is current. The
+    304 repeats the tag the client matched, so a gzipped copy's weak ETag is
+    refreshed as itself.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        matched = _matching_etag(if_none_match, headers["ETag"])
+        fresh = matched is not None
+        if fresh:
+            headers = {**headers, "ETag": matched}
+    elif "Last-Modified" in headers and "if-modified-since" in request.headers:
+        try:
+            fresh = parsedate_to_datetime(headers["Last-Modified"]) <= parsedate_to_datetime(
+                request.headers["if-modified-since"]
+            )
+        except (TypeError, ValueError):
+            fresh = False
+    else:
+        fresh = False
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers) if fresh else None
@@ -0,0 +1,90 @@
+import base64
+import json
+from datetime import datetime
+from typing import List
+from fastapi import HTTPException, status
+from sqlalchemy import DateTime, literal, tuple_
+from sqlalchemy.dialects import sqlite
+
+# Response header carrying the cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def invalid_cursor() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid pagination cursor"
+    )
+
+
+def encode_cursor(*values) -> str:
+    """Encode the sort key of the last row of a page into an opaque cursor"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List:
+    """Decode a cursor produced by encode_cursor, rejecting anything malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError(cursor)
+        return values
+    except ValueError:
+        raise invalid_cursor()
+
+
+# SQLite stores server-default timestamps as 'YYYY-MM-DD HH:MM:SS' text
+SECOND_PRECISION = DateTime(timezone=True).with_variant(sqlite.DATETIME(truncate_microseconds=True), "sqlite")
+
+
+def cursor_timestamp(created_at: datetime):
+    """
+    Bind a cursor timestamp in the form its row stored it. SQLite compares
+    these as text, so a whole-second value bound with SQLAlchemy's default
+    '.000000' suffix sorts after every row of that second and the seek
+    returns the same page again.
+    """
+    if created_at.microsecond:
+        return literal(created_at, DateTime(timezone=True))
+    return literal(created_at, SECOND_PRECISION)
+
+
+def order_keyset(query, model, cursor: str = None):
+    """Newest-first seek on (created_at, id) for the orders table"""
+    if cursor:
+        created_at, order_id = decode_cursor(cursor, 2)
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except (TypeError, ValueError):
+            raise invalid_cursor()
+        if not isinstance(order_id, int):
+            raise invalid_cursor()
+        query = query.filter(tuple_(model.created_at, model.id) < tuple_(cursor_timestamp(created_at), order_id))
+    return query.order_by(model.created_at.desc(), model.id.desc())
+
+
+def order_next_cursor(rows, limit: int):
+    """Cursor after the last order of a full page"""
+    if not rows or len(rows) < limit:
+        return None
+    return encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def id_keyset(query, model, cursor: str = None):
+    """Ascending seek on the primary key"""
+    if cursor:
+        (last_id,) = decode_cursor(cursor, 1)
+        if not isinstance(last_id, int):
+            raise invalid_cursor()
+        query = query.filter(model.id > last_id)
+    return query.order_by(model.id)
+
+
+def id_next_cursor(rows, limit: int):
+    """Cursor after the last row of a full page"""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last["id"] if isinstance(last, dict) else last.id)
@@ -0,0 +1,71 @@
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of unsorted samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples_ms: List[float]) -> dict:
+    return {
+        "n": len(samples_ms),
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+        "mean_ms": round(sum(samples_ms) / len(samples_ms), 3) if samples_ms else 0.0,
+    }
+
+
+def environment(dialect: str) -> dict:
+    """Where a result was measured; baselines are only comparable on like hardware"""
+    return {
+        "dialect": dialect,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "measured_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def save_results(path: str, results: dict) -> None:
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_results(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(current: Dict[str, dict], baseline: Dict[str, dict], max_regression: float,
+            metric: str = "p50_ms") -> List[str]:
+    """
+    Print current vs baseline per benchmark and return the names that got slower
+    by more than max_regression percent, or now run more SQL statements.
+    """
+    regressions = []
+    for name, result in current.items():
+        base: Optional[dict] = baseline.get(name)
+        if base is None:
+            print(f"  {name:24} {result[metric]:9.3f}ms  (no baseline)")
+            continue
+
+        change = (result[metric] - base[metric]) / base[metric] * 100 if base[metric] else 0.0
+        more_queries = result.get("queries", 0) > base.get("queries", 0)
+        regressed = change > max_regression or more_queries
+        print(
+            f"  {name:24} {result[metric]:9.3f}ms  baseline {base[metric]:9.3f}ms  {change:+7.1f}%"
+            f"  queries {result.get('queries', '-')}/{base.get('queries', '-')}"
+            f"{'  REGRESSION' if regressed else ''}"
+        )
+        if regressed:
+            regressions.append(name)
+    return regressions
@@ -0,0 +1,153 @@
+"""
+Concurrent load driver for a running server. Virtual users pick weighted
+scenarios (browse, cart, checkout, dashboard) for a fixed duration; the report
+gives p50/p95/p99 per scenario, overall throughput and the error count.
+
+Usage: python -m benchmarks.load --url http://localhost:8000
+           [--concurrency 32] [--duration 30] [--save results.json]
+           [--baseline benchmarks/baselines/load-sqlite.json] [--max-regression 20]
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+import httpx
+from benchmarks.common import compare, environment, load_results, save_results, summarize
+
+# Relative frequency of each scenario, roughly a storefront's read/write mix
+SCENARIOS = {
+    "get_products": 30,
+    "products_page": 10,
+    "get_cart": 20,
+    "add_to_cart": 20,
+    "create_order": 5,
+    "get_dashboard_stats": 5,
+}
+
+ORDER_BODY = {"guest_name": "load", "guest_email": "load@example.com", "guest_phone": "+15550000000"}
+
+
+class Driver:
+    def __init__(self, client: httpx.AsyncClient, rng: random.Random, product_ids: List[int], categories: List[str]):
+        self.client = client
+        self.rng = rng
+        self.product_ids = product_ids
+        self.categories = categories
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.sessions = itertools.count()
+
+    async def timed(self, scenario: str, method: str, url: str, **kwargs) -> None:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            failed = True
+        self.samples[scenario].append((time.perf_counter() - started) * 1000)
+        if failed:
+            self.errors[scenario] += 1
+
+    async def add_item(self, scenario: str, session_id: str) -> None:
+        body = {"product_id": self.rng.choice(self.product_ids), "quantity": 1}
+        await self.timed(scenario, "POST", f"/cart/items?session_id={session_id}", json=body)
+
+    async def run_scenario(self, scenario: str, session_id: str) -> None:
+        if scenario == "get_products":
+            await self.timed(scenario, "GET", f"/products/?limit=20&category={self.rng.choice(self.categories)}")
+        elif scenario == "products_page":
+            await self.timed(scenario, "GET", f"/products?category={self.rng.choice(self.categories)}")
+        elif scenario == "get_cart":
+            await self.timed(scenario, "GET", f"/cart/?session_id={session_id}")
+        elif scenario == "add_to_cart":
+            await self.add_item(scenario, session_id)
+        elif scenario == "create_order":
+            # Checkout needs a non-empty cart of its own
+            checkout_session = f"load-checkout-{next(self.sessions)}-{self.rng.random():.9f}"
+            await self.add_item("add_to_cart", checkout_session)
+            await self.timed(scenario, "POST", f"/orders/?session_id={checkout_session}", json=ORDER_BODY)
+        elif scenario == "get_dashboard_stats":
+            await self.timed(scenario, "GET", "/api/dashboard/stats")
+
+    async def virtual_user(self, deadline: float) -> None:
+        session_id = f"load-{next(self.sessions)}-{self.rng.random():.9f}"
+        names, weights = list(SCENARIOS), list(SCENARIOS.values())
+        while time.perf_counter() < deadline:
+            await self.run_scenario(self.rng.choices(names, weights)[0], session_id)
+
+
+async def discover(client: httpx.AsyncClient):
+    """Product ids and categories to spread requests over"""
+    products = (await client.get("/products/?limit=100")).json()["items"]
+    categories = (await client.get("/products/categories/list")).json()
+    product_ids = [product["id"] for product in products if product["stock"] >= 100]
+    if not product_ids:
+        sys.exit("The target has no well-stocked products; seed it with python -m benchmarks.seed first")
+    return product_ids, categories or [""]
+
+
+async def drive(args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        product_ids, categories = await discover(client)
+        driver = Driver(client, random.Random(args.seed), product_ids, categories)
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(driver.virtual_user(deadline) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    results = {}
+    for scenario, samples in sorted(driver.samples.items()):
+        results[scenario] = summarize(samples)
+        results[scenario]["errors"] = driver.errors[scenario]
+    total = sum(len(samples) for samples in driver.samples.values())
+    return {
+        "benchmarks": results,
+        "requests": total,
+        "errors": sum(driver.errors.values()),
+        "throughput_rps": round(total / elapsed, 1),
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Drive concurrent load against a running server")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--dialect", default="unknown", help="database behind the server, recorded with results")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="write results as JSON (e.g. a new baseline)")
+    parser.add_argument("--baseline", help="compare against a saved result")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="allowed p95 slowdown in percent")
+    args = parser.parse_args()
+
+    report = asyncio.run(drive(args))
+    for scenario, result in report["benchmarks"].items():
+        print(
+            f"{scenario:24} n {result['n']:6}  p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms  "
+            f"p99 {result['p99_ms']:8.2f}ms  errors {result['errors']}"
+        )
+    print(f"\n{report['requests']} requests, {report['errors']} errors, {report['throughput_rps']} req/s "
+          f"at concurrency {args.concurrency}")
+
+    if args.save:
+        save_results(args.save, {"environment": environment(args.dialect), **report})
+
+    if args.baseline:
+        print(f"\nvs {args.baseline}:")
+        baseline = load_results(args.baseline)
+        regressions = compare(report["benchmarks"], baseline["benchmarks"], args.max_regression, metric="p95_ms")
+        print(f"  throughput {report['throughput_rps']} req/s  baseline {baseline['throughput_rps']} req/s")
+        if regressions:
+            sys.exit(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Microbenchmarks for the hot endpoints, run in-process through the ASGI app so
+only the application and the database are measured. Each benchmark reports
+latency percentiles and the SQL statements per call (from Server-Timing).
+Seed the database with benchmarks.seed first.
+
+Usage: DATABASE_URL=sqlite:///./bench.db python -m benchmarks.micro
+           [--iterations 200] [--save results.json]
+           [--baseline benchmarks/baselines/sqlite.json] [--max-regression 20]
+"""
+import argparse
+import random
+import re
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from app.database.session import SessionLocal, engine
+from app.main import app
+from app.models import Cart, Product
+from benchmarks.common import compare, environment, load_results, save_results, summarize
+
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+# A benchmark builds one request: (method, url, json body); setup work it needs is not timed
+Request = Tuple[str, str, Optional[dict]]
+
+
+class Fixtures:
+    """Ids from the seeded database to spread requests over"""
+
+    def __init__(self, rng: random.Random):
+        db = SessionLocal()
+        try:
+            self.product_ids = list(db.scalars(
+                # Plenty of stock so repeated adds never trip the stock check
+                select(Product.id).where(Product.is_active == True, Product.stock >= 100)
+                .order_by(Product.id).limit(5000)
+            ))
+            self.categories = list(db.scalars(
+                select(Product.category).distinct().where(Product.category.isnot(None))
+            ))
+            self.session_ids = list(db.scalars(
+                select(Cart.session_id).where(Cart.session_id.isnot(None)).order_by(Cart.id).limit(5000)
+            ))
+        finally:
+            db.close()
+        if not self.product_ids or not self.session_ids:
+            sys.exit("No seeded data found; run python -m benchmarks.seed first")
+        self.rng = rng
+        self.sequence = 0
+
+    def new_session(self) -> str:
+        self.sequence += 1
+        return f"micro-{time.time_ns()}-{self.sequence}"
+
+
+def fill_cart(client: TestClient, fixtures: Fixtures, session_id: str, items: int = 3) -> None:
+    for product_id in fixtures.rng.sample(fixtures.product_ids, items):
+        client.post(f"/cart/items?session_id={session_id}", json={"product_id": product_id, "quantity": 1})
+
+
+def benchmarks(client: TestClient, fixtures: Fixtures) -> Dict[str, Callable[[], Request]]:
+    rng = fixtures.rng
+
+    def get_cart():
+        return "GET", f"/cart/?session_id={rng.choice(fixtures.session_ids)}", None
+
+    def add_to_cart():
+        body = {"product_id": rng.choice(fixtures.product_ids), "quantity": 1}
+        return "POST", f"/cart/items?session_id={rng.choice(fixtures.session_ids)}", body
+
+    def create_order():
+        session_id = fixtures.new_session()
+        fill_cart(client, fixtures, session_id)
+        body = {"guest_name": "bench", "guest_email": "bench@example.com", "guest_phone": "+15550000000"}
+        return "POST", f"/orders/?session_id={session_id}", body
+
+    def get_products():
+        return "GET", f"/products/?limit=20&category={rng.choice(fixtures.categories)}", None
+
+    def products_page():
+        return "GET", f"/products?category={rng.choice(fixtures.categories)}", None
+
+    def get_dashboard_stats():
+        return "GET", "/api/dashboard/stats", None
+
+    return {
+        "get_cart": get_cart,
+        "add_to_cart": add_to_cart,
+        "create_order": create_order,
+        "get_products": get_products,
+        "products_page": products_page,
+        "get_dashboard_stats": get_dashboard_stats,
+    }
+
+
+def run(client: TestClient, build: Callable[[], Request], iterations: int, warmup: int) -> dict:
+    samples: List[float] = []
+    queries: List[int] = []
+    for i in range(warmup + iterations):
+        method, url, body = build()
+        started = time.perf_counter()
+        response = client.request(method, url, json=body)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if response.status_code >= 400:
+            sys.exit(f"{method} {url} failed with {response.status_code}: {response.text[:200]}")
+        if i < warmup:
+            continue
+        samples.append(elapsed_ms)
+        match = QUERIES_RE.search(response.headers.get("server-timing", ""))
+        if match:
+            queries.append(int(match.group(1)))
+
+    result = summarize(samples)
+    if queries:
+        result["queries"] = int(statistics.median(queries))
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmark the hot endpoints")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--only", nargs="*", help="benchmark names to run")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="write results as JSON (e.g. a new baseline)")
+    parser.add_argument("--baseline", help="compare against a saved result")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="allowed p50 slowdown in percent")
+    args = parser.parse_args()
+
+    client = TestClient(app)
+    fixtures = Fixtures(random.Random(args.seed))
+    results = {}
+    for name, build in benchmarks(client, fixtures).items():
+        if args.only and name not in args.only:
+            continue
+        results[name] = result = run(client, build, args.iterations, args.warmup)
+        print(
+            f"{name:24} p50 {result['p50_ms']:8.3f}ms  p95 {result['p95_ms']:8.3f}ms  "
+            f"p99 {result['p99_ms']:8.3f}ms  queries {result.get('queries', '-')}"
+        )
+
+    if args.save:
+        save_results(args.save, {"environment": environment(engine.dialect.name), "benchmarks": results})
+
+    if args.baseline:
+        print(f"\nvs {args.baseline}:")
+        regressions = compare(results, load_results(args.baseline)["benchmarks"], args.max_regression)
+        if regressions:
+            sys.exit(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Concurrency check for stock handling against a running server. Creates a
+product with --stock units, then --buyers concurrent guests each add one to a
+cart of their own and check out. Exactly min(buyers, stock) orders must
+succeed and the product must end at stock - orders, never below zero;
+anything else exits non-zero. Run it with and without STOCK_RESERVATION_TTL.
+The server and this script must share DATABASE_URL, a scratch database.
+
+Usage: DATABASE_URL=sqlite:///./bench.db python -m benchmarks.oversell
+           --url http://localhost:8000 [--stock 50] [--buyers 300] [--concurrency 100]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+import httpx
+from sqlalchemy import func, select, update
+from app.database.session import SessionLocal
+from app.models import OrderItem, Product
+from app.services.catalog import bump_catalog_version
+
+ORDER_BODY = {"guest_name": "oversell", "guest_email": "oversell@example.com", "guest_phone": "+15550000000"}
+
+
+def create_product(stock: int) -> Product:
+    db = SessionLocal()
+    try:
+        product = Product(name=f"oversell-check-{time.time_ns()}", price=1, stock=stock, category="benchmark")
+        db.add(product)
+        bump_catalog_version(db)
+        db.commit()
+        db.refresh(product)
+        return product
+    finally:
+        db.close()
+
+
+def product_state(product: Product):
+    """(stock, units ordered) for the check product"""
+    db = SessionLocal()
+    try:
+        stock = db.scalar(select(Product.stock).where(Product.id == product.id))
+        ordered = db.scalar(
+            select(func.coalesce(func.sum(OrderItem.quantity), 0)).where(OrderItem.product_id == product.id)
+        )
+        return stock, ordered
+    finally:
+        db.close()
+
+
+def retire_product(product_id: int) -> None:
+    """Hide the check product from the catalog; its orders keep referencing it"""
+    db = SessionLocal()
+    try:
+        db.execute(update(Product).where(Product.id == product_id).values(is_active=False))
+        bump_catalog_version(db)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def buy(client: httpx.AsyncClient, limit: asyncio.Semaphore, product_id: int, buyer: int) -> str:
+    session_id = f"oversell-{product_id}-{buyer}"
+    async with limit:
+        try:
+            added = await client.post(f"/cart/items?session_id={session_id}", json={"product_id": product_id, "quantity": 1})
+            if added.status_code != 200:
+                return f"add {added.status_code}"
+            ordered = await client.post(f"/orders/?session_id={session_id}", json=ORDER_BODY)
+            return f"order {ordered.status_code}"
+        except httpx.HTTPError as exc:
+            return type(exc).__name__
+
+
+async def drive(args, product_id: int) -> Counter:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    limit = asyncio.Semaphore(args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        outcomes = await asyncio.gather(*(buy(client, limit, product_id, buyer) for buyer in range(args.buyers)))
+    return Counter(outcomes)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check that concurrent checkouts never oversell")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--stock", type=int, default=50)
+    parser.add_argument("--buyers", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    args = parser.parse_args()
+
+    product = create_product(args.stock)
+    try:
+        started = time.perf_counter()
+        outcomes = asyncio.run(drive(args, product.id))
+        elapsed = time.perf_counter() - started
+        stock, ordered = product_state(product)
+    finally:
+        retire_product(product.id)
+
+    for outcome, count in sorted(outcomes.items()):
+        print(f"{outcome:24} {count:6}")
+    sold = outcomes["order 201"]
+    expected = min(args.buyers, args.stock)
+    print(f"\n{sold} orders for {args.stock} units in {elapsed:.1f}s; {ordered} units ordered, {stock} left")
+
+    problems = []
+    if stock < 0 or ordered > args.stock:
+        problems.append("oversold")
+    if stock != args.stock - ordered or ordered != sold:
+        problems.append("stock does not match the orders placed")
+    if sold != expected:
+        problems.append(f"expected {expected} orders")
+    if problems:
+        sys.exit("; ".join(problems))
+
+
+if __name__ == "__main__":
+    main()
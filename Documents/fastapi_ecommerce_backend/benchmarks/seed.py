@@ -0,0 +1,144 @@
+"""
+Seed a large synthetic catalog, order history and set of open carts through
+batched bulk inserts. Deterministic for a given --seed, so runs against SQLite
+and PostgreSQL see the same data. Point DATABASE_URL at a scratch database.
+
+Usage: DATABASE_URL=sqlite:///./bench.db python -m benchmarks.seed
+           [--products 100000] [--orders 1000000] [--carts 100000] [--seed 42]
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, insert, select, text
+from app.database.session import Base, SessionLocal, engine
+from app.models import Cart, CartItem, Order, OrderItem, Product
+from app.services.catalog import bump_catalog_version
+from app.services.stats import rebuild_stats
+
+CATEGORIES = [f"category-{i:02d}" for i in range(50)]
+WORDS = (
+    "red blue green black white large small classic modern cotton leather wooden steel "
+    "lamp chair table book phone case bag shoe shirt watch mug bottle desk pen"
+).split()
+# Weighted like a live store: mostly finished orders, a tail of open ones
+STATUSES = ["completed"] * 6 + ["pending"] * 2 + ["confirmed", "shipping", "cancelled"]
+
+
+def batched(rows, size: int):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def next_id(db, model) -> int:
+    return (db.scalar(select(func.max(model.id))) or 0) + 1
+
+
+def bulk_insert(db, model, rows, batch_size: int) -> int:
+    count = 0
+    for batch in batched(rows, batch_size):
+        db.execute(insert(model), batch)
+        db.commit()
+        count += len(batch)
+    return count
+
+
+def product_rows(rng: random.Random, first_id: int, count: int):
+    for product_id in range(first_id, first_id + count):
+        yield {
+            "id": product_id,
+            "name": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} #{product_id}",
+            "description": " ".join(rng.choices(WORDS, k=12)),
+            "price": rng.randint(5, 5000),
+            "stock": rng.randint(0, 500),
+            "category": rng.choice(CATEGORIES),
+            "is_active": rng.random() > 0.1,
+        }
+
+
+def order_rows(rng: random.Random, first_id: int, count: int, items_per_order: int):
+    """Orders spread over the last year"""
+    now = datetime.now(timezone.utc)
+    for order_id in range(first_id, first_id + count):
+        quantity = rng.randint(1, 3)
+        yield {
+            "id": order_id,
+            "guest_name": f"guest {order_id}",
+            "guest_email": f"guest{order_id}@example.com",
+            "guest_phone": f"+1555{order_id:07d}",
+            "status": rng.choice(STATUSES),
+            "total_price": rng.randint(10, 20000),
+            "total_items": quantity * items_per_order,
+            "created_at": now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600)),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed a synthetic large-catalog dataset")
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--carts", type=int, default=100_000)
+    parser.add_argument("--items-per-order", type=int, default=3)
+    parser.add_argument("--items-per-cart", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    rng = random.Random(args.seed)
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        first_product = next_id(db, Product)
+        bulk_insert(db, Product, product_rows(rng, first_product, args.products), args.batch_size)
+        product_ids = range(first_product, first_product + args.products)
+        print(f"products: {args.products} in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        first_order = next_id(db, Order)
+        bulk_insert(db, Order, order_rows(rng, first_order, args.orders, args.items_per_order), args.batch_size)
+        order_items = (
+            {"order_id": order_id, "product_id": rng.choice(product_ids), "quantity": rng.randint(1, 3)}
+            for order_id in range(first_order, first_order + args.orders)
+            for _ in range(args.items_per_order)
+        )
+        items = bulk_insert(db, OrderItem, order_items, args.batch_size)
+        print(f"orders: {args.orders} (+{items} items) in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        first_cart = next_id(db, Cart)
+        carts = ({"id": cart_id, "session_id": f"bench-{cart_id}"}
+                 for cart_id in range(first_cart, first_cart + args.carts))
+        bulk_insert(db, Cart, carts, args.batch_size)
+        cart_items = (
+            {"cart_id": cart_id, "product_id": product_id, "quantity": rng.randint(1, 5)}
+            for cart_id in range(first_cart, first_cart + args.carts)
+            for product_id in rng.sample(product_ids, args.items_per_cart)
+        )
+        items = bulk_insert(db, CartItem, cart_items, args.batch_size)
+        print(f"carts: {args.carts} (+{items} items) in {time.perf_counter() - started:.1f}s")
+
+        if engine.dialect.name == "postgresql":
+            # Explicit ids bypass the serial sequences; move them past the seeded rows
+            for table in ("products", "orders", "order_items", "carts", "cart_items"):
+                db.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM {table}))"
+                ))
+
+        # Derived state the app keeps alongside the tables
+        rebuild_stats(db)
+        bump_catalog_version(db)
+        db.commit()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Import and startup time of the app, each run in a fresh interpreter the way a
+worker starts: importing app.main (which builds the app with create_app), then
+running its lifespan startup (pool reset and warm-up, template compilation).
+Reports the median and worst of --runs and exits non-zero when a median is
+over its budget. tests/test_startup.py runs the same measurement against the
+same budgets, so the test suite (and CI) fails on a heavy import or slow
+startup before deploy.
+
+Usage: DATABASE_URL=sqlite:///./bench.db python -m benchmarks.startup
+           [--runs 5] [--max-import-ms 3000] [--max-startup-ms 1000]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Median budgets in milliseconds, shared with tests/test_startup.py
+STARTUP_BUDGET_IMPORT_MS = float(os.getenv("STARTUP_BUDGET_IMPORT_MS", "3000"))
+STARTUP_BUDGET_STARTUP_MS = float(os.getenv("STARTUP_BUDGET_STARTUP_MS", "1000"))
+
+# Runs in the child interpreter and prints its timings as JSON
+PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def startup():
+    lifespan = app.router.lifespan_context(app)
+    began = time.perf_counter()
+    await lifespan.__aenter__()
+    elapsed = time.perf_counter() - began
+    await lifespan.__aexit__(None, None, None)
+    return elapsed
+
+print(json.dumps({"import_ms": (imported - started) * 1000, "startup_ms": asyncio.run(startup()) * 1000}))
+"""
+
+
+def measure(runs: int) -> dict:
+    samples = {"import_ms": [], "startup_ms": []}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE], capture_output=True, text=True, check=True, env=os.environ.copy()
+        )
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        for name, value in timings.items():
+            samples[name].append(value)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check app import and startup time against a budget")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=STARTUP_BUDGET_IMPORT_MS)
+    parser.add_argument("--max-startup-ms", type=float, default=STARTUP_BUDGET_STARTUP_MS)
+    args = parser.parse_args()
+
+    samples = measure(args.runs)
+    budgets = {"import_ms": args.max_import_ms, "startup_ms": args.max_startup_ms}
+    over = []
+    for name, values in samples.items():
+        median = statistics.median(values)
+        print(f"{name:12} median {median:8.1f}ms  max {max(values):8.1f}ms  budget {budgets[name]:8.1f}ms")
+        if median > budgets[name]:
+            over.append(name)
+    if over:
+        sys.exit(f"Over budget: {', '.join(over)}")
+
+
+if __name__ == "__main__":
+    main()
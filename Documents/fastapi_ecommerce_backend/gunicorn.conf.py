@@ -0,0 +1,34 @@
+"""
+Production server: gunicorn managing uvicorn workers.
+
+Usage: gunicorn -c gunicorn.conf.py app.main:app
+
+With preload (the default) the master imports the app once and forks the
+workers from it, so they start without re-importing and share that memory.
+Nothing connects at import time; each worker's lifespan gives it fresh
+pools, warms them and compiles the templates. Size WEB_CONCURRENCY so
+workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays below max_connections.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count() * 2 + 1)))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+# Seconds a silent worker lives before it is restarted, and to finish in-flight requests on shutdown
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Recycle workers after this many requests (0 never), jittered so they don't restart together
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "0"))
+
+# Proxies whose X-Forwarded-* headers are trusted (client IPs for rate limits)
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
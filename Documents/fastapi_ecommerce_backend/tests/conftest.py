@@ -0,0 +1,130 @@
+"""
+Test fixtures: the app in sync mode against a scratch SQLite file. The
+settings are read at import time, so they are set before anything from app
+is imported.
+"""
+import os
+import tempfile
+
+_scratch = tempfile.mkdtemp(prefix="ecommerce-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_scratch}/test.db"
+os.environ["DB_MODE"] = "sync"
+os.environ["CART_BACKEND"] = "sql"
+os.environ["ADMIN_API_KEY"] = "test-admin-key"
+# Short SQLite busy timeout, so tests that wait on a held write lock finish quickly
+os.environ["DB_CONNECT_TIMEOUT"] = "2"
+# See catalog version bumps on the next request instead of up to a second later
+os.environ["CATALOG_VERSION_CHECK_INTERVAL"] = "0"
+for name in ("DATABASE_READ_URL", "RATE_LIMIT_CATALOG", "RATE_LIMIT_CART_WRITES", "RATE_LIMIT_CHECKOUT",
+             "SHED_POOL_UTILIZATION", "SHED_POOL_WAIT_MS", "STOCK_RESERVATION_TTL"):
+    os.environ.pop(name, None)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.database.session import Base, SessionLocal, engine
+from app.main import create_app
+from app.models import Product
+from app.services.catalog import bump_catalog_version, catalog_cache
+from app.services.search import search_index
+
+ADMIN_HEADERS = {"Authorization": "Bearer test-admin-key"}
+GUEST = {"guest_name": "Test Guest", "guest_email": "guest@example.com", "guest_phone": "+15550000000"}
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    Base.metadata.create_all(engine)
+    yield
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def clean_database():
+    """Every test starts from empty tables and cold caches"""
+    yield
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+    catalog_cache.invalidate()
+    search_index.rebuild([], None)
+
+
+@pytest.fixture
+def app():
+    return create_app()
+
+
+@pytest.fixture
+def client(app):
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_product(db):
+    """Create an active product, bumping the catalog version like the admin endpoints"""
+
+    def make(name: str = "Widget", price: int = 1000, stock: int = 10, category: str = "tools") -> Product:
+        product = Product(name=name, price=price, stock=stock, category=category)
+        db.add(product)
+        bump_catalog_version(db)
+        db.commit()
+        db.refresh(product)
+        return product
+
+    return make
+
+
+@pytest.fixture
+def admin_headers():
+    return dict(ADMIN_HEADERS)
+
+
+@pytest.fixture
+def place_order(client):
+    """Fill a cart with {product_id: quantity} and check it out, returning the checkout response"""
+
+    def place(quantities: dict, session_id: str = "buyer", headers: dict = None):
+        for product_id, quantity in quantities.items():
+            added = client.post(f"/cart/items?session_id={session_id}",
+                                json={"product_id": product_id, "quantity": quantity})
+            assert added.status_code == 200, added.text
+        return client.post(f"/orders/?session_id={session_id}", json=GUEST, headers=headers or {})
+
+    return place
+
+
+class StatementCounter:
+    """Counts the statements sent to an engine while active"""
+
+    def __init__(self, bind):
+        self.bind = bind
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.bind, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.bind, "before_cursor_execute", self._record)
+
+    def __len__(self):
+        return len(self.statements)
+
+
+@pytest.fixture
+def count_statements():
+    return lambda: StatementCounter(engine)
@@ -0,0 +1,55 @@
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from starlette.responses import PlainTextResponse
+from app.core.admission import AdmissionMiddleware, PoolPressure
+
+
+async def ok(scope, receive, send):
+    await PlainTextResponse("ok")(scope, receive, send)
+
+
+@pytest.fixture
+def admission():
+    """A catalog budget of 2 per session and 6 per IP that doesn't refill during a test"""
+    return AdmissionMiddleware(ok, rate_limits={"catalog": (2, 0.001)}, pressure=PoolPressure(0, 0), ip_factor=3)
+
+
+def from_address(admission, address: str = "203.0.113.7") -> TestClient:
+    """A client whose requests come from address"""
+    async def app(scope, receive, send):
+        await admission({**scope, "client": (address, 50000)}, receive, send)
+    return TestClient(app)
+
+
+def codes(client, urls) -> list:
+    return [client.get(url).status_code for url in urls]
+
+
+def test_each_session_has_its_own_budget(admission):
+    client = from_address(admission)
+    assert codes(client, ["/products/?session_id=a"] * 3) == [200, 200, 429]
+    assert codes(client, ["/products/?session_id=b"] * 2) == [200, 200]
+
+
+def test_fresh_session_ids_are_still_limited_by_ip(admission):
+    client = from_address(admission)
+    urls = [f"/products/?session_id={uuid.uuid4()}" for _ in range(8)]
+    assert codes(client, urls) == [200] * 6 + [429] * 2
+    # Rejected requests never got a session bucket
+    assert len(admission.budgets["catalog"].sessions._buckets) == 6
+
+
+def test_requests_without_a_session_use_the_ip_budget(admission):
+    client = from_address(admission)
+    assert codes(client, ["/products/"] * 7) == [200] * 6 + [429]
+    response = client.get("/products/?session_id=new")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_other_addresses_and_budgets_are_unaffected(admission):
+    flooder, other = from_address(admission), from_address(admission, "198.51.100.1")
+    assert codes(flooder, [f"/products/?session_id={n}" for n in range(7)])[-1] == 429
+    assert codes(other, ["/products/?session_id=x"] * 2) == [200, 200]
+    assert codes(flooder, ["/cart/", "/api/health"]) == [200, 200]
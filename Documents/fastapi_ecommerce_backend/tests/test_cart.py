@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, select, update
+from app.models import Cart, CartItem
+from app.services.cart import purge_idle_carts
+from app.services.cart_store import SqlCartStore
+
+
+def test_get_cart_is_one_statement(client, make_product, count_statements):
+    widget, gadget = make_product("Widget"), make_product("Gadget", price=250)
+    for product, quantity in ((widget, 2), (gadget, 3)):
+        assert client.post(
+            "/cart/items?session_id=s1", json={"product_id": product.id, "quantity": quantity}
+        ).status_code == 200
+
+    with count_statements() as statements:
+        response = client.get("/cart/?session_id=s1")
+
+    assert response.status_code == 200
+    assert len(statements) == 1, statements.statements
+    cart = response.json()
+    assert cart["total_items"] == 5
+    assert cart["total_price"] == 2 * 1000 + 3 * 250
+
+
+def test_get_missing_cart_is_one_statement(client, count_statements):
+    with count_statements() as statements:
+        response = client.get("/cart/?session_id=nobody")
+
+    assert response.status_code == 200
+    assert len(statements) == 1
+    assert response.json()["items"] == []
+
+
+def idle_carts(db, count: int, product_id: int, idle_seconds: int = 3600) -> None:
+    for n in range(count):
+        store = SqlCartStore(db)
+        store.set_quantity(f"idle-{idle_seconds}-{n}", product_id, 1)
+        store.commit()
+    db.execute(
+        update(Cart).where(Cart.session_id.like(f"idle-{idle_seconds}-%"))
+        .values(updated_at=datetime.now(timezone.utc) - timedelta(seconds=idle_seconds))
+    )
+    db.commit()
+
+
+def test_reading_a_cart_never_creates_one(client, db):
+    assert client.get("/cart/?session_id=s1").json()["id"] is None
+    assert db.scalar(select(func.count(Cart.id))) == 0
+
+
+def test_purge_deletes_idle_carts_in_batches(db, make_product):
+    product = make_product()
+    idle_carts(db, 5, product.id)
+    active = SqlCartStore(db)
+    active.set_quantity("active", product.id, 2)
+    active.commit()
+
+    report = purge_idle_carts(db, idle_seconds=600, batch_size=2)
+
+    assert report == {"carts": 5, "items": 5, "batches": 3}
+    assert db.scalars(select(Cart.session_id)).all() == ["active"]
+    assert db.scalar(select(func.count(CartItem.id))) == 1
+
+
+def test_purge_stops_after_max_batches(db, make_product):
+    idle_carts(db, 5, make_product().id)
+
+    report = purge_idle_carts(db, idle_seconds=600, batch_size=2, max_batches=1)
+
+    assert report == {"carts": 2, "items": 2, "batches": 1}
+    assert db.scalar(select(func.count(Cart.id))) == 3
@@ -0,0 +1,91 @@
+import fakeredis
+import pytest
+from sqlalchemy.orm import Session
+import app.main
+from app.services import cart_store
+from app.services.cart_store import CartLine, CartStore, RedisCartStore
+from tests.conftest import GUEST
+
+
+@pytest.fixture
+def redis_store():
+    return RedisCartStore(fakeredis.FakeRedis(), ttl=60)
+
+
+@pytest.fixture
+def redis_carts(monkeypatch, redis_store):
+    """Serve the app's carts from a fake Redis"""
+    monkeypatch.setattr(cart_store, "CART_BACKEND", "redis")
+    monkeypatch.setattr(cart_store, "_kv_store", redis_store)
+    return redis_store
+
+
+def test_cart_store_is_abstract():
+    class Partial(CartStore):
+        def get_lines(self, session_id):
+            return []
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_redis_store_lines(redis_store):
+    assert redis_store.get_lines("s1") == []
+    assert redis_store.get_cart_id("s1") is None
+
+    redis_store.set_quantity("s1", 7, 2)
+    redis_store.set_quantities("s1", {3: 1, 7: 5})
+    cart_id = redis_store.get_cart_id("s1")
+    assert cart_id is not None
+    assert redis_store.get_lines("s1") == [CartLine(3, cart_id, 3, 1), CartLine(7, cart_id, 7, 5)]
+
+    assert redis_store.remove("s1", 3) is True
+    assert redis_store.remove("s1", 3) is False
+    redis_store.set_quantities("s1", {7: 0})
+    assert redis_store.get_lines("s1") == []
+    assert redis_store.get_cart_id("s1") == cart_id
+
+
+def test_redis_store_expires_idle_carts(redis_store):
+    redis_store.set_quantity("s1", 7, 2)
+    for key in ("cart:s1:items", "cart:s1:id"):
+        assert 0 < redis_store.client.ttl(key) <= 60
+
+
+def test_redis_store_ids_per_session(redis_store):
+    redis_store.set_quantity("s1", 1, 1)
+    redis_store.set_quantity("s2", 1, 1)
+    assert redis_store.get_cart_id("s1") != redis_store.get_cart_id("s2")
+    redis_store.clear("s1")
+    assert redis_store.get_lines("s1") == []
+    assert len(redis_store.get_lines("s2")) == 1
+
+
+def test_checkout_clears_redis_cart(client, make_product, place_order, redis_carts):
+    widget = make_product(stock=5)
+    response = place_order({widget.id: 2}, session_id="s1")
+
+    assert response.status_code == 201, response.text
+    assert response.json()["total_items"] == 2
+    assert redis_carts.get_lines("s1") == []
+
+
+def test_failed_checkout_keeps_redis_cart(client, make_product, redis_carts, monkeypatch):
+    widget = make_product(stock=5)
+    client.post("/cart/items?session_id=s1", json={"product_id": widget.id, "quantity": 2})
+
+    def failing_commit(self):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(Session, "commit", failing_commit)
+    with pytest.raises(RuntimeError):
+        client.post("/orders/?session_id=s1", json=GUEST)
+
+    assert [line.quantity for line in redis_carts.get_lines("s1")] == [2]
+
+
+def test_async_mode_needs_sql_carts(monkeypatch):
+    monkeypatch.setattr(app.main, "DB_MODE", "async")
+    monkeypatch.setattr(app.main, "CART_BACKEND", "redis")
+    with pytest.raises(RuntimeError, match="CART_BACKEND"):
+        app.main.create_app()
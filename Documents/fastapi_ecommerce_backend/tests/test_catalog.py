@@ -0,0 +1,123 @@
+import pytest
+from app.services.catalog import catalog_version_query
+from app.services.inventory import take_stock
+from app.utils.pagination import NEXT_CURSOR_HEADER
+
+
+def catalog_version(db) -> int:
+    db.rollback()
+    return db.scalar(catalog_version_query())
+
+
+def test_sellout_changes_product_etags(client, make_product, place_order):
+    widget = make_product(stock=2)
+    before = client.get(f"/products/{widget.id}")
+    page = client.get(f"/product/{widget.id}")
+    assert before.json()["stock"] == 2
+
+    assert place_order({widget.id: 2}).status_code == 201
+
+    after = client.get(f"/products/{widget.id}", headers={"If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    assert after.json()["stock"] == 0
+    assert client.get(f"/product/{widget.id}", headers={"If-None-Match": page.headers["ETag"]}).status_code == 200
+    assert client.get("/products/search", params={"q": "Widget"}).json()[0]["stock"] == 0
+
+
+def test_only_availability_changes_bump_the_catalog(db, make_product):
+    widget = make_product(stock=3)
+    version = catalog_version(db)
+
+    take_stock(db, {widget.id: 1})
+    db.commit()
+    assert catalog_version(db) == version
+
+    take_stock(db, {widget.id: 2})
+    db.commit()
+    assert catalog_version(db) == version + 1
+
+    take_stock(db, {widget.id: -1})
+    db.commit()
+    assert catalog_version(db) == version + 2
+
+    take_stock(db, {widget.id: -1})
+    db.commit()
+    assert catalog_version(db) == version + 2
+
+
+CATALOG_URLS = ("/products/", "/products/{id}", "/products/categories/list", "/", "/products", "/product/{id}")
+
+
+@pytest.mark.parametrize("url", CATALOG_URLS)
+def test_unchanged_catalog_revalidates_with_304(client, make_product, url):
+    url = url.format(id=make_product().id)
+    # Uncompressed, so the strong tag
+    first = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    # The 304 repeats the tag the client matched, weak (a gzipped copy's) or not
+    for if_none_match, matched in ((etag, etag), (f"W/{etag}", f"W/{etag}"), (f'"stale", {etag}', etag)):
+        revalidated = client.get(url, headers={"If-None-Match": if_none_match})
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+        assert revalidated.headers["ETag"] == matched
+        assert revalidated.headers["Cache-Control"] == first.headers["Cache-Control"]
+
+
+@pytest.mark.parametrize("url", CATALOG_URLS)
+def test_product_update_changes_the_etag(client, make_product, admin_headers, url):
+    widget = make_product()
+    url = url.format(id=widget.id)
+    etag = client.get(url).headers["ETag"]
+
+    updated = client.put(f"/products/{widget.id}", json={"category": "garden"}, headers=admin_headers)
+    assert updated.status_code == 200
+
+    after = client.get(url, headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != etag
+
+
+def test_product_last_modified(client, make_product):
+    product = client.get(f"/products/{make_product().id}")
+    last_modified = product.headers["Last-Modified"]
+    url = f"/products/{product.json()['id']}"
+
+    assert client.get(url, headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get(url, headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"}).status_code == 200
+    # If-None-Match wins over If-Modified-Since
+    assert client.get(url, headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified}).status_code == 200
+
+
+def test_product_pages_carry_their_cursor(client, make_product):
+    ids = [make_product(f"Widget {n}").id for n in range(5)]
+
+    seen, params = [], {"limit": 2}
+    for _ in range(len(ids)):
+        response = client.get("/products/", params=params)
+        page = response.json()
+        assert page["next_cursor"] == response.headers.get(NEXT_CURSOR_HEADER)
+        seen += [product["id"] for product in page["items"]]
+        if not page["next_cursor"]:
+            break
+        params = {"limit": 2, "cursor": page["next_cursor"]}
+
+    assert seen == ids
+
+
+def test_gzipped_responses_get_a_weak_etag(client, make_product):
+    for n in range(20):
+        make_product(f"Widget {n}")
+    identity = client.get("/products/", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/products/", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in identity.headers
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzipped.headers["Vary"] == "Accept-Encoding"
+    assert gzipped.headers["ETag"] == "W/" + identity.headers["ETag"]
+    assert gzipped.json() == identity.json()
+
+    revalidated = client.get("/products/", headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == gzipped.headers["ETag"]
@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy import func, select
+from app.models import Order
+from app.services import idempotency
+from app.services.idempotency import REPLAYED_HEADER, begin_idempotent, request_fingerprint
+from app.services.orders import CREATE_ORDER_SCOPE
+from tests.conftest import GUEST
+
+
+@pytest.fixture
+def widget(make_product):
+    return make_product(stock=10)
+
+
+def order_count(db) -> int:
+    return db.scalar(select(func.count(Order.id)))
+
+
+def test_retry_replays_the_first_response(client, db, widget, place_order):
+    first = place_order({widget.id: 2}, headers={"Idempotency-Key": "k1"})
+    retry = client.post("/orders/?session_id=buyer", json=GUEST, headers={"Idempotency-Key": "k1"})
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers[REPLAYED_HEADER] == "true"
+    assert REPLAYED_HEADER not in first.headers
+    assert order_count(db) == 1
+
+
+def test_key_reused_for_a_different_request(client, widget, place_order):
+    assert place_order({widget.id: 1}, headers={"Idempotency-Key": "k1"}).status_code == 201
+
+    other = client.post("/orders/?session_id=buyer", json={**GUEST, "guest_name": "Someone Else"},
+                        headers={"Idempotency-Key": "k1"})
+    assert other.status_code == 422
+
+
+def test_key_in_flight_gives_409(client, db, widget, monkeypatch):
+    client.post("/cart/items?session_id=buyer", json={"product_id": widget.id, "quantity": 1})
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_WAIT_SECONDS", 0.2)
+
+    # Another request claimed the key and has not committed yet
+    fingerprint = request_fingerprint("buyer", GUEST)
+    assert begin_idempotent(db, CREATE_ORDER_SCOPE, "k1", fingerprint) is None
+    try:
+        duplicate = client.post("/orders/?session_id=buyer", json=GUEST, headers={"Idempotency-Key": "k1"})
+    finally:
+        db.rollback()
+
+    assert duplicate.status_code == 409
+    assert duplicate.headers["Retry-After"] == "1"
+    assert order_count(db) == 0
+
+    # The first request rolled back, so the key is free again
+    retried = client.post("/orders/?session_id=buyer", json=GUEST, headers={"Idempotency-Key": "k1"})
+    assert retried.status_code == 201
@@ -0,0 +1,106 @@
+import os
+import threading
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, insert, literal, select
+from sqlalchemy.orm import sessionmaker
+from app.database.session import Base, SessionLocal, normalize_url
+from app.models import Cart, CartItem, Product
+from app.services.cart_store import SqlCartStore
+from app.services.inventory import commit_stock
+from app.services.orders import checkout_lines
+
+# Scratch PostgreSQL database for the row-contention run (its tables are dropped afterwards)
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+BUYERS = 300
+STOCK = 50
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def checkout_sessions(request):
+    """
+    Sessions for the concurrency test. SQLite serializes writers with one
+    database lock; PostgreSQL has the checkouts wait on the product's row
+    lock and re-check stock >= quantity, so that run needs TEST_POSTGRES_URL.
+    """
+    if request.param == "sqlite":
+        yield SessionLocal
+        return
+    if not TEST_POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    engine = create_engine(normalize_url(TEST_POSTGRES_URL), pool_size=50, max_overflow=0, pool_timeout=120)
+    Base.metadata.create_all(engine)
+    try:
+        yield sessionmaker(bind=engine)
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+
+
+def checkout(sessions, session_id: str, start: threading.Barrier, outcomes: list) -> None:
+    """One buyer's checkout in its own session and transaction, as a request would run it"""
+    db = sessions()
+    try:
+        lines, _, _ = checkout_lines(SqlCartStore(db).checkout_rows(db, session_id))
+        # Give the connection back so every buyer reaches the start line, not just a pool's worth
+        db.rollback()
+        start.wait()
+        commit_stock(db, session_id, lines)
+        db.commit()
+        outcomes.append("sold")
+    except HTTPException as exc:
+        db.rollback()
+        outcomes.append(exc.status_code)
+    except Exception as exc:
+        outcomes.append(type(exc).__name__)
+    finally:
+        db.close()
+
+
+def test_concurrent_checkouts_never_oversell(checkout_sessions):
+    with checkout_sessions() as db:
+        product = Product(name="Contended", price=100, stock=STOCK, category="tools")
+        db.add(product)
+        db.flush()
+        db.execute(insert(Cart), [{"session_id": f"buyer-{buyer}"} for buyer in range(BUYERS)])
+        db.execute(insert(CartItem).from_select(
+            ["cart_id", "product_id", "quantity"],
+            select(Cart.id, literal(product.id), literal(1)).where(Cart.session_id.like("buyer-%")),
+        ))
+        db.commit()
+        product_id = product.id
+
+    start = threading.Barrier(BUYERS, timeout=120)
+    outcomes = []
+    threads = [
+        threading.Thread(target=checkout, args=(checkout_sessions, f"buyer-{buyer}", start, outcomes))
+        for buyer in range(BUYERS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=180)
+
+    assert len(outcomes) == BUYERS
+    assert outcomes.count("sold") == STOCK, sorted(set(map(str, outcomes)))
+    assert outcomes.count(400) == BUYERS - STOCK
+    with checkout_sessions() as db:
+        assert db.get(Product, product_id).stock == 0
+
+
+def test_short_line_takes_nothing(db, make_product):
+    plenty, scarce = make_product("Plenty", stock=10), make_product("Scarce", stock=1)
+    store = SqlCartStore(db)
+    store.set_quantities("s1", {plenty.id: 3, scarce.id: 2})
+    store.commit()
+
+    lines, _, _ = checkout_lines(store.checkout_rows(db, "s1"))
+    with pytest.raises(HTTPException) as raised:
+        commit_stock(db, "s1", lines)
+    db.rollback()
+
+    assert raised.value.status_code == 400
+    assert "Scarce" in raised.value.detail
+    db.expire_all()
+    assert (db.get(Product, plenty.id).stock, db.get(Product, scarce.id).stock) == (10, 1)
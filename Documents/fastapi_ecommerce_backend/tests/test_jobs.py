@@ -0,0 +1,126 @@
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql
+from app.models import Job, Product
+from app.services import jobs
+from app.services.jobs import enqueue, job_handlers, next_job_query, retry_delay, run_next_job, run_pending_jobs
+from app.services.stats import STATS_DELTA
+from app.services.tasks import ORDER_CONFIRMATION
+
+
+@pytest.fixture
+def handled(monkeypatch):
+    """Register test.* handlers: test.record keeps its payloads, test.fail raises after writing"""
+    calls = []
+
+    def record(db, **payload):
+        calls.append(payload)
+
+    def fail(db, product_id):
+        db.execute(update(Product).where(Product.id == product_id).values(stock=0))
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(job_handlers, "test.record", record)
+    monkeypatch.setitem(job_handlers, "test.fail", fail)
+    return calls
+
+
+def all_jobs(db) -> list:
+    db.rollback()
+    return db.scalars(select(Job).order_by(Job.id)).all()
+
+
+def make_due(db) -> None:
+    db.execute(update(Job).where(Job.status == "queued").values(run_at=func.now()))
+    db.commit()
+
+
+def test_jobs_commit_with_the_write(db):
+    enqueue(db, ("test.record", {"n": 1}))
+    db.rollback()
+    assert all_jobs(db) == []
+
+    enqueue(db, ("test.record", {"n": 1}), ("test.record", {"n": 2}))
+    db.commit()
+    assert [(job.kind, job.payload, job.status, job.attempts) for job in all_jobs(db)] == [
+        ("test.record", {"n": 1}, "queued", 0), ("test.record", {"n": 2}, "queued", 0),
+    ]
+
+
+def test_jobs_run_oldest_first_once(db, handled):
+    enqueue(db, ("test.record", {"n": 1}), ("test.record", {"n": 2}))
+    db.commit()
+
+    assert run_pending_jobs(db) == 2
+    assert handled == [{"n": 1}, {"n": 2}]
+    assert [(job.status, job.attempts) for job in all_jobs(db)] == [("done", 1), ("done", 1)]
+    assert all(job.finished_at is not None for job in all_jobs(db))
+    assert run_next_job(db) is False
+
+
+def test_future_jobs_wait(db, handled):
+    enqueue(db, ("test.record", {"n": 1}))
+    db.commit()
+    db.execute(update(Job).values(run_at=datetime(2999, 1, 1, tzinfo=timezone.utc)))
+    db.commit()
+
+    assert run_next_job(db) is False
+    assert handled == []
+
+
+def test_workers_skip_jobs_claimed_by_others():
+    sql = str(next_job_query().compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "LIMIT" in sql
+
+
+def test_failed_job_retries_later_without_its_writes(db, make_product, handled, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_RETRY_BASE_SECONDS", 30)
+    widget = make_product(stock=5)
+    enqueue(db, ("test.fail", {"product_id": widget.id}))
+    db.commit()
+
+    assert run_next_job(db) is True
+    job = all_jobs(db)[0]
+    assert (job.status, job.attempts, job.last_error) == ("queued", 1, "RuntimeError: boom")
+    wait = (job.run_at.replace(tzinfo=timezone.utc) - datetime.now(timezone.utc)).total_seconds()
+    assert 25 < wait <= 30
+    assert db.get(Product, widget.id).stock == 5
+    assert run_next_job(db) is False
+
+
+def test_job_fails_after_max_attempts(db, make_product, handled, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_MAX_ATTEMPTS", 3)
+    enqueue(db, ("test.fail", {"product_id": make_product().id}), ("test.unknown", {}))
+    db.commit()
+
+    for _ in range(3):
+        make_due(db)
+        run_pending_jobs(db)
+
+    assert [(job.kind, job.status, job.attempts) for job in all_jobs(db)] == [
+        ("test.fail", "failed", 3), ("test.unknown", "failed", 3),
+    ]
+    assert all_jobs(db)[1].last_error.startswith("LookupError")
+    make_due(db)
+    assert run_next_job(db) is False
+
+
+def test_retry_delay_backs_off_exponentially(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_RETRY_BASE_SECONDS", 5)
+    monkeypatch.setattr(jobs, "JOB_RETRY_MAX_SECONDS", 60)
+    assert [retry_delay(attempt) for attempt in range(1, 6)] == [5, 10, 20, 40, 60]
+
+
+def test_checkout_queues_stats_and_the_confirmation(db, make_product, place_order, caplog):
+    order = place_order({make_product(price=300).id: 1}).json()
+    assert [(job.kind, job.payload) for job in all_jobs(db)] == [
+        (STATS_DELTA, {"total_orders": 1, "pending_orders": 1, "total_revenue": 0}),
+        (ORDER_CONFIRMATION, {"order_id": order["id"]}),
+    ]
+
+    with caplog.at_level("INFO"):
+        assert run_pending_jobs(db) == 2
+    assert [job.status for job in all_jobs(db)] == ["done", "done"]
+    assert f"Order #{order['id']} received" in caplog.text
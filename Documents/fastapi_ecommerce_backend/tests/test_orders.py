@@ -0,0 +1,83 @@
+import json
+from sqlalchemy import func, literal, select, update
+from app.models import Order
+from app.utils.pagination import NEXT_CURSOR_HEADER, order_keyset, order_next_cursor
+
+
+def same_second_orders(db, count: int) -> list:
+    """Orders sharing one server-default timestamp, as a burst of checkouts gets on SQLite"""
+    orders = [Order(guest_name=f"Guest {i}", guest_email=f"guest{i}@example.com", guest_phone="+15550000000")
+              for i in range(count)]
+    db.add_all(orders)
+    db.flush()
+    # CURRENT_TIMESTAMP is evaluated once per statement
+    db.execute(update(Order).values(created_at=func.current_timestamp()))
+    db.commit()
+    return sorted(order.id for order in orders)
+
+
+def test_order_pages_cover_same_second_orders_once(client, db):
+    ids = same_second_orders(db, 6)
+
+    seen, cursor = [], None
+    for _ in range(len(ids)):
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/orders/", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert page["next_cursor"] == response.headers.get(NEXT_CURSOR_HEADER)
+        seen += [order["id"] for order in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert seen == sorted(ids, reverse=True)
+
+
+def test_order_keyset_select_matches_query(db):
+    """The async routers page with select(); the seek must behave the same"""
+    ids = same_second_orders(db, 5)
+
+    seen, cursor = [], None
+    for _ in range(len(ids)):
+        page = db.scalars(order_keyset(select(Order), Order, cursor).limit(2)).all()
+        seen += [order.id for order in page]
+        cursor = order_next_cursor(page, 2)
+        if not cursor:
+            break
+
+    assert seen == sorted(ids, reverse=True)
+
+
+def test_export_date_bounds_include_their_own_second(client, db, admin_headers):
+    """created_from is inclusive and created_to exclusive, also for rows stored at whole seconds"""
+    first, second = same_second_orders(db, 2)
+    for order_id, created_at in ((first, "2026-01-01 10:00:00"), (second, "2026-01-01 10:00:01")):
+        # The text form SQLite's CURRENT_TIMESTAMP default stores
+        db.execute(update(Order).where(Order.id == order_id).values(created_at=literal(created_at)))
+    db.commit()
+
+    response = client.get("/orders/export", headers=admin_headers, params={
+        "format": "ndjson", "created_from": "2026-01-01T10:00:00", "created_to": "2026-01-01T10:00:01",
+    })
+
+    assert response.status_code == 200
+    assert [json.loads(line)["order_id"] for line in response.text.splitlines()] == [first]
+
+
+def test_status_change_returns_the_new_status(client, make_product, place_order, admin_headers):
+    order = place_order({make_product().id: 1}).json()
+
+    response = client.patch(f"/orders/{order['id']}/status", json={"status": "shipping"}, headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "shipping"
+    assert client.get("/orders/").json()["items"][0]["status"] == "shipping"
+
+
+def test_status_change_rejects_unknown_status(client, make_product, place_order, admin_headers):
+    order = place_order({make_product().id: 1}).json()
+
+    response = client.patch(f"/orders/{order['id']}/status", json={"status": "lost"}, headers=admin_headers)
+
+    assert response.status_code == 422
@@ -0,0 +1,54 @@
+import statistics
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+import app.main
+from benchmarks.startup import STARTUP_BUDGET_IMPORT_MS, STARTUP_BUDGET_STARTUP_MS, measure
+from app.database.session import DB_POOL_WARMUP, engine
+from app.main import create_app, templates, templates_digest
+
+
+def cold_worker():
+    """State of a freshly forked worker: empty pools and template caches"""
+    engine.dispose()
+    templates.env.cache.clear()
+    templates_digest.cache_clear()
+
+
+def test_lifespan_warms_pools_and_disposes_them():
+    cold_worker()
+    assert engine.pool.checkedin() == 0
+
+    with TestClient(create_app()) as client:
+        assert engine.pool.checkedin() >= DB_POOL_WARMUP
+        assert client.get("/api/health").status_code == 200
+        assert engine.pool.checkedout() == 0
+
+    assert engine.pool.checkedin() == 0
+
+
+def test_lifespan_compiles_templates():
+    cold_worker()
+
+    with TestClient(create_app()):
+        compiled = {template.name for template in templates.env.cache.values()}
+        assert compiled == set(templates.env.list_templates(extensions=["html"]))
+        assert templates_digest.cache_info().currsize == 1
+
+
+def test_worker_starts_without_the_database(monkeypatch):
+    async def unreachable(*args, **kwargs):
+        raise OperationalError("connect", {}, Exception("connection refused"))
+
+    cold_worker()
+    monkeypatch.setattr(app.main, "warm_up_engines", unreachable)
+
+    with TestClient(create_app()) as client:
+        assert engine.pool.checkedin() == 0
+        assert client.get("/api/health").status_code == 200
+
+
+def test_import_and_startup_within_budget():
+    """Fresh interpreters, as workers start; budgets from STARTUP_BUDGET_IMPORT_MS / _STARTUP_MS"""
+    samples = measure(runs=3)
+    assert statistics.median(samples["import_ms"]) <= STARTUP_BUDGET_IMPORT_MS, samples
+    assert statistics.median(samples["startup_ms"]) <= STARTUP_BUDGET_STARTUP_MS, samples
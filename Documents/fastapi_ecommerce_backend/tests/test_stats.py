@@ -0,0 +1,92 @@
+from sqlalchemy import select
+from app.models import Job, Order, StoreStats
+from app.services.jobs import run_pending_jobs
+from app.services.stats import (
+    STORE_STATS_ID, apply_stats_delta, rebuild_stats, stats_aggregate_query, stats_upsert_statement,
+)
+
+
+def dashboard(client) -> dict:
+    response = client.get("/api/dashboard/stats")
+    assert response.status_code == 200
+    return response.json()
+
+
+def aggregated(db) -> dict:
+    row = db.execute(stats_aggregate_query()).one()._mapping
+    return {field: float(value) if field == "total_revenue" else value for field, value in row.items()}
+
+
+def work(db) -> None:
+    """Run the queued jobs, as the worker process would"""
+    db.rollback()
+    run_pending_jobs(db)
+
+
+def test_dashboard_tracks_order_writes_through_the_worker(client, db, make_product, place_order, admin_headers):
+    widget = make_product(price=500, stock=20)
+    first = place_order({widget.id: 2}, session_id="a").json()
+    second = place_order({widget.id: 1}, session_id="b").json()
+    work(db)
+    assert dashboard(client) == aggregated(db)
+    assert dashboard(client)["total_orders"] == 2
+    assert dashboard(client)["pending_orders"] == 2
+
+    assert client.patch(f"/orders/{first['id']}/status", json={"status": "completed"},
+                        headers=admin_headers).status_code == 200
+    work(db)
+    assert dashboard(client) == aggregated(db)
+    assert dashboard(client)["total_revenue"] == 1000
+
+    assert client.delete(f"/orders/{second['id']}", headers=admin_headers).status_code == 204
+    work(db)
+    stats = dashboard(client)
+    assert stats == aggregated(db)
+    assert (stats["total_orders"], stats["pending_orders"]) == (1, 0)
+
+
+def test_order_counters_never_go_negative_before_the_worker_runs(client, make_product, place_order, admin_headers):
+    widget = make_product(stock=20)
+    assert dashboard(client)["total_orders"] == 0
+    order = place_order({widget.id: 1}).json()
+    assert client.delete(f"/orders/{order['id']}", headers=admin_headers).status_code == 204
+
+    stats = dashboard(client)
+    assert (stats["total_orders"], stats["pending_orders"]) == (0, 0)
+
+
+def test_rebuild_supersedes_queued_deltas(client, db, make_product, place_order):
+    widget = make_product(stock=20)
+    place_order({widget.id: 1}, session_id="a")
+    place_order({widget.id: 1}, session_id="b")
+
+    db.rollback()
+    assert rebuild_stats(db).total_orders == 2
+    db.commit()
+    work(db)
+
+    assert dashboard(client) == aggregated(db)
+    assert dashboard(client)["total_orders"] == 2
+    assert db.scalars(select(Job.status)).all() == ["done"] * 4
+
+
+def test_first_delta_builds_the_row_once(db, make_product):
+    make_product()
+    db.add(Order(guest_name="A", guest_email="a@example.com", guest_phone="1", status="pending"))
+    apply_stats_delta(db, total_orders=1, pending_orders=1)
+    db.commit()
+
+    stats = db.scalar(select(StoreStats).where(StoreStats.id == STORE_STATS_ID))
+    assert (stats.total_products, stats.total_orders, stats.pending_orders) == (1, 1, 1)
+
+
+def test_first_delta_adds_to_a_row_created_concurrently(db, make_product):
+    """A writer that saw no row but lost the insert race adds its change to the winner's row"""
+    make_product()
+    winner = {"total_products": 1, "total_orders": 1, "pending_orders": 1, "total_revenue": 0}
+    db.execute(stats_upsert_statement(db.bind.dialect.name, winner))
+    db.execute(stats_upsert_statement(db.bind.dialect.name, winner, {"total_orders": 1, "pending_orders": 1}))
+    db.commit()
+
+    stats = db.get(StoreStats, STORE_STATS_ID)
+    assert (stats.total_orders, stats.pending_orders) == (2, 2)